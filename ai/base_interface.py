@@ -4,7 +4,7 @@ Defines the abstract interface that all AI implementations must follow.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 
 class AIInterface(ABC):
@@ -28,6 +28,36 @@ class AIInterface(ABC):
         """
         pass
 
+    async def generate_response_stream(self, prompt: str, user_id: int, style: Dict = None) -> AsyncIterator[str]:
+        """
+        Stream a response to user's message as text chunks.
+
+        Default implementation yields the full generate_response result as
+        a single chunk; implementations with native streaming override it.
+
+        Args:
+            prompt: The user's message/prompt
+            user_id: Telegram user ID
+            style: Optional style parameters (formality, language, etc.)
+
+        Yields:
+            Response text chunks
+        """
+        yield await self.generate_response(prompt, user_id, style)
+
+    @abstractmethod
+    async def generate_responses_bulk(self, items: List[Tuple[str, int, Optional[Dict]]]) -> List[str]:
+        """
+        Generate responses for many messages concurrently.
+
+        Args:
+            items: List of (prompt, user_id, style) tuples
+
+        Returns:
+            List of response strings, in the same order as items
+        """
+        pass
+
     @abstractmethod
     async def generate_plan(self, user_data: Dict) -> Dict:
         """
@@ -54,3 +84,11 @@ class AIInterface(ABC):
             List of daily tasks as strings
         """
         pass
+
+    async def close(self) -> None:
+        """
+        Release resources held by the AI implementation.
+
+        Called once on bot shutdown. Default implementation does nothing.
+        """
+        pass
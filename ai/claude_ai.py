@@ -4,10 +4,16 @@ Real Claude API integration for production use.
 """
 
 import os
+import re
+import json
 import asyncio
-from typing import Dict, List, Callable, Any
-from datetime import datetime
-import anthropic
+import hashlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, List, Callable, Any, Awaitable, AsyncIterator, Optional, Tuple
+from datetime import datetime, timezone
+from functools import cached_property
+from time import perf_counter
 import time
 
 from ai.base_interface import AIInterface
@@ -15,6 +21,40 @@ from utils.logger import logger
 from utils.style_detector import StyleDetector
 from utils.cost_tracker import CostTracker
 
+# Year section headers in plan responses: "ГОД 1:" (Russian), "1 ЖЫЛ:" (Kazakh)
+_YEAR_SPLIT_RU = re.compile(r'(ГОД\s+\d+:)')
+_YEAR_SPLIT_KZ = re.compile(r'(\d+\s+ЖЫЛ:)')
+
+# Leading bullet markers of a milestone line
+_BULLET = re.compile(r'^[-•*][-•*\s]*')
+
+# Leading numbering/bullets of a task line ("1. ", "2) ", "- ", "• ")
+_TASK_PREFIX = re.compile(r'^[\s0-9.\-)•]+')
+
+# Static fallback plans used when the API fails (year 5 description is the goal)
+_FALLBACK_YEARS_RU = (
+    {'year': 1, 'title': 'Фундамент', 'description': 'Построение основы', 'milestones': ('Начало', 'Обучение', 'Практика')},
+    {'year': 2, 'title': 'Развитие', 'description': 'Развитие навыков', 'milestones': ('Углубление', 'Применение', 'Совершенствование')},
+    {'year': 3, 'title': 'Рост', 'description': 'Набор опыта', 'milestones': ('Экспертиза', 'Менторство', 'Проекты')},
+    {'year': 4, 'title': 'Мастерство', 'description': 'Достижение мастерства', 'milestones': ('Лидерство', 'Инновации', 'Признание')},
+    {'year': 5, 'title': 'Цель', 'description': '', 'milestones': ('Достижение', 'Передача опыта', 'Новые горизонты')}
+)
+_FALLBACK_YEARS_KZ = (
+    {'year': 1, 'title': 'Іргетас', 'description': 'Негізді қалау', 'milestones': ('Бастау', 'Үйрену', 'Практика')},
+    {'year': 2, 'title': 'Даму', 'description': 'Дағдыларды дамыту', 'milestones': ('Тереңдету', 'Қолдану', 'Жетілдіру')},
+    {'year': 3, 'title': 'Өсу', 'description': 'Тәжірибе жинау', 'milestones': ('Сарапшылық', 'Менторлық', 'Жоба')},
+    {'year': 4, 'title': 'Шеберлік', 'description': 'Мастер болу', 'milestones': ('Көшбасшылық', 'Инновация', 'Тану')},
+    {'year': 5, 'title': 'Мақсат', 'description': '', 'milestones': ('Жетістік', 'Беру', 'Жаңа')}
+)
+
+# JSON shape requested from Claude for generated plans
+_PLAN_JSON_SCHEMA = '{"years":[{"title":str,"description":str,"milestones":[str]}]}'
+
+
+def _user_message(prompt: str) -> tuple:
+    """Build the single-turn messages payload for a user prompt."""
+    return ({"role": "user", "content": prompt},)
+
 
 class ClaudeAI(AIInterface):
     """
@@ -22,6 +62,14 @@ class ClaudeAI(AIInterface):
     Integrates with Anthropic's Claude API.
     """
 
+    kind = 'claude'  # Read by ai.factory.get_ai_info
+
+    # Longest server-requested rate limit wait we are willing to sleep through
+    RATE_LIMIT_MAX_DELAY = 60.0
+
+    # Backoff cap for 529 (API overloaded) errors
+    OVERLOADED_MAX_DELAY = 30.0
+
     def __init__(self):
         """Initialize Claude AI with API key."""
         self.api_key = os.getenv('ANTHROPIC_API_KEY')
@@ -32,28 +80,129 @@ class ClaudeAI(AIInterface):
                 "Please add it to your .env file."
             )
 
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        # Imported here so FakeAI-only runs never load the Claude SDK
+        import anthropic
+        self._anthropic = anthropic
+
+        # Exception classes bound once for the retry hot path
+        self._APIError = anthropic.APIError
+        self._RateLimitError = anthropic.RateLimitError
+        self._APIConnectionError = anthropic.APIConnectionError
+        self._APIStatusError = anthropic.APIStatusError
+
         self.model_name = "claude-3-5-sonnet-20241022"  # Latest Sonnet model
         self.style_detector = StyleDetector()
         self.cost_tracker = CostTracker()
 
+        # Concurrency limits for in-flight API calls (tune against account RPM)
+        self.max_concurrency = int(os.getenv('CLAUDE_MAX_CONCURRENCY', '4'))
+        self.max_user_concurrency = int(os.getenv('CLAUDE_MAX_USER_CONCURRENCY', '1'))
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._user_semaphores: Dict[int, asyncio.Semaphore] = {}
+        self._user_inflight: Dict[int, int] = {}
+
+        # Exact-match LRU cache for generate_response: key -> (stored_at, text)
+        self._response_cache: OrderedDict[str, Tuple[float, str]] = OrderedDict()
+        self._cache_max = 2048
+        self._cache_ttl = 3600
+        self._cache_lock = asyncio.Lock()
+
+        # Optional semantic cache for near-duplicate prompts (loaded on first use)
+        self.use_semantic_cache = os.getenv('USE_SEMANTIC_CACHE', 'false').lower() == 'true'
+        self._semantic_cache = None
+
+        # Cache hits are counted here rather than as cost records, so the
+        # cost tracker's request counts only cover real API calls
+        self._response_cache_hits = 0
+        self._semantic_cache_hits = 0
+
+        # Cost records are buffered and saved in batches by a background task
+        self._cost_queue: asyncio.Queue = asyncio.Queue()
+        self._cost_task: Optional[asyncio.Task] = None
+        self._cost_flush_size = 100
+        self._cost_flush_interval = 5.0
+
+        # Memoized system prompts: style key -> (style prompt, verbosity suffix)
+        self._system_prompt_cache: Dict[tuple, Tuple[str, str]] = {}
+
         logger.info(f"Claude AI initialized with model: {self.model_name}")
 
+    @cached_property
+    def client(self):
+        """
+        Get the Anthropic client, constructing it on first use.
+
+        Native async client: the SDK's own retries are disabled because
+        _retry_with_backoff already handles them.
+        """
+        return self._anthropic.AsyncAnthropic(
+            api_key=self.api_key,
+            max_retries=0,
+            timeout=60.0
+        )
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """
+        Get the global API semaphore, creating it on first use.
+
+        Created lazily so it binds to the running event loop, not the one
+        (if any) that existed when ClaudeAI was constructed.
+
+        Returns:
+            Semaphore bounding concurrent Claude API calls
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    @asynccontextmanager
+    async def _user_slot(self, user_id: Optional[int]):
+        """
+        Limit concurrent API calls per user so one user can't starve others.
+
+        Args:
+            user_id: Telegram user ID (None disables the per-user limit)
+        """
+        if user_id is None:
+            yield
+            return
+
+        semaphore = self._user_semaphores.get(user_id)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_user_concurrency)
+            self._user_semaphores[user_id] = semaphore
+        self._user_inflight[user_id] = self._user_inflight.get(user_id, 0) + 1
+
+        try:
+            async with semaphore:
+                yield
+        finally:
+            # Drop the user's semaphore once nothing is waiting on it
+            self._user_inflight[user_id] -= 1
+            if not self._user_inflight[user_id]:
+                del self._user_inflight[user_id]
+                del self._user_semaphores[user_id]
+
     async def _retry_with_backoff(
         self,
-        func: Callable,
+        func: Callable[[], Awaitable[Any]],
         max_retries: int = 3,
         initial_delay: float = 1.0,
-        max_delay: float = 10.0
+        max_delay: float = 10.0,
+        user_id: Optional[int] = None
     ) -> Any:
         """
-        Retry a function with exponential backoff.
+        Retry an async API call with exponential backoff.
+
+        The whole retry loop (including backoff sleeps) runs inside the
+        global and per-user concurrency slots.
 
         Args:
-            func: Function to retry
+            func: Zero-argument callable returning a new coroutine per attempt
             max_retries: Maximum number of retry attempts
             initial_delay: Initial delay in seconds
             max_delay: Maximum delay in seconds
+            user_id: Telegram user ID for per-user concurrency limiting
 
         Returns:
             Result from the function
@@ -61,40 +210,103 @@ class ClaudeAI(AIInterface):
         Raises:
             Last exception if all retries fail
         """
+        async with self._user_slot(user_id), self._get_semaphore():
+            return await self._call_with_backoff(func, max_retries, initial_delay, max_delay)
+
+    async def _call_with_backoff(
+        self,
+        func: Callable[[], Awaitable[Any]],
+        max_retries: int,
+        initial_delay: float,
+        max_delay: float
+    ) -> Any:
+        """Run the retry loop for _retry_with_backoff."""
+        # Fast path: single attempt, errors propagate as-is
+        if max_retries <= 1:
+            return await func()
+
         delay = initial_delay
         last_exception = None
 
-        for attempt in range(max_retries):
+        for attempt in range(1, max_retries + 1):
+            cap = max_delay
             try:
-                return await asyncio.to_thread(func)
-            except anthropic.RateLimitError as e:
+                return await func()
+            except self._RateLimitError as e:
                 last_exception = e
-                logger.warning(f"Rate limit hit, attempt {attempt + 1}/{max_retries}. Waiting {delay}s...")
-                await asyncio.sleep(delay)
-                delay = min(delay * 2, max_delay)  # Exponential backoff
-            except anthropic.APIConnectionError as e:
+                reason = "Rate limit hit"
+                retry_after = self._get_retry_after(e)
+                if retry_after is None:
+                    wait = delay
+                elif retry_after > self.RATE_LIMIT_MAX_DELAY:
+                    # Limit won't reset soon enough, fail fast instead of sleeping
+                    logger.error(f"Rate limit resets in {retry_after:.1f}s, not retrying")
+                    raise
+                else:
+                    wait = max(retry_after, 0.1)
+            except self._APIConnectionError as e:
                 last_exception = e
-                logger.warning(f"Connection error, attempt {attempt + 1}/{max_retries}. Waiting {delay}s...")
-                await asyncio.sleep(delay)
-                delay = min(delay * 2, max_delay)
-            except anthropic.APIStatusError as e:
+                reason = "Connection error"
+                wait = delay
+            except self._APIStatusError as e:
                 # Don't retry on 4xx errors (except rate limit)
                 if 400 <= e.status_code < 500 and e.status_code != 429:
                     logger.error(f"Client error {e.status_code}: {e}")
                     raise
                 last_exception = e
-                logger.warning(f"API error {e.status_code}, attempt {attempt + 1}/{max_retries}. Waiting {delay}s...")
-                await asyncio.sleep(delay)
-                delay = min(delay * 2, max_delay)
+                reason = f"API error {e.status_code}"
+                wait = delay
+                # Overloaded (529) gets a longer backoff cap
+                if e.status_code == 529:
+                    cap = self.OVERLOADED_MAX_DELAY
             except Exception as e:
                 # Don't retry on unexpected errors
                 logger.error(f"Unexpected error in retry logic: {e}")
                 raise
 
+            # No point sleeping after the final attempt
+            if attempt == max_retries:
+                break
+
+            logger.warning(f"{reason}, attempt {attempt}/{max_retries}. Waiting {wait:.1f}s...")
+            await asyncio.sleep(wait)
+            delay = min(delay * 2, cap)  # Exponential backoff
+
         # All retries exhausted
         logger.error(f"All {max_retries} retry attempts failed")
         raise last_exception
 
+    @staticmethod
+    def _get_retry_after(error: Exception) -> Optional[float]:
+        """
+        Get the server-requested wait from rate limit response headers.
+
+        Args:
+            error: Rate limit error with the HTTP response
+
+        Returns:
+            Seconds to wait, or None if the headers don't say
+        """
+        headers = error.response.headers
+
+        retry_after = headers.get('retry-after')
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+
+        # Reset header is an RFC 3339 timestamp
+        reset_at = headers.get('anthropic-ratelimit-requests-reset')
+        if reset_at:
+            try:
+                reset_time = datetime.fromisoformat(reset_at.replace('Z', '+00:00'))
+                return max(0.0, (reset_time - datetime.now(timezone.utc)).total_seconds())
+            except ValueError:
+                pass
+
+        return None
+
     async def generate_response(self, prompt: str, user_id: int, style: Dict = None) -> str:
         """
         Generate a response using Claude API.
@@ -107,63 +319,161 @@ class ClaudeAI(AIInterface):
         Returns:
             Generated response string adapted to user style
         """
+        chunks = [chunk async for chunk in self.generate_response_stream(prompt, user_id, style)]
+        return "".join(chunks)
+
+    async def generate_response_stream(
+        self,
+        prompt: str,
+        user_id: int,
+        style: Dict = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response from Claude API as text chunks.
+
+        Cache hits and error fallbacks are yielded as a single chunk.
+
+        Args:
+            prompt: The input prompt from user
+            user_id: Telegram user ID
+            style: User style dictionary (formality, language, etc.)
+
+        Yields:
+            Response text chunks adapted to user style
+        """
+        chunks = []
+
         try:
             # Detect style if not provided
             if style is None:
                 style = self.style_detector.analyze_style(prompt)
 
-            # Create system prompt based on style
-            system_prompt = self.style_detector.create_system_prompt(style)
-
-            # Add specific instructions for brief responses
+            # Get (memoized) system prompt based on style
             verbosity = style.get('verbosity', 'brief')
-            if verbosity == 'brief':
-                system_prompt += " Давай краткие ответы (2-3 предложения)."
-            else:
-                system_prompt += " Давай подробные ответы (5-7 предложений)."
+            system_prompt, verbosity_suffix = self._get_system_prompt(style)
+
+            # Stable style prompt is cached, verbosity suffix is sent as-is
+            system_blocks = self._build_system_blocks(system_prompt, verbosity_suffix)
+
+            # Serve repeated prompts from the response cache
+            cache_key = self._response_cache_key(f"{system_prompt} {verbosity_suffix}", prompt)
+            cached_text = await self._get_cached_response(cache_key)
+            if cached_text is not None:
+                self._response_cache_hits += 1
+                logger.info("Response cache hit for user %s", user_id)
+                yield cached_text
+                return
+
+            # Fall back to the semantic cache for near-duplicate prompts
+            semantic_cache = self._get_semantic_cache()
+            embedding = None
+            style_key = (
+                style.get('formality', 'casual'),
+                style.get('language', 'russian'),
+                verbosity
+            )
+            if semantic_cache is not None:
+                embedding = await semantic_cache.embed(prompt)
+                cached_text = semantic_cache.lookup(embedding, style_key)
+                if cached_text is not None:
+                    self._semantic_cache_hits += 1
+                    logger.info("Semantic cache hit for user %s", user_id)
+                    yield cached_text
+                    return
 
             # Call Claude API with retry logic
-            start_time = datetime.now()
-
-            response = await self._retry_with_backoff(
-                lambda: self.client.messages.create(
-                    model=self.model_name,
-                    max_tokens=500,  # Limit response length
-                    system=system_prompt,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
+            start_time = perf_counter()
+
+            # Concurrency slots are held for the whole stream, the retry
+            # loop only covers opening it (errors surface before the first chunk)
+            async with self._user_slot(user_id), self._get_semaphore():
+                manager, stream = await self._call_with_backoff(
+                    lambda: self._open_stream(
+                        model=self.model_name,
+                        max_tokens=500,  # Limit response length
+                        system=system_blocks,
+                        messages=_user_message(prompt)
+                    ),
+                    max_retries=3,
+                    initial_delay=1.0,
+                    max_delay=10.0
                 )
-            )
-
-            # Extract text from response
-            response_text = response.content[0].text
+                try:
+                    async for text in stream.text_stream:
+                        chunks.append(text)
+                        yield text
+                    response = await stream.get_final_message()
+                finally:
+                    await manager.__aexit__(None, None, None)
+
+            response_text = "".join(chunks)
+            await self._store_cached_response(cache_key, response_text)
+            if embedding is not None:
+                semantic_cache.add(embedding, prompt, response_text, style_key)
 
             # Track cost
-            elapsed_time = (datetime.now() - start_time).total_seconds()
-            self.cost_tracker.track_request(
+            elapsed_time = perf_counter() - start_time
+            self._queue_cost(
                 model=self.model_name,
                 input_tokens=response.usage.input_tokens,
                 output_tokens=response.usage.output_tokens,
                 user_id=user_id,
                 request_type='generate_response',
-                elapsed_time=elapsed_time
+                elapsed_time=elapsed_time,
+                cache_read_tokens=getattr(response.usage, 'cache_read_input_tokens', 0) or 0,
+                cache_creation_tokens=getattr(response.usage, 'cache_creation_input_tokens', 0) or 0
             )
 
             logger.info(
-                f"Claude API response generated for user {user_id} "
-                f"(in: {response.usage.input_tokens}, out: {response.usage.output_tokens} tokens)"
+                "Claude API response generated for user %s (in: %d, out: %d tokens)",
+                user_id, response.usage.input_tokens, response.usage.output_tokens
             )
 
-            return response_text
-
-        except anthropic.APIError as e:
+        except self._APIError as e:
             logger.error(f"Claude API error: {e}")
-            return self._get_error_fallback_response(style)
+            if not chunks:
+                yield self._get_error_fallback_response(style)
 
         except Exception as e:
             logger.error(f"Unexpected error in Claude API: {e}")
-            return self._get_error_fallback_response(style)
+            if not chunks:
+                yield self._get_error_fallback_response(style)
+
+    async def _open_stream(self, **params) -> Tuple[Any, Any]:
+        """
+        Open a Claude message stream.
+
+        The HTTP request is sent when the stream is entered, so API errors
+        are raised here and can be retried.
+
+        Returns:
+            Tuple of (stream manager, entered message stream)
+        """
+        manager = self.client.messages.stream(**params)
+        stream = await manager.__aenter__()
+        return manager, stream
+
+    async def generate_responses_bulk(self, items: List[Tuple[str, int, Optional[Dict]]]) -> List[str]:
+        """
+        Generate responses for many messages concurrently.
+
+        Concurrency is bounded by the global and per-user API semaphores.
+
+        Args:
+            items: List of (prompt, user_id, style) tuples
+
+        Returns:
+            List of response strings, in the same order as items
+        """
+        results = await asyncio.gather(
+            *(self.generate_response(prompt, user_id, style) for prompt, user_id, style in items),
+            return_exceptions=True
+        )
+
+        return [
+            self._get_error_fallback_response(style) if isinstance(result, BaseException) else result
+            for result, (_, _, style) in zip(results, items)
+        ]
 
     async def generate_plan(self, user_data: Dict, style: Dict = None) -> Dict:
         """
@@ -203,17 +513,16 @@ class ClaudeAI(AIInterface):
             )
 
             # Call Claude API with retry logic
-            start_time = datetime.now()
+            start_time = perf_counter()
 
             response = await self._retry_with_backoff(
                 lambda: self.client.messages.create(
                     model=self.model_name,
-                    max_tokens=4000,  # Longer response for detailed plan
-                    system=system_prompt,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
+                    max_tokens=2000,  # JSON plan is denser than free-form text
+                    system=self._build_system_blocks(system_prompt),
+                    messages=_user_message(prompt)
+                ),
+                user_id=user_data.get('user_id')
             )
 
             # Parse response into structured plan
@@ -221,19 +530,21 @@ class ClaudeAI(AIInterface):
             plan = self._parse_plan_response(plan_text, user_data, language, style.get('formality', 'casual'))
 
             # Track cost
-            elapsed_time = (datetime.now() - start_time).total_seconds()
-            self.cost_tracker.track_request(
+            elapsed_time = perf_counter() - start_time
+            self._queue_cost(
                 model=self.model_name,
                 input_tokens=response.usage.input_tokens,
                 output_tokens=response.usage.output_tokens,
                 user_id=user_data.get('user_id'),
                 request_type='generate_plan',
-                elapsed_time=elapsed_time
+                elapsed_time=elapsed_time,
+                cache_read_tokens=getattr(response.usage, 'cache_read_input_tokens', 0) or 0,
+                cache_creation_tokens=getattr(response.usage, 'cache_creation_input_tokens', 0) or 0
             )
 
             logger.info(
-                f"Plan generated for user {user_data.get('user_id')} "
-                f"(in: {response.usage.input_tokens}, out: {response.usage.output_tokens} tokens)"
+                "Plan generated for user %s (in: %d, out: %d tokens)",
+                user_data.get('user_id'), response.usage.input_tokens, response.usage.output_tokens
             )
 
             return plan
@@ -254,65 +565,27 @@ class ClaudeAI(AIInterface):
         Returns:
             List of daily tasks as strings
         """
-        try:
-            # Determine year and context
-            year = min(5, (day - 1) // 365 + 1)
-            language = plan_data.get('language', 'russian')
-
-            # Get relevant year's goals from plan
-            years = plan_data.get('years', [])
-            if year <= len(years):
-                year_data = years[year - 1]
-                year_focus = year_data.get('title', f'Year {year}')
-                year_goals = year_data.get('milestones', [])
-            else:
-                year_focus = f"Year {year}"
-                year_goals = []
-
-            # Create prompt
-            if language == 'kazakh':
-                prompt = (
-                    f"{year} жыл, {day} күн.\n"
-                    f"Бағыт: {year_focus}\n"
-                    f"4 практикалық тапсырма жаса (қысқа, нақты, орындалатын).\n"
-                    f"Тек тапсырмалар тізімін жаз, түсініктемесіз."
-                )
-            else:
-                prompt = (
-                    f"Год {year}, день {day}.\n"
-                    f"Фокус: {year_focus}\n"
-                    f"Создай 4 практические задачи (краткие, конкретные, выполнимые).\n"
-                    f"Напиши только список задач, без объяснений."
-                )
+        year, language, prompt = self._build_daily_tasks_prompt(plan_data, day)
 
+        try:
             # Call Claude API with retry logic
-            start_time = datetime.now()
+            start_time = perf_counter()
 
             response = await self._retry_with_backoff(
                 lambda: self.client.messages.create(
                     model=self.model_name,
                     max_tokens=300,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
+                    messages=_user_message(prompt)
+                ),
+                user_id=plan_data.get('user_id')
             )
 
             # Parse tasks from response
-            tasks_text = response.content[0].text
-            tasks = self._parse_tasks_response(tasks_text)
-
-            # Ensure we have exactly 4 tasks
-            if len(tasks) < 4:
-                tasks.extend([
-                    "Дополнительная задача на день",
-                    "Рефлексия и планирование"
-                ][:4 - len(tasks)])
-            tasks = tasks[:4]
+            tasks = self._finalize_tasks(self._parse_tasks_response(response.content[0].text))
 
             # Track cost
-            elapsed_time = (datetime.now() - start_time).total_seconds()
-            self.cost_tracker.track_request(
+            elapsed_time = perf_counter() - start_time
+            self._queue_cost(
                 model=self.model_name,
                 input_tokens=response.usage.input_tokens,
                 output_tokens=response.usage.output_tokens,
@@ -328,67 +601,431 @@ class ClaudeAI(AIInterface):
             # Fallback to generic tasks
             return self._get_fallback_tasks(year, language)
 
-    def _create_russian_plan_prompt(self, name: str, age: int, goals: str) -> str:
-        """Create Russian prompt for plan generation."""
-        return f"""Создай персональный 5-летний план развития для человека:
-- Имя: {name}
-- Возраст: {age}
-- Цели: {goals}
+    async def generate_daily_tasks_batch(
+        self,
+        jobs: List[Tuple[Dict, int]],
+        poll_interval: float = 30.0
+    ) -> List[List[str]]:
+        """
+        Generate daily tasks for many users via the Message Batches API.
 
-Создай план из 5 лет. Для каждого года укажи:
-1. Название года (краткое, мотивирующее)
-2. Описание (1-2 предложения)
-3. 3-4 ключевых этапа (milestones)
+        Batches are billed at a discount but may take a long time to finish,
+        so this is meant for bulk precomputation (e.g. a nightly job), not
+        for interactive requests. Falls back to concurrent per-item calls
+        if the batch cannot be created.
 
-Формат ответа:
-ГОД 1: [название]
-[описание]
-- [этап 1]
-- [этап 2]
-- [этап 3]
+        Args:
+            jobs: List of (plan_data, day) pairs
+            poll_interval: Seconds between batch status checks
 
-[и так далее для всех 5 лет]
+        Returns:
+            List of task lists, in the same order as jobs
+        """
+        if not jobs:
+            return []
+
+        built = [self._build_daily_tasks_prompt(plan_data, day) for plan_data, day in jobs]
+        requests = [
+            {
+                "custom_id": f"{i}_u{plan_data.get('user_id')}_d{day}",
+                "params": {
+                    "model": self.model_name,
+                    "max_tokens": 300,
+                    "messages": _user_message(prompt)
+                }
+            }
+            for i, ((plan_data, day), (_, _, prompt)) in enumerate(zip(jobs, built))
+        ]
 
-План должен быть реалистичным и достижимым."""
+        try:
+            batch = await self.client.messages.batches.create(requests=requests)
+        except Exception as e:
+            logger.warning(f"Message batch unavailable, generating tasks per item: {e}")
+            return list(await asyncio.gather(
+                *(self.generate_daily_tasks(plan_data, day) for plan_data, day in jobs)
+            ))
+
+        logger.info("Daily tasks batch %s created with %d requests", batch.id, len(jobs))
+
+        # Wait for the batch to finish processing
+        while batch.processing_status != "ended":
+            await asyncio.sleep(poll_interval)
+            batch = await self.client.messages.batches.retrieve(batch.id)
+
+        # Map results back to job order via custom_id index prefix
+        results: List[Optional[List[str]]] = [None] * len(jobs)
+        decoder = await self.client.messages.batches.results(batch.id)
+        async for entry in decoder:
+            index = int(entry.custom_id.split('_', 1)[0])
+            if entry.result.type != "succeeded":
+                logger.warning(f"Batch request {entry.custom_id} {entry.result.type}")
+                continue
+
+            message = entry.result.message
+            results[index] = self._finalize_tasks(self._parse_tasks_response(message.content[0].text))
+            self._queue_cost(
+                model=self.model_name,
+                input_tokens=message.usage.input_tokens,
+                output_tokens=message.usage.output_tokens,
+                user_id=jobs[index][0].get('user_id'),
+                request_type='generate_daily_tasks_batch',
+                is_batch=True
+            )
 
-    def _create_kazakh_plan_prompt(self, name: str, age: int, goals: str) -> str:
-        """Create Kazakh prompt for plan generation."""
-        return f"""Адам үшін 5 жылдық жеке даму жоспарын жаса:
-- Аты: {name}
-- Жасы: {age}
-- Мақсаттары: {goals}
+        # Retry failed items one by one
+        for i, tasks in enumerate(results):
+            if tasks is None:
+                plan_data, day = jobs[i]
+                results[i] = await self.generate_daily_tasks(plan_data, day)
+
+        return results
+
+    def _build_daily_tasks_prompt(self, plan_data: Dict, day: int) -> Tuple[int, str, str]:
+        """
+        Build the daily tasks prompt for a plan day.
+
+        Args:
+            plan_data: The user's 5-year plan data
+            day: Day number (1-1825 for 5 years)
+
+        Returns:
+            Tuple of (year, language, prompt)
+        """
+        # Determine year and context
+        year = min(5, (day - 1) // 365 + 1)
+        language = plan_data.get('language', 'russian')
+
+        # Get relevant year's goals from plan
+        years = plan_data.get('years', [])
+        if year <= len(years):
+            year_focus = years[year - 1].get('title', f'Year {year}')
+        else:
+            year_focus = f"Year {year}"
+
+        # Create prompt
+        if language == 'kazakh':
+            prompt = (
+                f"{year} жыл, {day} күн.\n"
+                f"Бағыт: {year_focus}\n"
+                f"4 практикалық тапсырма жаса (қысқа, нақты, орындалатын).\n"
+                f"Тек тапсырмалар тізімін жаз, түсініктемесіз."
+            )
+        else:
+            prompt = (
+                f"Год {year}, день {day}.\n"
+                f"Фокус: {year_focus}\n"
+                f"Создай 4 практические задачи (краткие, конкретные, выполнимые).\n"
+                f"Напиши только список задач, без объяснений."
+            )
+
+        return year, language, prompt
+
+    def _finalize_tasks(self, tasks: List[str]) -> List[str]:
+        """Pad parsed tasks with filler tasks and trim them to at most 4."""
+        if len(tasks) < 4:
+            tasks.extend([
+                "Дополнительная задача на день",
+                "Рефлексия и планирование"
+            ][:4 - len(tasks)])
+        return tasks[:4]
 
-5 жылдың жоспарын жаса. Әр жыл үшін көрсет:
-1. Жылдың атауы (қысқа, ынталандырушы)
-2. Сипаттама (1-2 сөйлем)
-3. 3-4 негізгі кезең
+    def _queue_cost(self, **request) -> None:
+        """
+        Queue an API request for cost tracking off the response path.
+
+        Args:
+            **request: CostTracker.track_request fields
+        """
+        raw = f"{request.get('user_id')}|{request.get('request_type')}|{time.time_ns()}".encode('utf-8')
+        request['request_id'] = hashlib.blake2b(raw, digest_size=8).hexdigest()
+        self._cost_queue.put_nowait(request)
+
+        if self._cost_task is None or self._cost_task.done():
+            self._cost_task = asyncio.create_task(self._cost_flusher())
+
+    async def _cost_flusher(self) -> None:
+        """Save queued cost records in batches of up to 100 or every 5 seconds."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._cost_queue.get()]
+            deadline = loop.time() + self._cost_flush_interval
+
+            try:
+                while len(batch) < self._cost_flush_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._cost_queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Keep the collected records; close() saves them
+                self.cost_tracker.track_request_batch(batch)
+                raise
+
+            # File writes run in a worker thread, off the event loop
+            await self.cost_tracker.track_request_batch_async(batch)
+
+    async def close(self) -> None:
+        """Stop the cost flusher and save all tracked cost records."""
+        if self._cost_task is not None:
+            self._cost_task.cancel()
+            try:
+                await self._cost_task
+            except asyncio.CancelledError:
+                pass
+            self._cost_task = None
+
+        pending = []
+        while not self._cost_queue.empty():
+            pending.append(self._cost_queue.get_nowait())
+        self.cost_tracker.track_request_batch(pending)
+        self.cost_tracker.flush()
+
+    def _get_system_prompt(self, style: Dict) -> Tuple[str, str]:
+        """
+        Get system prompt parts for a style, building them once per style.
+
+        Args:
+            style: User style dictionary
+
+        Returns:
+            Tuple of (style system prompt, verbosity suffix)
+        """
+        key = (
+            style.get('formality', 'casual'),
+            style.get('language', 'russian'),
+            style.get('emoji_usage', 'low'),
+            style.get('verbosity', 'brief')
+        )
+
+        cached = self._system_prompt_cache.get(key)
+        if cached is not None:
+            return cached
+
+        system_prompt = self.style_detector.create_system_prompt(style)
+
+        # Add specific instructions for brief responses
+        if key[3] == 'brief':
+            verbosity_suffix = "Давай краткие ответы (2-3 предложения)."
+        else:
+            verbosity_suffix = "Давай подробные ответы (5-7 предложений)."
 
-Жауап форматы:
-1 ЖЫЛ: [атауы]
-[сипаттама]
-- [кезең 1]
-- [кезең 2]
-- [кезең 3]
+        self._system_prompt_cache[key] = (system_prompt, verbosity_suffix)
+        return system_prompt, verbosity_suffix
+
+    def _get_semantic_cache(self):
+        """
+        Get the semantic cache, loading it on first use.
 
-[барлық 5 жылға осылай]
+        Returns:
+            SemanticCache instance, or None if disabled or unavailable
+        """
+        if not self.use_semantic_cache:
+            return None
+
+        if self._semantic_cache is None:
+            try:
+                from utils.semantic_cache import SemanticCache
+                self._semantic_cache = SemanticCache()
+            except ImportError as e:
+                logger.warning(f"Semantic cache disabled, missing dependency: {e}")
+                self.use_semantic_cache = False
+                return None
 
-Жоспар нақты және қол жетімді болуы керек."""
+        return self._semantic_cache
+
+    def cache_info(self) -> Dict[str, int]:
+        """
+        Get response cache statistics.
+
+        Returns:
+            Dictionary with response and semantic cache hits, size and maxsize
+        """
+        return {
+            'response_hits': self._response_cache_hits,
+            'semantic_hits': self._semantic_cache_hits,
+            'size': len(self._response_cache),
+            'maxsize': self._cache_max
+        }
+
+    def _response_cache_key(self, system_prompt: str, prompt: str) -> str:
+        """
+        Build response cache key from model, system prompt and user prompt.
+
+        Args:
+            system_prompt: Full system prompt text
+            prompt: User's prompt
+
+        Returns:
+            Hex digest identifying the request
+        """
+        raw = f"{self.model_name}|{system_prompt}|{prompt}".encode('utf-8')
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+    async def _get_cached_response(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response, dropping it if expired.
+
+        Args:
+            key: Response cache key
+
+        Returns:
+            Cached response text or None on miss
+        """
+        async with self._cache_lock:
+            entry = self._response_cache.get(key)
+            if entry is None:
+                return None
+
+            stored_at, text = entry
+            if time.time() - stored_at > self._cache_ttl:
+                del self._response_cache[key]
+                return None
+
+            self._response_cache.move_to_end(key)
+            return text
+
+    async def _store_cached_response(self, key: str, text: str) -> None:
+        """
+        Store a response in the LRU cache, evicting the oldest entries.
+
+        Args:
+            key: Response cache key
+            text: Response text to cache
+        """
+        async with self._cache_lock:
+            self._response_cache[key] = (time.time(), text)
+            self._response_cache.move_to_end(key)
+            while len(self._response_cache) > self._cache_max:
+                self._response_cache.popitem(last=False)
+
+    def _build_system_blocks(self, cached_text: str, *extra_texts: str) -> List[Dict]:
+        """
+        Build system prompt blocks with Anthropic prompt caching.
+
+        The first block is marked with cache_control so repeated calls with
+        the same prefix are billed at the cached input rate. Extra blocks
+        are appended after the cached prefix without caching.
+
+        Args:
+            cached_text: Stable system prompt text to cache
+            extra_texts: Dynamic text appended after the cached prefix
+
+        Returns:
+            List of system content blocks for messages.create
+        """
+        blocks = [{
+            "type": "text",
+            "text": cached_text,
+            "cache_control": {"type": "ephemeral"}
+        }]
+        blocks.extend({"type": "text", "text": text} for text in extra_texts)
+        return blocks
+
+    def _create_russian_plan_prompt(self, name: str, age: int, goals: str) -> str:
+        """Create Russian prompt for plan generation."""
+        return (
+            f"5-летний план развития. Имя: {name}, возраст: {age}, цели: {goals}.\n"
+            f"Реалистичный и достижимый. Ответь строго JSON без пояснений:\n"
+            f"{_PLAN_JSON_SCHEMA}\n"
+            f"Ровно 5 лет; title краткий, description 1-2 предложения, 3-4 milestones."
+        )
+
+    def _create_kazakh_plan_prompt(self, name: str, age: int, goals: str) -> str:
+        """Create Kazakh prompt for plan generation."""
+        return (
+            f"5 жылдық даму жоспары. Аты: {name}, жасы: {age}, мақсаттары: {goals}.\n"
+            f"Нақты әрі қол жетімді. Тек JSON түрінде жауап бер, түсініктемесіз:\n"
+            f"{_PLAN_JSON_SCHEMA}\n"
+            f"Дәл 5 жыл; title қысқа, description 1-2 сөйлем, 3-4 milestones."
+        )
 
     def _parse_plan_response(self, plan_text: str, user_data: Dict, language: str, formality: str) -> Dict:
         """Parse Claude's response into structured plan."""
-        # Basic parsing - split by years
+        # Prefer the JSON format, fall back to the legacy text format
+        years = self._parse_plan_json(plan_text)
+        if years is None:
+            years = self._parse_plan_text(plan_text, language)
+
+        # Ensure we have 5 years
+        while len(years) < 5:
+            year_num = len(years) + 1
+            years.append({
+                'year': year_num,
+                'title': f"Год {year_num}",
+                'description': f"Развитие на {year_num} году",
+                'milestones': [f"Этап {i}" for i in range(1, 4)]
+            })
+
+        return {
+            'user_name': user_data.get('name', 'пользователь'),
+            'goal': user_data.get('goals', ''),
+            'greeting': user_data.get('name', 'пользователь'),
+            'years': years[:5],
+            'language': language,
+            'formality': formality,
+            'created_at': datetime.now().isoformat()
+        }
+
+    def _parse_plan_json(self, plan_text: str) -> Optional[List[Dict]]:
+        """
+        Parse years from a JSON plan response.
+
+        Args:
+            plan_text: Raw response text, possibly wrapped in a code fence
+
+        Returns:
+            List of year dictionaries, or None if the text is not valid JSON
+        """
+        start = plan_text.find('{')
+        end = plan_text.rfind('}')
+        if start == -1 or end <= start:
+            return None
+
+        try:
+            data = json.loads(plan_text[start:end + 1])
+            raw_years = data['years']
+        except (json.JSONDecodeError, KeyError, TypeError):
+            return None
+
+        if not isinstance(raw_years, list):
+            return None
+
+        years = []
+        for year_num, year_data in enumerate(raw_years, 1):
+            if not isinstance(year_data, dict):
+                continue
+            milestones = [str(m) for m in year_data.get('milestones') or []]
+            years.append({
+                'year': year_num,
+                'title': str(year_data.get('title') or f"Год {year_num}"),
+                'description': str(year_data.get('description') or ''),
+                'milestones': milestones[:4] if milestones else self._default_milestones(year_num)
+            })
+
+        return years
+
+    def _parse_plan_text(self, plan_text: str, language: str) -> List[Dict]:
+        """
+        Parse years from a free-form "ГОД N:" / "N ЖЫЛ:" plan response.
+
+        Args:
+            plan_text: Raw response text
+            language: Plan language ('russian' or 'kazakh')
+
+        Returns:
+            List of year dictionaries
+        """
         years = []
 
         # Split text into year sections
-        year_sections = []
         if language == 'kazakh':
-            # Look for "1 ЖЫЛ:", "2 ЖЫЛ:", etc.
-            import re
-            year_sections = re.split(r'(\d+\s+ЖЫЛ:)', plan_text)
+            year_sections = _YEAR_SPLIT_KZ.split(plan_text)
         else:
-            # Look for "ГОД 1:", "ГОД 2:", etc.
-            import re
-            year_sections = re.split(r'(ГОД\s+\d+:)', plan_text)
+            year_sections = _YEAR_SPLIT_RU.split(plan_text)
 
         # Parse each year
         for i in range(1, len(year_sections), 2):
@@ -408,8 +1045,9 @@ class ClaudeAI(AIInterface):
 
             for line in lines[1:]:
                 line = line.strip()
-                if line.startswith('-') or line.startswith('•') or line.startswith('*'):
-                    milestones.append(line.lstrip('-•* '))
+                bullet = _BULLET.match(line)
+                if bullet:
+                    milestones.append(line[bullet.end():])
                 elif line and not milestones:
                     description += " " + line
 
@@ -417,43 +1055,27 @@ class ClaudeAI(AIInterface):
                 'year': year_num,
                 'title': title,
                 'description': description.strip(),
-                'milestones': milestones[:4] if milestones else [
-                    f"Этап 1 года {year_num}",
-                    f"Этап 2 года {year_num}",
-                    f"Этап 3 года {year_num}"
-                ]
+                'milestones': milestones[:4] if milestones else self._default_milestones(year_num)
             })
 
-        # Ensure we have 5 years
-        while len(years) < 5:
-            year_num = len(years) + 1
-            years.append({
-                'year': year_num,
-                'title': f"Год {year_num}",
-                'description': f"Развитие на {year_num} году",
-                'milestones': [f"Этап {i}" for i in range(1, 4)]
-            })
+        return years
 
-        return {
-            'user_name': user_data.get('name', 'пользователь'),
-            'goal': user_data.get('goals', ''),
-            'greeting': user_data.get('name', 'пользователь'),
-            'years': years[:5],
-            'language': language,
-            'formality': formality,
-            'created_at': datetime.now().isoformat()
-        }
+    def _default_milestones(self, year_num: int) -> List[str]:
+        """Get placeholder milestones for a year without any."""
+        return [
+            f"Этап 1 года {year_num}",
+            f"Этап 2 года {year_num}",
+            f"Этап 3 года {year_num}"
+        ]
 
     def _parse_tasks_response(self, tasks_text: str) -> List[str]:
         """Parse tasks from Claude's response."""
         tasks = []
-        lines = tasks_text.strip().split('\n')
 
-        for line in lines:
-            line = line.strip()
-            # Remove numbering and bullet points
-            line = line.lstrip('0123456789.-)• \t')
-            if line and len(line) > 5:  # Minimum task length
+        for line in tasks_text.splitlines():
+            # Remove numbering, bullet points and surrounding whitespace
+            line = _TASK_PREFIX.sub('', line).rstrip()
+            if len(line) > 5:  # Minimum task length
                 tasks.append(line)
 
         return tasks
@@ -480,22 +1102,11 @@ class ClaudeAI(AIInterface):
         name = user_data.get('name', 'User')
         goal = user_data.get('goals', 'развитие')
 
-        if language == 'kazakh':
-            years = [
-                {'year': 1, 'title': 'Іргетас', 'description': 'Негізді қалау', 'milestones': ['Бастау', 'Үйрену', 'Практика']},
-                {'year': 2, 'title': 'Даму', 'description': 'Дағдыларды дамыту', 'milestones': ['Тереңдету', 'Қолдану', 'Жетілдіру']},
-                {'year': 3, 'title': 'Өсу', 'description': 'Тәжірибе жинау', 'milestones': ['Сарапшылық', 'Менторлық', 'Жоба']},
-                {'year': 4, 'title': 'Шеберлік', 'description': 'Мастер болу', 'milestones': ['Көшбасшылық', 'Инновация', 'Тану']},
-                {'year': 5, 'title': 'Мақсат', 'description': goal, 'milestones': ['Жетістік', 'Беру', 'Жаңа']}
-            ]
-        else:
-            years = [
-                {'year': 1, 'title': 'Фундамент', 'description': 'Построение основы', 'milestones': ['Начало', 'Обучение', 'Практика']},
-                {'year': 2, 'title': 'Развитие', 'description': 'Развитие навыков', 'milestones': ['Углубление', 'Применение', 'Совершенствование']},
-                {'year': 3, 'title': 'Рост', 'description': 'Набор опыта', 'milestones': ['Экспертиза', 'Менторство', 'Проекты']},
-                {'year': 4, 'title': 'Мастерство', 'description': 'Достижение мастерства', 'milestones': ['Лидерство', 'Инновации', 'Признание']},
-                {'year': 5, 'title': 'Цель', 'description': goal, 'milestones': ['Достижение', 'Передача опыта', 'Новые горизонты']}
-            ]
+        # Copy the static template (milestones as lists, like parsed plans);
+        # year 5 is described by the user's goal
+        template = _FALLBACK_YEARS_KZ if language == 'kazakh' else _FALLBACK_YEARS_RU
+        years = [{**year, 'milestones': list(year['milestones'])} for year in template]
+        years[4]['description'] = goal
 
         return {
             'user_name': name,
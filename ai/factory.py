@@ -6,8 +6,6 @@ Creates AI instances based on configuration.
 import os
 from utils.logger import logger
 from ai.base_interface import AIInterface
-from ai.fake_interface import FakeAI
-from ai.claude_ai import ClaudeAI
 
 
 def create_ai() -> AIInterface:
@@ -23,12 +21,16 @@ def create_ai() -> AIInterface:
     """
     use_fake = os.getenv('USE_FAKE_AI', 'true').lower() == 'true'
 
+    # Implementations are imported lazily so FakeAI-only runs never load the Claude SDK
+    from ai.fake_interface import FakeAI
+
     if use_fake:
         logger.info("🎭 Using FakeAI for development (USE_FAKE_AI=true)")
         return FakeAI()
     else:
         logger.info("🤖 Using Claude AI (USE_FAKE_AI=false)")
         try:
+            from ai.claude_ai import ClaudeAI
             return ClaudeAI()
         except Exception as e:
             logger.error(f"Failed to initialize ClaudeAI: {e}")
@@ -46,10 +48,12 @@ def get_ai_info(ai_instance) -> dict:
     Returns:
         Dictionary with AI information
     """
+    kind = getattr(ai_instance, 'kind', 'unknown')
+
     return {
         'model_name': getattr(ai_instance, 'model_name', 'Unknown'),
-        'is_fake': isinstance(ai_instance, FakeAI),
-        'is_claude': isinstance(ai_instance, ClaudeAI),
+        'is_fake': kind == 'fake',
+        'is_claude': kind == 'claude',
         'has_style_detection': hasattr(ai_instance, 'style_detector'),
         'has_cost_tracking': hasattr(ai_instance, 'cost_tracker')
     }
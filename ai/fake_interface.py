@@ -5,12 +5,364 @@ Simulates AI responses with personality adaptation.
 """
 
 import asyncio
+import hashlib
+import os
 import random
-from typing import Dict, Any, List
+import re
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from ai.base_interface import AIInterface
 from utils.style_detector import StyleDetector
 
+# Bound once for the simulated-latency sleeps
+_RAND = random.random
+
+# Intent keywords checked in priority order. Keywords are stems matched
+# anywhere in the lowercased prompt, so inflected forms ("планирование",
+# "приветствую", "жоспарымды") route like the stem itself
+_RAW_INTENT_KEYWORDS = (
+    ('plan', ('план', 'жоспар', 'plan', 'roadmap')),
+    ('help', ('помощь', 'help', 'көмек', 'көмектес')),
+    ('greeting', ('прив', 'салам', 'сәлем', 'hello', 'hi')),
+)
+
+# One compiled alternation per intent, so each check is a single regex search
+_INTENT_PATTERNS = tuple(
+    (intent, re.compile('|'.join(map(re.escape, words))))
+    for intent, words in _RAW_INTENT_KEYWORDS
+)
+
+
+# Static plan years; year 5 description is formatted with the user's goal
+_RU_PLAN_YEARS = (
+    {
+        "year": 1,
+        "title": "Фундамент и основы",
+        "description": "Изучение базовых навыков и построение фундамента",
+        "milestones": (
+            "Освоение основных инструментов",
+            "Первые практические проекты",
+            "Нетворкинг и поиск менторов"
+        )
+    },
+    {
+        "year": 2,
+        "title": "Практика и опыт",
+        "description": "Применение знаний на практике",
+        "milestones": (
+            "Работа над реальными проектами",
+            "Развитие профессиональных навыков",
+            "Первые достижения"
+        )
+    },
+    {
+        "year": 3,
+        "title": "Рост и развитие",
+        "description": "Углубление экспертизы",
+        "milestones": (
+            "Становление экспертом",
+            "Обучение других",
+            "Расширение влияния"
+        )
+    },
+    {
+        "year": 4,
+        "title": "Мастерство",
+        "description": "Достижение высокого уровня",
+        "milestones": (
+            "Признание в профессии",
+            "Сложные проекты",
+            "Лидерство"
+        )
+    },
+    {
+        "year": 5,
+        "title": "Цель достигнута",
+        "description": "Достижение цели: {goal}",
+        "milestones": (
+            "Реализация амбиций",
+            "Новые горизонты",
+            "Передача опыта"
+        )
+    }
+)
+
+_KZ_PLAN_YEARS = (
+    {
+        "year": 1,
+        "title": "Іргетас және негіздер",
+        "description": "Базалық дағдыларды үйрену және іргетас қалау",
+        "milestones": (
+            "Негізгі құралдарды меңгеру",
+            "Алғашқы практикалық жобалар",
+            "Желілік байланыс және менторлар іздеу"
+        )
+    },
+    {
+        "year": 2,
+        "title": "Практика және тәжірибе",
+        "description": "Білімді практикада қолдану",
+        "milestones": (
+            "Нақты жобалармен жұмыс",
+            "Кәсіби дағдыларды дамыту",
+            "Алғашқы жетістіктер"
+        )
+    },
+    {
+        "year": 3,
+        "title": "Өсу және даму",
+        "description": "Экспертизаны тереңдету",
+        "milestones": (
+            "Сарапшы болу",
+            "Басқаларды оқыту",
+            "Әсерді кеңейту"
+        )
+    },
+    {
+        "year": 4,
+        "title": "Шеберлік",
+        "description": "Жоғары деңгейге жету",
+        "milestones": (
+            "Кәсібінде тану",
+            "Күрделі жобалар",
+            "Көшбасшылық"
+        )
+    },
+    {
+        "year": 5,
+        "title": "Мақсатқа жету",
+        "description": "Мақсатқа жету: {goal}",
+        "milestones": (
+            "Амбицияларды іске асыру",
+            "Жаңа көкжиектер",
+            "Тәжірибені беру"
+        )
+    }
+)
+
+# Daily task templates, indexed by plan year - 1
+_RU_TASK_TEMPLATES = (
+    (  # Year 1: Foundation
+        "Изучить основы выбранного направления (30 минут)",
+        "Прочитать главу из профессиональной литературы",
+        "Посмотреть обучающее видео по теме"
+    ),
+    (  # Year 2: Practice
+        "Выполнить практическое задание",
+        "Поработать над личным проектом (1 час)",
+        "Проанализировать чужой код/работу"
+    ),
+    (  # Year 3: Growth
+        "Помочь новичку с вопросом",
+        "Написать статью/пост о своём опыте",
+        "Изучить продвинутую технику"
+    ),
+    (  # Year 4: Mastery
+        "Провести код-ревью или менторинг",
+        "Работа над сложным проектом (2 часа)",
+        "Выступить с докладом или презентацией"
+    ),
+    (  # Year 5: Goal Achievement
+        "Стратегическое планирование",
+        "Передача опыта: обучение команды",
+        "Работа над масштабным проектом"
+    )
+)
+
+_KZ_TASK_TEMPLATES = (
+    (  # Year 1: Foundation
+        "Таңдаған бағыттың негіздерін үйрену (30 минут)",
+        "Кәсіби әдебиеттен бір тарау оқу",
+        "Тақырып бойынша оқу видеосын көру"
+    ),
+    (  # Year 2: Practice
+        "Практикалық тапсырманы орындау",
+        "Жеке жоба үстінде жұмыс (1 сағат)",
+        "Басқа біреудің кодын/жұмысын талдау"
+    ),
+    (  # Year 3: Growth
+        "Жаңадан бастаушыға көмектесу",
+        "Өз тәжірибең туралы мақала/пост жазу",
+        "Алдыңғы қатарлы техниканы үйрену"
+    ),
+    (  # Year 4: Mastery
+        "Код-ревью немесе менторинг өткізу",
+        "Күрделі жоба үстінде жұмыс (2 сағат)",
+        "Баяндама немесе презентация жасау"
+    ),
+    (  # Year 5: Goal Achievement
+        "Стратегиялық жоспарлау",
+        "Тәжірибе беру: командаға оқыту",
+        "Ауқымды жоба үстінде жұмыс"
+    )
+)
+
+
+def _mark_tasks(templates: tuple, marker: str, reflection: str) -> tuple:
+    """Prefix every template task with a marker and append the reflection task."""
+    return tuple(
+        tuple(f"{marker} {task}" for task in base) + (f"{marker} {reflection}",)
+        for base in templates
+    )
+
+
+# Ready-made task lists: _ALL_TASKS[language][formality][year - 1]
+_ALL_TASKS = {
+    'russian': {
+        'formal': _mark_tasks(_RU_TASK_TEMPLATES, "•", "Рефлексия: записать сегодняшний прогресс"),
+        'casual': _mark_tasks(_RU_TASK_TEMPLATES, "✓", "Отметь свой прогресс за день!"),
+    },
+    'kazakh': {
+        'formal': _mark_tasks(_KZ_TASK_TEMPLATES, "•", "Рефлексия: бүгінгі прогресті жазу"),
+        'casual': _mark_tasks(_KZ_TASK_TEMPLATES, "✓", "Бүгінгі прогресіңді белгіле!"),
+    },
+}
+
+# Base reply texts per intent, keyed by (formality, language)
+_RESPONSE_TEXTS = {
+    'plan': {
+        ('formal', 'russian'): "Конечно, я помогу вам составить персональный план. Для этого мне нужна информация о ваших целях и текущей ситуации. Расскажите, пожалуйста, чего вы хотите достичь?",
+        ('casual', 'russian'): "Отлично! Давай создадим для тебя план. Расскажи, какие у тебя цели? Чего хочешь добиться?",
+        ('formal', 'kazakh'): "Әрине, сізге жеке жоспар құруға көмектесемін. Ол үшін мақсаттарыңыз бен ағымдағы жағдайыңыз туралы ақпарат қажет. Не қол жеткізгіңіз келетінін айтып беріңізші.",
+        ('casual', 'kazakh'): "Керемет! Саған жоспар жасап берейік. Мақсаттарың қандай? Неге жеткің келеді?",
+    },
+    'help': {
+        ('formal', 'russian'): "Я - AI-планировщик, который помогает создавать персональные 5-летние планы развития. Я могу помочь вам с планированием карьеры, образования и личностного роста.",
+        ('casual', 'russian'): "Я помогаю строить планы на 5 лет! Карьера, учёба, саморазвитие - всё это можем спланировать вместе.",
+        ('formal', 'kazakh'): "Мен жеке 5 жылдық даму жоспарларын құруға көмектесетін AI-жоспаршымын. Мансап, білім және жеке өсу жоспарлауға көмектесе аламын.",
+        ('casual', 'kazakh'): "Мен 5 жылға жоспар құруға көмектесемін! Мансап, оқу, өзін-өзі дамыту - бәрін бірге жоспарлай аламыз.",
+    },
+    'greeting': {
+        ('formal', 'russian'): "Здравствуйте! Рад помочь вам с планированием. Чем могу быть полезен?",
+        ('casual', 'russian'): "Привет! Чем могу помочь?",
+        ('formal', 'kazakh'): "Сәлеметсіз бе! Жоспарлауға көмектесуге қуаныштымын. Немен көмектесе аламын?",
+        ('casual', 'kazakh'): "Сәлем! Немен көмектесейін?",
+    },
+    'general': {
+        ('formal', 'russian'): "Я понял ваш запрос. Могу помочь с созданием персонального плана развития. Используйте команду /plan для начала.",
+        ('casual', 'russian'): "Понял! Могу помочь с планами. Жми /plan чтобы начать.",
+        ('formal', 'kazakh'): "Сұранысыңызды түсіндім. Жеке даму жоспарын құруға көмектесе аламын. Бастау үшін /plan командасын пайдаланыңыз.",
+        ('casual', 'kazakh'): "Түсінікті! Жоспармен көмектесе аламын. Бастау үшін /plan басыңыз.",
+    }
+}
+
+# Emoji decoration applied when emoji_usage is 'high': (formality -> (prefix, suffix))
+_RESPONSE_EMOJI = {
+    'plan': {'formal': ("📋 ", ""), 'casual': ("🎯 ", " 💪")},
+    'help': {'formal': ("🤖 ", " ✨"), 'casual': ("🤖 ", " ✨")},
+    'greeting': {'formal': ("👋 ", " 😊"), 'casual': ("👋 ", " 😊")},
+    'general': {'formal': ("💭 ", ""), 'casual': ("💭 ", "")},
+}
+
+
+def _build_responses() -> Dict[Tuple[str, str, str, str], str]:
+    """Assemble every (intent, formality, language, emoji_usage) reply once."""
+    responses = {}
+    for intent, texts in _RESPONSE_TEXTS.items():
+        for (formality, language), text in texts.items():
+            prefix, suffix = _RESPONSE_EMOJI[intent][formality]
+            responses[(intent, formality, language, 'low')] = text
+            responses[(intent, formality, language, 'high')] = f"{prefix}{text}{suffix}"
+    return responses
+
+
+# Fully assembled replies keyed by (intent, formality, language, emoji_usage)
+_RESPONSES = _build_responses()
+
+# Plan year for each plan day 1..1825, indexed by day - 1
+_DAY_YEARS = tuple(min(5, d // 365 + 1) for d in range(1825))
+
+# Shared by all FakeAI instances; the detector holds no per-user state
+_STYLE_DETECTOR = StyleDetector()
+
+
+def _generate_styled_response(prompt: str, style: Dict) -> str:
+    """
+    Generate response adapted to user's communication style.
+
+    Args:
+        prompt: User's message
+        style: Detected style parameters
+
+    Returns:
+        Styled response string
+    """
+    language = style.get('language', 'russian')
+    formality = style.get('formality', 'casual')
+    emoji_usage = style.get('emoji_usage', 'low')
+
+    prompt_lower = prompt.lower()
+    intent = next(
+        (name for name, pattern in _INTENT_PATTERNS if pattern.search(prompt_lower)),
+        'general'
+    )
+
+    # Unknown styles fall back to the casual Russian reply
+    emoji = 'high' if emoji_usage == 'high' else 'low'
+    return _RESPONSES.get(
+        (intent, formality, language, emoji),
+        _RESPONSES[(intent, 'casual', 'russian', emoji)]
+    )
+
+
+def _generate_styled_plan(user_name: str, goal: str, style: Dict) -> dict:
+    """
+    Generate a fake 5-year plan with style adaptation.
+
+    Args:
+        user_name: User's name
+        goal: User's goal
+        style: Style parameters
+
+    Returns:
+        Dictionary with plan structure
+    """
+    language = style.get('language', 'russian')
+    formality = style.get('formality', 'casual')
+
+    if language == 'kazakh':
+        return _generate_kazakh_plan(user_name, goal, formality)
+    else:
+        return _generate_russian_plan(user_name, goal, formality)
+
+
+def _generate_russian_plan(user_name: str, goal: str, formality: str) -> dict:
+    """Generate Russian language plan."""
+    greeting = f"Уважаемый {user_name}" if formality == 'formal' else user_name
+
+    # Copy the static years so callers may edit the plan; milestones are
+    # lists, as in plans loaded from JSON
+    years = [{**year, "milestones": list(year["milestones"])} for year in _RU_PLAN_YEARS]
+    years[4]["description"] = years[4]["description"].format(goal=goal)
+
+    return {
+        "user_name": user_name,
+        "goal": goal,
+        "greeting": greeting,
+        "years": years,
+        "language": "russian",
+        "formality": formality
+    }
+
+
+def _generate_kazakh_plan(user_name: str, goal: str, formality: str) -> dict:
+    """Generate Kazakh language plan."""
+    greeting = f"Құрметті {user_name}" if formality == 'formal' else user_name
+
+    # Copy the static years so callers may edit the plan; milestones are
+    # lists, as in plans loaded from JSON
+    years = [{**year, "milestones": list(year["milestones"])} for year in _KZ_PLAN_YEARS]
+    years[4]["description"] = years[4]["description"].format(goal=goal)
+
+    return {
+        "user_name": user_name,
+        "goal": goal,
+        "greeting": greeting,
+        "years": years,
+        "language": "kazakh",
+        "formality": formality
+    }
+
 
 class FakeAI(AIInterface):
     """
@@ -18,11 +370,31 @@ class FakeAI(AIInterface):
     Simulates Claude API with pre-made responses and style adaptation.
     """
 
+    kind = 'fake'  # Read by ai.factory.get_ai_info
+
     def __init__(self):
         """Initialize Fake AI interface."""
         self.model_name = "FakeAI-Dev"
-        self.style_detector = StyleDetector()
-        self.conversation_history = {}
+        self.style_detector = _STYLE_DETECTOR
+
+        # Artificial think-time, off by default so tests and load runs are fast
+        self.simulate_latency = os.getenv('FAKE_AI_SIMULATE_LATENCY', 'false').lower() == 'true'
+
+        # Concurrency limit and in-flight request coalescing
+        self.max_concurrency = int(os.getenv('AI_MAX_CONCURRENCY', '5'))
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[bytes, asyncio.Task] = {}
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """
+        Get the response semaphore, creating it on first use.
+
+        Returns:
+            Semaphore bounding concurrent response generation
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
 
     async def generate_response(self, prompt: str, user_id: int = None, style: Dict = None) -> str:
         """
@@ -36,17 +408,46 @@ class FakeAI(AIInterface):
         Returns:
             Generated response string adapted to user style
         """
-        # Simulate API delay
-        await asyncio.sleep(random.uniform(1.0, 2.0))
-
-        # Detect style if not provided
-        if style is None:
-            style = self.style_detector.analyze_style(prompt)
+        # Identical prompts in flight share one generation
+        style_part = repr(sorted(style.items())) if style else ''
+        key = hashlib.blake2b(f"{style_part}\0{prompt}".encode('utf-8'), digest_size=16).digest()
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._generate_response(prompt, style))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # Shield so one cancelled caller doesn't cancel the shared work
+        return await asyncio.shield(task)
+
+    async def _generate_response(self, prompt: str, style: Optional[Dict]) -> str:
+        """Generate a single response under the concurrency limit."""
+        async with self._get_semaphore():
+            # Simulate API delay
+            if self.simulate_latency:
+                await asyncio.sleep(1.0 + _RAND())
+
+            # Detect style if not provided
+            if style is None:
+                style = self.style_detector.analyze_style(prompt)
+
+            # Generate response based on detected style
+            return _generate_styled_response(prompt, style)
+
+    async def generate_responses_bulk(self, items: List[Tuple[str, int, Optional[Dict]]]) -> List[str]:
+        """
+        Generate fake responses for many messages concurrently.
 
-        # Generate response based on detected style
-        response = self._generate_styled_response(prompt, style)
+        Args:
+            items: List of (prompt, user_id, style) tuples
 
-        return response
+        Returns:
+            List of response strings, in the same order as items
+        """
+        return list(await asyncio.gather(
+            *(self.generate_response(prompt, user_id, style) for prompt, user_id, style in items)
+        ))
 
     async def generate_plan(self, user_data: dict, style: Dict = None) -> dict:
         """
@@ -60,7 +461,8 @@ class FakeAI(AIInterface):
             Dictionary containing the fake generated plan
         """
         # Simulate API delay
-        await asyncio.sleep(random.uniform(1.5, 2.5))
+        if self.simulate_latency:
+            await asyncio.sleep(1.5 + _RAND())
 
         # Get user info
         user_goal = user_data.get('goal', 'карьерный рост')
@@ -71,259 +473,10 @@ class FakeAI(AIInterface):
             style = self.style_detector.analyze_style(user_goal)
 
         # Generate plan based on style
-        plan = self._generate_styled_plan(user_name, user_goal, style)
+        plan = _generate_styled_plan(user_name, user_goal, style)
 
         return plan
 
-    def _generate_styled_response(self, prompt: str, style: Dict) -> str:
-        """
-        Generate response adapted to user's communication style.
-
-        Args:
-            prompt: User's message
-            style: Detected style parameters
-
-        Returns:
-            Styled response string
-        """
-        language = style.get('language', 'russian')
-        formality = style.get('formality', 'casual')
-        emoji_usage = style.get('emoji_usage', 'low')
-
-        prompt_lower = prompt.lower()
-
-        # Detect intent
-        if any(word in prompt_lower for word in ['план', 'жоспар', 'plan', 'roadmap']):
-            return self._plan_request_response(formality, language, emoji_usage)
-        elif any(word in prompt_lower for word in ['помощь', 'help', 'көмек', 'көмектес']):
-            return self._help_response(formality, language, emoji_usage)
-        elif any(word in prompt_lower for word in ['прив', 'салам', 'сәлем', 'hello', 'hi']):
-            return self._greeting_response(formality, language, emoji_usage)
-        else:
-            return self._general_response(formality, language, emoji_usage)
-
-    def _plan_request_response(self, formality: str, language: str, emoji_usage: str) -> str:
-        """Generate response for plan requests."""
-        responses = {
-            ('formal', 'russian'): "Конечно, я помогу вам составить персональный план. Для этого мне нужна информация о ваших целях и текущей ситуации. Расскажите, пожалуйста, чего вы хотите достичь?",
-            ('casual', 'russian'): "Отлично! Давай создадим для тебя план. Расскажи, какие у тебя цели? Чего хочешь добиться?",
-            ('formal', 'kazakh'): "Әрине, сізге жеке жоспар құруға көмектесемін. Ол үшін мақсаттарыңыз бен ағымдағы жағдайыңыз туралы ақпарат қажет. Не қол жеткізгіңіз келетінін айтып беріңізші.",
-            ('casual', 'kazakh'): "Керемет! Саған жоспар жасап берейік. Мақсаттарың қандай? Неге жеткің келеді?",
-        }
-
-        key = (formality, language)
-        response = responses.get(key, responses[('casual', 'russian')])
-
-        if emoji_usage == 'high':
-            emoji_map = {
-                ('formal', 'russian'): "📋 " + response,
-                ('casual', 'russian'): "🎯 " + response + " 💪",
-                ('formal', 'kazakh'): "📋 " + response,
-                ('casual', 'kazakh'): "🎯 " + response + " 💪",
-            }
-            response = emoji_map.get(key, response)
-
-        return response
-
-    def _help_response(self, formality: str, language: str, emoji_usage: str) -> str:
-        """Generate response for help requests."""
-        responses = {
-            ('formal', 'russian'): "Я - AI-планировщик, который помогает создавать персональные 5-летние планы развития. Я могу помочь вам с планированием карьеры, образования и личностного роста.",
-            ('casual', 'russian'): "Я помогаю строить планы на 5 лет! Карьера, учёба, саморазвитие - всё это можем спланировать вместе.",
-            ('formal', 'kazakh'): "Мен жеке 5 жылдық даму жоспарларын құруға көмектесетін AI-жоспаршымын. Мансап, білім және жеке өсу жоспарлауға көмектесе аламын.",
-            ('casual', 'kazakh'): "Мен 5 жылға жоспар құруға көмектесемін! Мансап, оқу, өзін-өзі дамыту - бәрін бірге жоспарлай аламыз.",
-        }
-
-        key = (formality, language)
-        response = responses.get(key, responses[('casual', 'russian')])
-
-        if emoji_usage == 'high':
-            response = "🤖 " + response + " ✨"
-
-        return response
-
-    def _greeting_response(self, formality: str, language: str, emoji_usage: str) -> str:
-        """Generate greeting response."""
-        responses = {
-            ('formal', 'russian'): "Здравствуйте! Рад помочь вам с планированием. Чем могу быть полезен?",
-            ('casual', 'russian'): "Привет! Чем могу помочь?",
-            ('formal', 'kazakh'): "Сәлеметсіз бе! Жоспарлауға көмектесуге қуаныштымын. Немен көмектесе аламын?",
-            ('casual', 'kazakh'): "Сәлем! Немен көмектесейін?",
-        }
-
-        key = (formality, language)
-        response = responses.get(key, responses[('casual', 'russian')])
-
-        if emoji_usage == 'high':
-            response = "👋 " + response + " 😊"
-
-        return response
-
-    def _general_response(self, formality: str, language: str, emoji_usage: str) -> str:
-        """Generate general response."""
-        responses = {
-            ('formal', 'russian'): "Я понял ваш запрос. Могу помочь с созданием персонального плана развития. Используйте команду /plan для начала.",
-            ('casual', 'russian'): "Понял! Могу помочь с планами. Жми /plan чтобы начать.",
-            ('formal', 'kazakh'): "Сұранысыңызды түсіндім. Жеке даму жоспарын құруға көмектесе аламын. Бастау үшін /plan командасын пайдаланыңыз.",
-            ('casual', 'kazakh'): "Түсінікті! Жоспармен көмектесе аламын. Бастау үшін /plan басыңыз.",
-        }
-
-        key = (formality, language)
-        response = responses.get(key, responses[('casual', 'russian')])
-
-        if emoji_usage == 'high':
-            response = "💭 " + response
-
-        return response
-
-    def _generate_styled_plan(self, user_name: str, goal: str, style: Dict) -> dict:
-        """
-        Generate a fake 5-year plan with style adaptation.
-
-        Args:
-            user_name: User's name
-            goal: User's goal
-            style: Style parameters
-
-        Returns:
-            Dictionary with plan structure
-        """
-        language = style.get('language', 'russian')
-        formality = style.get('formality', 'casual')
-
-        if language == 'kazakh':
-            return self._generate_kazakh_plan(user_name, goal, formality)
-        else:
-            return self._generate_russian_plan(user_name, goal, formality)
-
-    def _generate_russian_plan(self, user_name: str, goal: str, formality: str) -> dict:
-        """Generate Russian language plan."""
-        greeting = f"Уважаемый {user_name}" if formality == 'formal' else user_name
-
-        return {
-            "user_name": user_name,
-            "goal": goal,
-            "greeting": greeting,
-            "years": [
-                {
-                    "year": 1,
-                    "title": "Фундамент и основы",
-                    "description": "Изучение базовых навыков и построение фундамента",
-                    "milestones": [
-                        "Освоение основных инструментов",
-                        "Первые практические проекты",
-                        "Нетворкинг и поиск менторов"
-                    ]
-                },
-                {
-                    "year": 2,
-                    "title": "Практика и опыт",
-                    "description": "Применение знаний на практике",
-                    "milestones": [
-                        "Работа над реальными проектами",
-                        "Развитие профессиональных навыков",
-                        "Первые достижения"
-                    ]
-                },
-                {
-                    "year": 3,
-                    "title": "Рост и развитие",
-                    "description": "Углубление экспертизы",
-                    "milestones": [
-                        "Становление экспертом",
-                        "Обучение других",
-                        "Расширение влияния"
-                    ]
-                },
-                {
-                    "year": 4,
-                    "title": "Мастерство",
-                    "description": "Достижение высокого уровня",
-                    "milestones": [
-                        "Признание в профессии",
-                        "Сложные проекты",
-                        "Лидерство"
-                    ]
-                },
-                {
-                    "year": 5,
-                    "title": "Цель достигнута",
-                    "description": f"Достижение цели: {goal}",
-                    "milestones": [
-                        "Реализация амбиций",
-                        "Новые горизонты",
-                        "Передача опыта"
-                    ]
-                }
-            ],
-            "language": "russian",
-            "formality": formality
-        }
-
-    def _generate_kazakh_plan(self, user_name: str, goal: str, formality: str) -> dict:
-        """Generate Kazakh language plan."""
-        greeting = f"Құрметті {user_name}" if formality == 'formal' else user_name
-
-        return {
-            "user_name": user_name,
-            "goal": goal,
-            "greeting": greeting,
-            "years": [
-                {
-                    "year": 1,
-                    "title": "Іргетас және негіздер",
-                    "description": "Базалық дағдыларды үйрену және іргетас қалау",
-                    "milestones": [
-                        "Негізгі құралдарды меңгеру",
-                        "Алғашқы практикалық жобалар",
-                        "Желілік байланыс және менторлар іздеу"
-                    ]
-                },
-                {
-                    "year": 2,
-                    "title": "Практика және тәжірибе",
-                    "description": "Білімді практикада қолдану",
-                    "milestones": [
-                        "Нақты жобалармен жұмыс",
-                        "Кәсіби дағдыларды дамыту",
-                        "Алғашқы жетістіктер"
-                    ]
-                },
-                {
-                    "year": 3,
-                    "title": "Өсу және даму",
-                    "description": "Экспертизаны тереңдету",
-                    "milestones": [
-                        "Сарапшы болу",
-                        "Басқаларды оқыту",
-                        "Әсерді кеңейту"
-                    ]
-                },
-                {
-                    "year": 4,
-                    "title": "Шеберлік",
-                    "description": "Жоғары деңгейге жету",
-                    "milestones": [
-                        "Кәсібінде тану",
-                        "Күрделі жобалар",
-                        "Көшбасшылық"
-                    ]
-                },
-                {
-                    "year": 5,
-                    "title": "Мақсатқа жету",
-                    "description": f"Мақсатқа жету: {goal}",
-                    "milestones": [
-                        "Амбицияларды іске асыру",
-                        "Жаңа көкжиектер",
-                        "Тәжірибені беру"
-                    ]
-                }
-            ],
-            "language": "kazakh",
-            "formality": formality
-        }
-
     async def generate_daily_tasks(self, plan_data: Dict, day: int) -> List[str]:
         """
         Generate fake daily tasks from the plan.
@@ -336,115 +489,19 @@ class FakeAI(AIInterface):
             List of daily tasks as strings
         """
         # Simulate API delay
-        await asyncio.sleep(random.uniform(0.5, 1.0))
+        if self.simulate_latency:
+            await asyncio.sleep(0.5 + 0.5 * _RAND())
 
         # Determine which year we're in (365 days per year)
-        year = min(5, (day - 1) // 365 + 1)
-        day_in_year = ((day - 1) % 365) + 1
-
-        # Get language and formality from plan if available
-        language = plan_data.get('language', 'russian')
-        formality = plan_data.get('formality', 'casual')
-
-        # Generate tasks based on language
-        if language == 'kazakh':
-            tasks = self._generate_kazakh_tasks(year, day_in_year, formality)
-        else:
-            tasks = self._generate_russian_tasks(year, day_in_year, formality)
-
-        return tasks
-
-    def _generate_russian_tasks(self, year: int, day_in_year: int, formality: str) -> List[str]:
-        """Generate Russian language daily tasks."""
-        # Determine quarter
-        quarter = (day_in_year - 1) // 91 + 1  # ~91 days per quarter
-
-        task_templates = {
-            1: [  # Year 1: Foundation
-                "Изучить основы выбранного направления (30 минут)",
-                "Прочитать главу из профессиональной литературы",
-                "Посмотреть обучающее видео по теме"
-            ],
-            2: [  # Year 2: Practice
-                "Выполнить практическое задание",
-                "Поработать над личным проектом (1 час)",
-                "Проанализировать чужой код/работу"
-            ],
-            3: [  # Year 3: Growth
-                "Помочь новичку с вопросом",
-                "Написать статью/пост о своём опыте",
-                "Изучить продвинутую технику"
-            ],
-            4: [  # Year 4: Mastery
-                "Провести код-ревью или менторинг",
-                "Работа над сложным проектом (2 часа)",
-                "Выступить с докладом или презентацией"
-            ],
-            5: [  # Year 5: Goal Achievement
-                "Стратегическое планирование",
-                "Передача опыта: обучение команды",
-                "Работа над масштабным проектом"
-            ]
-        }
-
-        tasks = task_templates.get(year, task_templates[1])
-
-        # Add day-specific context
-        if formality == 'formal':
-            tasks = [f"• {task}" for task in tasks]
+        if 1 <= day <= len(_DAY_YEARS):
+            year = _DAY_YEARS[day - 1]
         else:
-            tasks = [f"✓ {task}" for task in tasks]
+            year = min(5, (day - 1) // 365 + 1)
 
-        # Add motivational task
-        if formality == 'formal':
-            tasks.append("• Рефлексия: записать сегодняшний прогресс")
-        else:
-            tasks.append("✓ Отметь свой прогресс за день!")
-
-        return tasks
-
-    def _generate_kazakh_tasks(self, year: int, day_in_year: int, formality: str) -> List[str]:
-        """Generate Kazakh language daily tasks."""
-        task_templates = {
-            1: [  # Year 1: Foundation
-                "Таңдаған бағыттың негіздерін үйрену (30 минут)",
-                "Кәсіби әдебиеттен бір тарау оқу",
-                "Тақырып бойынша оқу видеосын көру"
-            ],
-            2: [  # Year 2: Practice
-                "Практикалық тапсырманы орындау",
-                "Жеке жоба үстінде жұмыс (1 сағат)",
-                "Басқа біреудің кодын/жұмысын талдау"
-            ],
-            3: [  # Year 3: Growth
-                "Жаңадан бастаушыға көмектесу",
-                "Өз тәжірибең туралы мақала/пост жазу",
-                "Алдыңғы қатарлы техниканы үйрену"
-            ],
-            4: [  # Year 4: Mastery
-                "Код-ревью немесе менторинг өткізу",
-                "Күрделі жоба үстінде жұмыс (2 сағат)",
-                "Баяндама немесе презентация жасау"
-            ],
-            5: [  # Year 5: Goal Achievement
-                "Стратегиялық жоспарлау",
-                "Тәжірибе беру: командаға оқыту",
-                "Ауқымды жоба үстінде жұмыс"
-            ]
-        }
-
-        tasks = task_templates.get(year, task_templates[1])
-
-        # Add markers
-        if formality == 'formal':
-            tasks = [f"• {task}" for task in tasks]
-        else:
-            tasks = [f"✓ {task}" for task in tasks]
-
-        # Add motivational task
-        if formality == 'formal':
-            tasks.append("• Рефлексия: бүгінгі прогресті жазу")
-        else:
-            tasks.append("✓ Бүгінгі прогресіңді белгіле!")
+        # Get language and formality from plan if available
+        language = 'kazakh' if plan_data.get('language') == 'kazakh' else 'russian'
+        formality = 'formal' if plan_data.get('formality') == 'formal' else 'casual'
 
-        return tasks
+        # Markers and the reflection task are already applied
+        variants = _ALL_TASKS[language][formality]
+        return list(variants[year - 1] if 1 <= year <= 5 else variants[0])
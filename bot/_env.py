@@ -0,0 +1,19 @@
+"""
+Environment Loading Module
+Loads the .env file once per process, however many modules ask for it.
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Set after the first load so later imports skip re-parsing .env
+_SENTINEL = '_DOTENV_LOADED'
+
+
+def load_once() -> None:
+    """Load environment variables from .env unless already loaded."""
+    if os.getenv(_SENTINEL):
+        return
+
+    load_dotenv()
+    os.environ[_SENTINEL] = '1'
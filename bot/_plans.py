@@ -0,0 +1,73 @@
+"""
+Plan Formatting Module
+Renders a generated plan as a message; shared by the bot and the plan worker.
+"""
+
+PLAN_ERROR_MSG = (
+    "Произошла ошибка при создании плана 😔\n"
+    "Попробуй ещё раз позже."
+)
+
+# format_plan header by (language, emoji_usage) and footer by language
+_PLAN_HEADERS = {
+    ('kazakh', 'high'): "🎯 Сіздің 5 жылдық жоспарыңыз дайын! ✨\n\n",
+    ('kazakh', 'low'): "Сіздің 5 жылдық жоспарыңыз:\n\n",
+    ('russian', 'high'): "🎯 Твой 5-летний план готов! ✨\n\n",
+    ('russian', 'low'): "Твой 5-летний план:\n\n",
+}
+
+_PLAN_FOOTERS = {
+    'kazakh': (
+        "\n💡 Күнделікті тапсырмаларды алу үшін /tasks пайдаланыңыз\n"
+        "📊 Прогресті қарау үшін /progress пайдаланыңыз"
+    ),
+    'russian': (
+        "\n💡 Используй /tasks для получения ежедневных задач\n"
+        "📊 Используй /progress для просмотра прогресса"
+    ),
+}
+
+
+# Bound format methods for the per-year lines in format_plan
+_PLAN_YEAR_LINE = "📅 Год {}: {}\n   {}\n".format
+_PLAN_MILESTONE_LINE = "   ✓ {}".format
+
+
+def format_plan(plan: dict, style: dict = None) -> str:
+    """
+    Format plan data into readable message.
+
+    Args:
+        plan: Plan dictionary with years data
+        style: User's communication style
+
+    Returns:
+        Formatted plan text
+    """
+    if not style:
+        style = {}
+
+    language = style.get('language', 'russian')
+    emoji_usage = style.get('emoji_usage', 'low')
+
+    # Header (anything but Kazakh renders in Russian)
+    language = 'kazakh' if language == 'kazakh' else 'russian'
+    header = _PLAN_HEADERS[(language, 'high' if emoji_usage == 'high' else 'low')]
+
+    # Build plan text
+    plan_lines = [header]
+
+    years = plan.get('years', [])
+    for year_data in years:
+        year = year_data.get('year')
+        title = year_data.get('title', f'Год {year}')
+
+        # Year header, first 3 milestones, blank separator
+        plan_lines.append(_PLAN_YEAR_LINE(year, title, year_data.get('description', '')))
+        plan_lines.extend(map(_PLAN_MILESTONE_LINE, year_data.get('milestones', [])[:3]))
+        plan_lines.append("")
+
+    # Footer
+    plan_lines.append(_PLAN_FOOTERS[language])
+
+    return "\n".join(plan_lines)
@@ -0,0 +1,46 @@
+"""
+Telegram Session Module
+Builds the pooled HTTP session; shared by the bot and the plan worker.
+"""
+
+from typing import Any, Dict
+
+from aiogram.client.session.aiohttp import AiohttpSession
+
+# Telegram API connection pool: keep TLS connections alive between calls
+_SESSION_TIMEOUT = 30  # seconds per request; long polling adds its own timeout
+_CONNECTOR_OPTIONS = {
+    'limit': 200,
+    'ttl_dns_cache': 300,
+    'keepalive_timeout': 75,
+}
+
+
+class PooledAiohttpSession(AiohttpSession):
+    """
+    AiohttpSession whose TCPConnector is built with extra pool options.
+
+    aiogram creates the connector from its connector kwargs (keeping its
+    own ssl context), so the options are merged into them here and again
+    whenever a proxy replaces them. Those kwargs are aiogram internals, so
+    requirements.txt pins aiogram to the version this was checked against.
+    """
+
+    def __init__(self, connector_options: Dict[str, Any], **kwargs: Any) -> None:
+        self._connector_options = dict(connector_options)
+        super().__init__(**kwargs)
+        self._connector_init.update(self._connector_options)
+
+    def _setup_proxy_connector(self, proxy: Any) -> None:
+        super()._setup_proxy_connector(proxy)
+        self._connector_init.update(self._connector_options)
+
+
+def create_session() -> AiohttpSession:
+    """
+    Create the pooled HTTP session used for all Telegram API calls.
+
+    Returns:
+        AiohttpSession with a larger, keep-alive connection pool
+    """
+    return PooledAiohttpSession(_CONNECTOR_OPTIONS, timeout=_SESSION_TIMEOUT)
@@ -0,0 +1,22 @@
+"""
+User Helpers Module
+Resolves how a Telegram sender is named in logs and handlers.
+"""
+
+from aiogram.types import User
+
+# Shown for senders without a public @username
+DEFAULT_USERNAME = "User"
+
+
+def username_of(user: User) -> str:
+    """
+    Get the sender's @username, or the default when they have none.
+
+    Args:
+        user: Telegram user who sent the update
+
+    Returns:
+        Username without the leading @
+    """
+    return user.username or DEFAULT_USERNAME
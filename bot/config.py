@@ -1,28 +1,39 @@
 """Configuration management for the bot."""
 import os
-from dotenv import load_dotenv
+from dataclasses import dataclass, field
+from bot._env import load_once
 
 # Load environment variables from .env file
-load_dotenv()
+load_once()
 
 
+@dataclass(frozen=True, slots=True)
 class Config:
-    """Bot configuration class."""
+    """Bot configuration, loaded once at import."""
 
-    def __init__(self):
-        self.telegram_token = os.getenv('TELEGRAM_BOT_TOKEN')
+    token: str = field(repr=False)  # Keep the secret out of logs
 
-        if not self.telegram_token:
+    @classmethod
+    def from_env(cls) -> 'Config':
+        """
+        Build the configuration from environment variables.
+
+        Returns:
+            Config instance
+
+        Raises:
+            ValueError: If TELEGRAM_BOT_TOKEN is not set
+        """
+        telegram_token = os.getenv('TELEGRAM_BOT_TOKEN')
+
+        if not telegram_token:
             raise ValueError(
                 "TELEGRAM_BOT_TOKEN not found in environment variables. "
                 "Please create a .env file with your bot token."
             )
 
-    @property
-    def token(self) -> str:
-        """Get the Telegram bot token."""
-        return self.telegram_token
+        return cls(token=telegram_token)
 
 
 # Create a singleton config instance
-config = Config()
+config = Config.from_env()
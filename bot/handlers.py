@@ -3,36 +3,57 @@ import logging
 from telegram import Update
 from telegram.ext import ContextTypes
 
-# Configure logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+from utils.logger import create_handler, create_queue_handler
+
 logger = logging.getLogger(__name__)
 
+# Static reply texts; /start fills in the user's first name
+_START_TEMPLATE = (
+    "Hello {name}! 👋\n\n"
+    "I'm a simple echo bot. Send me any message and I'll echo it back to you!\n\n"
+    "Commands:\n"
+    "/start - Show this welcome message\n"
+    "/help - Show help information"
+)
+
+_HELP_TEXT = (
+    "📖 Help Information\n\n"
+    "This is an echo bot. Whatever message you send, I'll send it right back!\n\n"
+    "Available commands:\n"
+    "/start - Start the bot\n"
+    "/help - Show this help message"
+)
+
+
+def configure_logging() -> None:
+    """Configure root logging unless the entry point already did."""
+    # Like basicConfig, leave an existing root configuration alone (and
+    # don't start a listener thread nobody writes to)
+    if logging.getLogger().handlers:
+        return
+
+    handler = create_queue_handler(create_handler(logging.INFO))
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
+
+
+# The echo handlers have no entry point of their own, so keep configuring
+# logging on import as they always have
+configure_logging()
+
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle the /start command."""
     user = update.effective_user
-    await update.message.reply_text(
-        f"Hello {user.first_name}! 👋\n\n"
-        f"I'm a simple echo bot. Send me any message and I'll echo it back to you!\n\n"
-        f"Commands:\n"
-        f"/start - Show this welcome message\n"
-        f"/help - Show help information"
+    await update.message.reply_text(_START_TEMPLATE.format(name=user.first_name))
+    logger.info(
+        "User %s (%s) started the bot", user.id, user.username,
+        extra={'user_id': user.id, 'username': user.username}
     )
-    logger.info(f"User {user.id} ({user.username}) started the bot")
 
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle the /help command."""
-    await update.message.reply_text(
-        "📖 Help Information\n\n"
-        "This is an echo bot. Whatever message you send, I'll send it right back!\n\n"
-        "Available commands:\n"
-        "/start - Start the bot\n"
-        "/help - Show this help message"
-    )
+    await update.message.reply_text(_HELP_TEXT)
 
 
 async def echo_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -40,7 +61,10 @@ async def echo_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     user = update.effective_user
     message_text = update.message.text
 
-    logger.info(f"Echoing message from user {user.id} ({user.username}): {message_text}")
+    logger.info(
+        "Echoing message from user %s (%s): %s", user.id, user.username, message_text,
+        extra={'user_id': user.id, 'username': user.username}
+    )
 
     # Echo the message back
     await update.message.reply_text(message_text)
@@ -48,4 +72,4 @@ async def echo_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Log errors caused by updates."""
-    logger.error(f"Update {update} caused error {context.error}")
+    logger.error("Update %s caused error %s", update, context.error)
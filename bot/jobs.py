@@ -0,0 +1,77 @@
+"""
+Jobs Module
+Background jobs run by the arq worker: `arq bot.jobs.WorkerSettings`.
+"""
+
+import asyncio
+import os
+
+from aiogram import Bot
+from arq.connections import RedisSettings
+
+from utils.logger import logger
+from ai.factory import create_ai
+from data.storage import Storage
+from bot._plans import PLAN_ERROR_MSG, format_plan
+from bot._session import create_session
+
+
+async def generate_plan_task(ctx: dict, user_id: int, chat_id: int) -> bool:
+    """
+    Generate, save and send a user's 5-year plan.
+
+    Args:
+        ctx: arq job context with bot, ai and storage
+        user_id: Telegram user ID
+        chat_id: Chat to send the plan to
+
+    Returns:
+        True if the plan was generated and sent
+    """
+    bot: Bot = ctx['bot']
+    storage: Storage = ctx['storage']
+
+    user_data = await asyncio.to_thread(storage.load_user_data, user_id)
+    if not user_data:
+        logger.warning("Plan job for user %s found no profile", user_id)
+        return False
+
+    try:
+        style = user_data.get('communication_style', {})
+        plan = await ctx['ai'].generate_plan(user_data, style)
+
+        user_data['plan'] = plan
+        user_data['plan_created_at'] = plan.get('created_at')
+        await asyncio.to_thread(storage.save_user_data, user_id, user_data)
+
+        await bot.send_message(chat_id, format_plan(plan, style))
+        logger.info("Plan generated and saved for user %s", user_id)
+        return True
+
+    except Exception as e:
+        logger.error("Error generating plan: %s", e)
+        await bot.send_message(chat_id, PLAN_ERROR_MSG)
+        return False
+
+
+async def startup(ctx: dict) -> None:
+    """Create the worker's bot, AI and storage."""
+    ctx['bot'] = Bot(token=os.environ['TELEGRAM_BOT_TOKEN'], session=create_session())
+    ctx['ai'] = create_ai()
+    ctx['storage'] = Storage()
+
+
+async def shutdown(ctx: dict) -> None:
+    """Release the worker's connections."""
+    await ctx['ai'].close()
+    await ctx['bot'].session.close()
+
+
+class WorkerSettings:
+    """arq worker configuration."""
+
+    functions = [generate_plan_task]
+    on_startup = startup
+    on_shutdown = shutdown
+    redis_settings = RedisSettings.from_dsn(os.getenv('TASK_QUEUE_URL', 'redis://localhost:6379/1'))
+    max_jobs = int(os.getenv('TASK_QUEUE_MAX_JOBS', '10'))
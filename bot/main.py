@@ -5,246 +5,376 @@ Using aiogram library for Telegram Bot API interaction.
 
 import asyncio
 import os
-from dotenv import load_dotenv
+from time import perf_counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
 from aiogram import Bot, Dispatcher, types
 from aiogram.filters import Command
 from aiogram.types import Message
 
+from bot._env import load_once
+from bot._plans import PLAN_ERROR_MSG, format_plan
+from bot._session import create_session
+from bot._users import username_of
 from utils.logger import logger
+from ai.base_interface import AIInterface
 from ai.factory import create_ai
 from data.storage import Storage
 from utils.style_detector import StyleDetector
 from bot.onboarding import onboarding_router
 from core.task_manager import TaskManager
 from bot.scheduler import ReminderScheduler
+from core.reminders import STREAK_MILESTONES, ReminderGenerator
 
 # Load environment variables
-load_dotenv()
+load_once()
 
-# Initialize AI and storage
-ai_instance = None
+# Initialize storage and services; the AI is created in main()
 storage = Storage()
 style_detector = StyleDetector()
 task_manager = TaskManager(storage)
+reminder_generator = ReminderGenerator()
 reminder_scheduler = None
 
 
-async def start_command(message: Message) -> None:
-    """
-    Handle /start command.
-    Sends welcome message to new users.
-    """
-    user_id = message.from_user.id
-    username = message.from_user.username or "User"
+@dataclass(frozen=True, slots=True)
+class AppContext:
+    """Shared services, injected into handlers as the `ctx` workflow value."""
 
-    logger.info(f"User {user_id} (@{username}) started the bot")
+    storage: Storage
+    style_detector: StyleDetector
+    task_manager: TaskManager
+    reminder_generator: ReminderGenerator
+    ai: AIInterface
+    task_queue: Optional[Any] = None  # arq pool when TASK_QUEUE_URL is set (see bot/jobs.py)
 
-    # Save initial user data
-    user_data = {
-        'user_id': user_id,
-        'username': username,
-        'started_at': message.date.isoformat() if message.date else None
-    }
-    storage.save_user_data(user_id, user_data)
+# Static command replies
+_WELCOME_MSG = (
+    "Привет! 👋 Я - AI планировщик, который поможет тебе создать персональный 5-летний план развития.\n\n"
+    "Команды:\n"
+    "/start - Начать работу\n"
+    "/onboarding - Создать профиль\n"
+    "/profile - Посмотреть профиль\n"
+    "/plan - Создать 5-летний план\n"
+    "/tasks - Задачи на сегодня\n"
+    "/done <номер> - Отметить задачу\n"
+    "/progress - Твоя статистика\n"
+    "/weekly - Сводка за неделю\n"
+    "/ask <вопрос> - Задать вопрос AI\n\n"
+    "Начни с /onboarding чтобы создать свой профиль!"
+)
 
-    await message.reply(
-        "Привет! 👋 Я - AI планировщик, который поможет тебе создать персональный 5-летний план развития.\n\n"
-        "Команды:\n"
-        "/start - Начать работу\n"
-        "/onboarding - Создать профиль\n"
-        "/profile - Посмотреть профиль\n"
-        "/plan - Создать 5-летний план\n"
-        "/tasks - Задачи на сегодня\n"
-        "/done <номер> - Отметить задачу\n"
-        "/progress - Твоя статистика\n"
-        "/weekly - Сводка за неделю\n"
-        "/ask <вопрос> - Задать вопрос AI\n\n"
-        "Начни с /onboarding чтобы создать свой профиль!"
-    )
+_PLAN_REQUIRED_MSG = (
+    "Сначала создай план с помощью /plan\n\n"
+    "Алдымен /plan арқылы жоспар жаса"
+)
+
+_AI_ERROR_MSG = "Извините, произошла ошибка. Попробуйте ещё раз."
 
+_PLAN_PENDING_MSG = "Создаю твой персональный 5-летний план... ⏳"
 
-async def ask_command(message: Message) -> None:
+# arq job states in which a plan job is still waiting or running
+_PLAN_JOB_PENDING = frozenset({'deferred', 'queued', 'in_progress'})
+
+
+async def _enqueue_plan(task_queue: Any, user_id: int, chat_id: int) -> bool:
     """
-    Handle /ask command.
-    Allows users to ask questions to the AI.
+    Queue plan generation for a user, at most one job per user at a time.
+
+    Args:
+        task_queue: arq pool
+        user_id: Telegram user ID
+        chat_id: Chat to send the plan to
+
+    Returns:
+        True if a plan job is waiting or running for the user, False if
+        arq refused the job id because it still keeps a finished job's result
     """
-    user_id = message.from_user.id
-    username = message.from_user.username or "User"
+    from arq.jobs import Job
 
-    # Extract question from command
-    command_text = message.text or ""
-    if " " in command_text:
-        question = command_text.split(" ", 1)[1]
-    else:
-        await message.reply("Использование: /ask <ваш вопрос>\nПример: /ask помоги с планом")
-        return
+    job_id = f"plan:{user_id}"
+    if await task_queue.enqueue_job('generate_plan_task', user_id, chat_id, _job_id=job_id):
+        return True
 
-    logger.info(f"User {user_id} (@{username}) asked: {question}")
+    # enqueue_job returns None while the job id is known: pending or finished
+    status = await Job(job_id, task_queue).status()
+    return status.value in _PLAN_JOB_PENDING
 
-    # Detect user style
-    style = style_detector.analyze_style(question)
 
-    # Load user data to update style preferences
-    user_data = storage.load_user_data(user_id)
-    if user_data:
-        user_data['last_style'] = style
-        storage.save_user_data(user_id, user_data)
+async def _aload(storage: Storage, user_id: int) -> Optional[dict]:
+    """Load user data in a worker thread so file I/O doesn't block the loop."""
+    return await asyncio.to_thread(storage.load_user_data, user_id)
 
-    # Send "typing" action
-    await message.bot.send_chat_action(message.chat.id, "typing")
 
-    try:
-        # Generate AI response
-        response = await ai_instance.generate_response(question, user_id, style)
-        await message.reply(response)
-        logger.info(f"AI responded to user {user_id} with style: {style}")
-    except Exception as e:
-        logger.error(f"Error generating AI response: {e}")
-        await message.reply("Извините, произошла ошибка. Попробуйте ещё раз.")
+async def _asave(storage: Storage, user_id: int, user_data: dict) -> bool:
+    """Save user data in a worker thread so file I/O doesn't block the loop."""
+    return await asyncio.to_thread(storage.save_user_data, user_id, user_data)
+
+
+# Per-chat locks and the number of turns holding or waiting on each
+_chat_locks: Dict[int, asyncio.Lock] = {}
+_chat_waiters: Dict[int, int] = {}
 
 
-async def plan_command(message: Message) -> None:
+@asynccontextmanager
+async def chat_turn(chat_id: int):
     """
-    Generate or view user's 5-year plan.
+    Serialize AI turns within one chat.
+
+    aiogram handles every update in its own task, so chats never block each
+    other; this keeps two quick messages in the same chat from being
+    answered out of order.
+
+    Args:
+        chat_id: Telegram chat ID
     """
-    user_id = message.from_user.id
-    username = message.from_user.username or "User"
+    lock = _chat_locks.get(chat_id)
+    if lock is None:
+        lock = _chat_locks[chat_id] = asyncio.Lock()
+    _chat_waiters[chat_id] = _chat_waiters.get(chat_id, 0) + 1
 
-    logger.info(f"User {user_id} (@{username}) requested plan generation")
+    try:
+        async with lock:
+            yield
+    finally:
+        # Drop the chat's lock once nothing is waiting on it
+        _chat_waiters[chat_id] -= 1
+        if not _chat_waiters[chat_id]:
+            del _chat_waiters[chat_id]
+            del _chat_locks[chat_id]
 
-    # Load user profile
-    user_data = storage.load_user_data(user_id)
 
-    if not user_data or not user_data.get('onboarding_completed'):
-        await message.reply(
-            "Пожалуйста, сначала создай профиль с помощью /onboarding\n\n"
-            "Алдымен /onboarding арқылы профиль жаса"
-        )
-        return
+# Minimum seconds between edits of a streamed reply (Telegram edit rate limits)
+STREAM_EDIT_INTERVAL = 0.4
 
-    # Check if plan already exists
-    if user_data.get('plan'):
-        await message.reply(
-            "У тебя уже есть план! Хочешь создать новый?\n"
-            "Напиши 'да' для создания нового плана или /viewplan чтобы посмотреть текущий"
-        )
-        # TODO: Add state to wait for confirmation
-        return
 
-    await message.reply("Создаю твой персональный 5-летний план... ⏳")
+def with_user(
+    handler: Callable[[Message, AppContext, int, str], Awaitable[None]]
+) -> Callable[[Message, AppContext], Awaitable[None]]:
+    """
+    Resolve the sender once and pass it to the handler.
 
-    # Send "typing" action
-    await message.bot.send_chat_action(message.chat.id, "typing")
+    Args:
+        handler: Handler taking (message, ctx, user_id, username)
 
-    try:
-        # Get user's communication style
-        style = user_data.get('communication_style', {})
+    Returns:
+        Handler taking the message and the `ctx` workflow value, as
+        registered with the dispatcher
+    """
+    async def wrapper(message: Message, ctx: AppContext) -> None:
+        user = message.from_user
+        await handler(message, ctx, user.id, username_of(user))
 
-        # Generate plan using AI
-        plan = await ai_instance.generate_plan(user_data, style)
+    # Not functools.wraps: aiogram unwraps __wrapped__ to pick which data to
+    # inject, and must see the wrapper's (message, ctx) signature
+    wrapper.__name__ = handler.__name__
+    wrapper.__qualname__ = handler.__qualname__
+    wrapper.__doc__ = handler.__doc__
+    return wrapper
 
-        # Save plan to storage
-        user_data['plan'] = plan
-        user_data['plan_created_at'] = plan.get('created_at')
-        storage.save_user_data(user_id, user_data)
 
-        # Format and send plan
-        plan_text = format_plan(plan, style)
-        await message.reply(plan_text)
+async def send_typing(message: Message) -> None:
+    """
+    Show the "typing" action in the message's chat.
 
-        logger.info(f"Plan generated and saved for user {user_id}")
+    The indicator is cosmetic, so failures are logged rather than raised.
 
+    Args:
+        message: Message whose chat gets the action
+    """
+    try:
+        await message.bot.send_chat_action(message.chat.id, "typing")
     except Exception as e:
-        logger.error(f"Error generating plan: {e}")
-        await message.reply(
-            "Произошла ошибка при создании плана 😔\n"
-            "Попробуй ещё раз позже."
-        )
+        logger.warning("Failed to send typing action: %s", e)
 
 
-def format_plan(plan: dict, style: dict = None) -> str:
+async def reply_streamed(
+    message: Message,
+    chunks: AsyncIterator[str],
+    typing: Optional[Awaitable[None]] = None
+) -> str:
     """
-    Format plan data into readable message.
+    Reply with streamed AI text, editing the reply as chunks arrive.
 
     Args:
-        plan: Plan dictionary with years data
-        style: User's communication style
+        message: Message to reply to
+        chunks: Async iterator of response text chunks
+        typing: In-flight send_typing task, awaited before the first reply
+            so the indicator never lands after the answer
 
     Returns:
-        Formatted plan text
+        Full response text
     """
-    if not style:
-        style = {}
+    reply = None
+    text = ""
+    sent_text = ""
+    last_edit = 0.0
+
+    async for chunk in chunks:
+        text += chunk
+        # Telegram rejects empty messages, wait for visible text
+        if not text.strip():
+            continue
+
+        now = perf_counter()
+        if reply is None:
+            if typing is not None:
+                await typing
+            reply = await message.reply(text)
+            sent_text, last_edit = text, now
+        elif now - last_edit >= STREAM_EDIT_INTERVAL:
+            await reply.edit_text(text)
+            sent_text, last_edit = text, now
+
+    # Flush whatever arrived since the last edit
+    if reply is not None and text != sent_text:
+        await reply.edit_text(text)
+
+    return text
+
+
+@with_user
+async def start_command(message: Message, ctx: AppContext, user_id: int, username: str) -> None:
+    """
+    Handle /start command.
+    Sends welcome message to new users.
+    """
+    logger.info("User %s (@%s) started the bot", user_id, username)
+
+    # Save initial user data
+    user_data = {
+        'user_id': user_id,
+        'username': username,
+        'started_at': message.date.isoformat() if message.date else None
+    }
+    await _asave(ctx.storage, user_id, user_data)
 
-    language = style.get('language', 'russian')
-    emoji_usage = style.get('emoji_usage', 'low')
+    await message.reply(_WELCOME_MSG)
 
-    # Header
-    if language == 'kazakh':
-        if emoji_usage == 'high':
-            header = "🎯 Сіздің 5 жылдық жоспарыңыз дайын! ✨\n\n"
-        else:
-            header = "Сіздің 5 жылдық жоспарыңыз:\n\n"
-    else:
-        if emoji_usage == 'high':
-            header = "🎯 Твой 5-летний план готов! ✨\n\n"
-        else:
-            header = "Твой 5-летний план:\n\n"
-
-    # Build plan text
-    plan_lines = [header]
-
-    years = plan.get('years', [])
-    for year_data in years:
-        year = year_data.get('year')
-        title = year_data.get('title', f'Год {year}')
-        description = year_data.get('description', '')
-
-        # Year header
-        plan_lines.append(f"📅 Год {year}: {title}")
-        plan_lines.append(f"   {description}\n")
-
-        # Milestones
-        milestones = year_data.get('milestones', [])
-        if milestones:
-            for milestone in milestones[:3]:  # Show first 3 milestones
-                plan_lines.append(f"   ✓ {milestone}")
-        plan_lines.append("")
-
-    # Footer
-    if language == 'kazakh':
-        footer = (
-            "\n💡 Күнделікті тапсырмаларды алу үшін /tasks пайдаланыңыз\n"
-            "📊 Прогресті қарау үшін /progress пайдаланыңыз"
-        )
+
+@with_user
+async def ask_command(message: Message, ctx: AppContext, user_id: int, username: str) -> None:
+    """
+    Handle /ask command.
+    Allows users to ask questions to the AI.
+    """
+    # Extract question from command
+    command_text = message.text or ""
+    if " " in command_text:
+        question = command_text.split(" ", 1)[1]
     else:
-        footer = (
-            "\n💡 Используй /tasks для получения ежедневных задач\n"
-            "📊 Используй /progress для просмотра прогресса"
+        await message.reply("Использование: /ask <ваш вопрос>\nПример: /ask помоги с планом")
+        return
+
+    logger.info("User %s (@%s) asked: %s", user_id, username, question)
+
+    # One turn per chat at a time so replies keep message order
+    async with chat_turn(message.chat.id):
+        # Detect user style
+        style = ctx.style_detector.analyze_style(question)
+
+        # Send "typing" in the background; the load and the AI call overlap it
+        typing_task = asyncio.create_task(send_typing(message))
+        user_data = await _aload(ctx.storage, user_id)
+
+        # Save style preferences while the AI response is generated
+        save_task = None
+        if user_data:
+            user_data['last_style'] = style
+            save_task = asyncio.create_task(_asave(ctx.storage, user_id, user_data))
+
+        try:
+            # Generate AI response
+            await reply_streamed(
+                message, ctx.ai.generate_response_stream(question, user_id, style), typing_task
+            )
+            logger.info("AI responded to user %s with style: %s", user_id, style)
+        except Exception as e:
+            logger.error("Error generating AI response: %s", e)
+            await typing_task
+            await message.reply(_AI_ERROR_MSG)
+        finally:
+            if save_task:
+                await save_task
+
+
+@with_user
+async def plan_command(message: Message, ctx: AppContext, user_id: int, username: str) -> None:
+    """
+    Generate or view user's 5-year plan.
+    """
+    logger.info("User %s (@%s) requested plan generation", user_id, username)
+
+    # One turn per chat at a time so replies keep message order
+    async with chat_turn(message.chat.id):
+        # Load user profile off the loop while "typing" is sent
+        user_data, _ = await asyncio.gather(
+            _aload(ctx.storage, user_id),
+            send_typing(message)
         )
 
-    plan_lines.append(footer)
+        if not user_data or not user_data.get('onboarding_completed'):
+            await message.reply(
+                "Пожалуйста, сначала создай профиль с помощью /onboarding\n\n"
+                "Алдымен /onboarding арқылы профиль жаса"
+            )
+            return
+
+        # Check if plan already exists
+        if user_data.get('plan'):
+            await message.reply(
+                "У тебя уже есть план! Хочешь создать новый?\n"
+                "Напиши 'да' для создания нового плана или /viewplan чтобы посмотреть текущий"
+            )
+            # TODO: Add state to wait for confirmation
+            return
+
+        # Hand generation to the worker queue when one is configured;
+        # a kept result of an earlier finished job falls back to inline generation
+        if ctx.task_queue is not None and await _enqueue_plan(ctx.task_queue, user_id, message.chat.id):
+            await message.reply(_PLAN_PENDING_MSG)
+            return
+
+        # The placeholder replaces "typing" as the progress indicator
+        await message.reply(_PLAN_PENDING_MSG)
+
+        try:
+            # Get user's communication style
+            style = user_data.get('communication_style', {})
+
+            # Generate plan using AI
+            plan = await ctx.ai.generate_plan(user_data, style)
+
+            # Save plan to storage while the formatted plan is sent
+            user_data['plan'] = plan
+            user_data['plan_created_at'] = plan.get('created_at')
+            plan_text = format_plan(plan, style)
+            await asyncio.gather(
+                _asave(ctx.storage, user_id, user_data),
+                message.reply(plan_text)
+            )
 
-    return "\n".join(plan_lines)
+            logger.info("Plan generated and saved for user %s", user_id)
 
+        except Exception as e:
+            logger.error("Error generating plan: %s", e)
+            await message.reply(PLAN_ERROR_MSG)
 
-async def tasks_command(message: Message) -> None:
+
+@with_user
+async def tasks_command(message: Message, ctx: AppContext, user_id: int, username: str) -> None:
     """
     Show today's tasks for the user.
     """
-    user_id = message.from_user.id
-
-    logger.info(f"User {user_id} requested today's tasks")
+    logger.info("User %s requested today's tasks", user_id)
 
     # Get tasks
-    tasks_data = await task_manager.get_daily_tasks(user_id, ai_instance)
+    tasks_data = await ctx.task_manager.get_daily_tasks(user_id, ctx.ai)
 
     if not tasks_data['success']:
         if tasks_data.get('error') == 'no_plan':
-            await message.reply(
-                "Сначала создай план с помощью /plan\n\n"
-                "Алдымен /plan арқылы жоспар жаса"
-            )
+            await message.reply(_PLAN_REQUIRED_MSG)
         else:
             await message.reply("Произошла ошибка при загрузке задач.")
         return
@@ -256,30 +386,31 @@ async def tasks_command(message: Message) -> None:
     completed = tasks_data['completed_count']
     total = tasks_data['total_tasks']
 
-    # Build message
-    header = f"📋 Задачи на сегодня (День {day_number}, Год {year})\n\n"
-
-    task_lines = []
-    for task in tasks:
-        if task['completed']:
-            task_lines.append(f"✅ {task['number']}. {task['text']}")
-        else:
-            task_lines.append(f"⬜ {task['number']}. {task['text']}")
-
-    footer = f"\n\nВыполнено: {completed}/{total}"
-    footer += "\n\n💡 Используй /done <номер> чтобы отметить задачу"
-
-    message_text = header + "\n".join(task_lines) + footer
+    # Build message in a single join: header, task lines, footer
+    lines = [
+        f"📋 Задачи на сегодня (День {day_number}, Год {year})",
+        "",
+        *(
+            f"{'✅' if task['completed'] else '⬜'} {task['number']}. {task['text']}"
+            for task in tasks
+        ),
+        "",
+        f"Выполнено: {completed}/{total}",
+        "",
+        "💡 Используй /done <номер> чтобы отметить задачу",
+    ]
+
+    message_text = "\n".join(lines)
 
     await message.reply(message_text)
 
 
-async def done_command(message: Message) -> None:
+@with_user
+async def done_command(message: Message, ctx: AppContext, user_id: int, username: str) -> None:
     """
     Mark a task as complete.
     Usage: /done 1
     """
-    user_id = message.from_user.id
     command_text = message.text or ""
 
     # Extract task number
@@ -297,10 +428,10 @@ async def done_command(message: Message) -> None:
         await message.reply("Номер задачи должен быть числом.\nПример: /done 1")
         return
 
-    logger.info(f"User {user_id} marking task {task_number} as complete")
+    logger.info("User %s marking task %s as complete", user_id, task_number)
 
     # Mark task complete
-    result = task_manager.mark_task_complete(user_id, task_number)
+    result = await asyncio.to_thread(ctx.task_manager.mark_task_complete, user_id, task_number)
 
     if not result['success']:
         await message.reply("Не удалось отметить задачу. Попробуй ещё раз.")
@@ -312,39 +443,32 @@ async def done_command(message: Message) -> None:
         f"Отличная работа! Используй /tasks чтобы посмотреть оставшиеся задачи."
     )
 
-    # Check for streak milestones
-    stats = task_manager.get_progress_stats(user_id)
-    streak = stats.get('current_streak', 0)
+    # Check for streak milestones using the data mark_task_complete returned
+    user_data = result['user_data']
+    streak = result['stats'].get('current_streak', 0)
 
-    if streak in [7, 14, 30, 50, 100, 365]:
-        user_data = storage.load_user_data(user_id)
+    if streak in STREAK_MILESTONES:
         name = user_data.get('name', 'User')
         style = user_data.get('communication_style', {})
 
-        from core.reminders import ReminderGenerator
-        reminder_gen = ReminderGenerator()
-        milestone_msg = reminder_gen.generate_streak_milestone(name, style, streak)
+        milestone_msg = ctx.reminder_generator.generate_streak_milestone(name, style, streak)
 
         if milestone_msg:
             await message.reply(milestone_msg)
 
 
-async def progress_command(message: Message) -> None:
+@with_user
+async def progress_command(message: Message, ctx: AppContext, user_id: int, username: str) -> None:
     """
     Show user's progress statistics.
     """
-    user_id = message.from_user.id
-
-    logger.info(f"User {user_id} requested progress stats")
+    logger.info("User %s requested progress stats", user_id)
 
     # Get stats
-    stats = task_manager.get_progress_stats(user_id)
+    stats = await asyncio.to_thread(ctx.task_manager.get_progress_stats, user_id)
 
     if not stats['success']:
-        await message.reply(
-            "Сначала создай план с помощью /plan\n\n"
-            "Алдымен /plan арқылы жоспар жаса"
-        )
+        await message.reply(_PLAN_REQUIRED_MSG)
         return
 
     # Format stats message
@@ -368,83 +492,102 @@ async def progress_command(message: Message) -> None:
     await message.reply(message_text)
 
 
-async def weekly_command(message: Message) -> None:
+def _format_weekly_day(day: dict) -> str:
+    """Format one day of the weekly summary as a single line."""
+    date = day['date']
+    weekday = day['weekday'][:3]  # First 3 letters
+    completed = day['completed_tasks']
+    total = day['total_tasks']
+    rate = day['completion_rate']
+
+    if total == 0:
+        return f"⚪ {weekday} {date}: нет задач"
+    elif rate == 100:
+        return f"✅ {weekday} {date}: {completed}/{total} (100%)"
+    elif rate >= 50:
+        return f"🟡 {weekday} {date}: {completed}/{total} ({rate:.0f}%)"
+    else:
+        return f"⚫ {weekday} {date}: {completed}/{total} ({rate:.0f}%)"
+
+
+@with_user
+async def weekly_command(message: Message, ctx: AppContext, user_id: int, username: str) -> None:
     """
     Show 7-day weekly summary.
     """
-    user_id = message.from_user.id
-
-    logger.info(f"User {user_id} requested weekly summary")
+    logger.info("User %s requested weekly summary", user_id)
 
     # Get weekly summary
-    summary_data = task_manager.get_weekly_summary(user_id)
+    summary_data = await asyncio.to_thread(ctx.task_manager.get_weekly_summary, user_id)
 
     if not summary_data['success']:
-        await message.reply(
-            "Сначала создай план с помощью /plan\n\n"
-            "Алдымен /plan арқылы жоспар жаса"
-        )
+        await message.reply(_PLAN_REQUIRED_MSG)
         return
 
     # Format summary
     summary = summary_data['summary']
 
-    header = "📅 Сводка за неделю\n\n"
-
-    lines = []
-    for day in summary:
-        date = day['date']
-        weekday = day['weekday'][:3]  # First 3 letters
-        completed = day['completed_tasks']
-        total = day['total_tasks']
-        rate = day['completion_rate']
-
-        if total == 0:
-            lines.append(f"⚪ {weekday} {date}: нет задач")
-        elif rate == 100:
-            lines.append(f"✅ {weekday} {date}: {completed}/{total} (100%)")
-        elif rate >= 50:
-            lines.append(f"🟡 {weekday} {date}: {completed}/{total} ({rate:.0f}%)")
-        else:
-            lines.append(f"⚫ {weekday} {date}: {completed}/{total} ({rate:.0f}%)")
-
-    footer = "\n\n💡 Используй /tasks для сегодняшних задач"
+    lines = [
+        "📅 Сводка за неделю",
+        "",
+        *map(_format_weekly_day, summary),
+        "",
+        "💡 Используй /tasks для сегодняшних задач",
+    ]
 
-    message_text = header + "\n".join(lines) + footer
+    message_text = "\n".join(lines)
 
     await message.reply(message_text)
 
 
-async def handle_message(message: Message) -> None:
+@with_user
+async def handle_message(message: Message, ctx: AppContext, user_id: int, username: str) -> None:
     """
     Handle regular text messages.
     Detects style and responds using AI.
     """
-    user_id = message.from_user.id
-    username = message.from_user.username or "User"
     text = message.text or ""
 
-    logger.info(f"User {user_id} (@{username}) sent message: {text}")
+    logger.info("User %s (@%s) sent message: %s", user_id, username, text)
 
-    # Detect user style
-    style = style_detector.analyze_style(text)
+    # One turn per chat at a time so replies keep message order
+    async with chat_turn(message.chat.id):
+        # Detect user style
+        style = ctx.style_detector.analyze_style(text)
 
-    # Load and update user data with style
-    user_data = storage.load_user_data(user_id) or {'user_id': user_id, 'username': username}
-    user_data['last_style'] = style
-    storage.save_user_data(user_id, user_data)
+        # Send "typing" in the background; the load and the AI call overlap it
+        typing_task = asyncio.create_task(send_typing(message))
+        user_data = await _aload(ctx.storage, user_id)
 
-    # Send "typing" action
-    await message.bot.send_chat_action(message.chat.id, "typing")
+        # Save the updated style while the AI response is generated
+        user_data = user_data or {'user_id': user_id, 'username': username}
+        user_data['last_style'] = style
+        save_task = asyncio.create_task(_asave(ctx.storage, user_id, user_data))
 
-    try:
-        # Generate AI response
-        response = await ai_instance.generate_response(text, user_id, style)
-        await message.reply(response)
-        logger.info(f"AI responded to user {user_id} with style: {style}")
-    except Exception as e:
-        logger.error(f"Error generating AI response: {e}")
-        await message.reply("Извините, произошла ошибка. Попробуйте ещё раз.")
+        try:
+            # Generate AI response
+            await reply_streamed(
+                message, ctx.ai.generate_response_stream(text, user_id, style), typing_task
+            )
+            logger.info("AI responded to user %s with style: %s", user_id, style)
+        except Exception as e:
+            logger.error("Error generating AI response: %s", e)
+            await typing_task
+            await message.reply(_AI_ERROR_MSG)
+        finally:
+            await save_task
+
+
+# Command dispatch table: (handler, filter), registered in order by main()
+_COMMAND_HANDLERS = (
+    (start_command, Command("start")),
+    (ask_command, Command("ask")),
+    (plan_command, Command("plan")),
+    (tasks_command, Command("tasks")),
+    (done_command, Command("done")),
+    (progress_command, Command("progress")),
+    (weekly_command, Command("weekly")),
+)
 
 
 async def main() -> None:
@@ -452,7 +595,7 @@ async def main() -> None:
     Main function to initialize and run the bot.
     Loads configuration, registers handlers, and starts polling.
     """
-    global ai_instance, reminder_scheduler
+    global reminder_scheduler
 
     # Get bot token from environment
     bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -466,44 +609,74 @@ async def main() -> None:
     # Initialize AI
     ai_instance = create_ai()
 
+    # Connect to the plan generation queue (optional, requires arq)
+    task_queue = None
+    queue_url = os.getenv("TASK_QUEUE_URL")
+    if queue_url:
+        from arq import create_pool
+        from arq.connections import RedisSettings
+
+        task_queue = await create_pool(RedisSettings.from_dsn(queue_url))
+        logger.info("Plan generation delegated to the task queue")
+
     # Initialize bot and dispatcher
-    bot = Bot(token=bot_token)
+    bot = Bot(token=bot_token, session=create_session())
     dp = Dispatcher()
+    dp["ctx"] = AppContext(
+        storage=storage,
+        style_detector=style_detector,
+        task_manager=task_manager,
+        reminder_generator=reminder_generator,
+        ai=ai_instance,
+        task_queue=task_queue
+    )
 
     # Initialize and start reminder scheduler
-    reminder_scheduler = ReminderScheduler(bot, storage, ai_instance, task_manager)
+    reminder_scheduler = ReminderScheduler(
+        bot, storage, ai_instance, task_manager, reminder_generator
+    )
     reminder_scheduler.start()
 
     # Include routers (onboarding must be first for FSM priority)
     dp.include_router(onboarding_router)
 
     # Register handlers
-    dp.message.register(start_command, Command("start"))
-    dp.message.register(ask_command, Command("ask"))
-    dp.message.register(plan_command, Command("plan"))
-    dp.message.register(tasks_command, Command("tasks"))
-    dp.message.register(done_command, Command("done"))
-    dp.message.register(progress_command, Command("progress"))
-    dp.message.register(weekly_command, Command("weekly"))
+    for handler, command_filter in _COMMAND_HANDLERS:
+        dp.message.register(handler, command_filter)
     dp.message.register(handle_message)  # Handle all other messages
 
     logger.info("Bot is running. Press Ctrl+C to stop.")
 
     try:
-        # Start polling
-        await dp.start_polling(bot)
+        # Start polling; each update runs in its own task so slow AI turns don't stall it
+        await dp.start_polling(bot, handle_as_tasks=True)
     finally:
         # Stop scheduler
         if reminder_scheduler:
             reminder_scheduler.stop()
+        await ai_instance.close()
+        if task_queue is not None:
+            await task_queue.close()
         await bot.session.close()
 
 
+def install_event_loop() -> None:
+    """Use uvloop for the event loop when it is installed (Linux/macOS)."""
+    try:
+        import uvloop
+    except ImportError:  # Optional: falls back to the default asyncio loop
+        return
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("Using uvloop event loop")
+
+
 if __name__ == "__main__":
+    install_event_loop()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
-        logger.error(f"Fatal error: {e}")
+        logger.error("Fatal error: %s", e)
         raise
@@ -3,12 +3,16 @@ Onboarding FSM Module
 Handles user onboarding flow with style adaptation.
 """
 
+import asyncio
+import re
+
 from aiogram import Router, F
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message
 
+from bot._users import username_of
 from utils.logger import logger
 from utils.style_detector import StyleDetector
 from data.storage import Storage
@@ -30,167 +34,173 @@ class OnboardingStates(StatesGroup):
     waiting_for_language = State()
 
 
-class OnboardingQuestions:
+# Onboarding texts by (formality, language); {name} and {emoji} are filled per call
+_DEFAULT_KEY = ('casual', 'russian')
+
+_WELCOME_MESSAGES = {
+    ('formal', 'russian'): (
+        "Давайте познакомимся! Я задам вам несколько вопросов, чтобы создать "
+        "персональный план развития.\n\n"
+        "Вы можете отменить процесс в любой момент командой /cancel"
+    ),
+    ('casual', 'russian'): (
+        "Давай познакомимся! Задам тебе несколько вопросов, чтобы создать "
+        "твой персональный план.\n\n"
+        "Можешь отменить в любой момент командой /cancel"
+    ),
+    ('formal', 'kazakh'): (
+        "Танысайық! Сізге жеке даму жоспарын құру үшін бірнеше сұрақ қоямын.\n\n"
+        "Кез келген уақытта /cancel командасымен тоқтата аласыз"
+    ),
+    ('casual', 'kazakh'): (
+        "Танысайық! Саған жеке жоспар жасау үшін бірнеше сұрақ қояйын.\n\n"
+        "/cancel командасымен тоқтата аласың"
+    ),
+}
+
+_NAME_QUESTIONS = {
+    ('formal', 'russian'): "Как вас зовут?",
+    ('casual', 'russian'): "Как тебя зовут?",
+    ('formal', 'kazakh'): "Сіздің атыңыз кім?",
+    ('casual', 'kazakh'): "Атың кім?",
+}
+
+_AGE_QUESTIONS = {
+    ('formal', 'russian'): "Приятно познакомиться, {name}! Сколько вам лет?",
+    ('casual', 'russian'): "Приятно, {name}! Сколько тебе лет?",
+    ('formal', 'kazakh'): "Танысқаныма қуаныштымын, {name}! Сіз неше жастасыз?",
+    ('casual', 'kazakh'): "Қуаныштымын, {name}! Неше жасың?",
+}
+
+_GOALS_QUESTIONS = {
+    ('formal', 'russian'): (
+        "Расскажите о своих целях и мечтах. Чего вы хотите достичь в ближайшие 5 лет?\n"
+        "(Например: карьерный рост, освоение новой профессии, развитие навыков)"
+    ),
+    ('casual', 'russian'): (
+        "Расскажи о своих целях и мечтах. Чего хочешь достичь за 5 лет?\n"
+        "(Например: карьера, новая профессия, развитие навыков)"
+    ),
+    ('formal', 'kazakh'): (
+        "Мақсаттарыңыз бен арман-тілектеріңіз туралы айтып беріңізші. "
+        "Келесі 5 жылда неге қол жеткізгіңіз келеді?\n"
+        "(Мысалы: мансаптық өсу, жаңа мамандықты меңгеру, дағдыларды дамыту)"
+    ),
+    ('casual', 'kazakh'): (
+        "Мақсаттарың мен арман-тілектерің туралы айтып бер. "
+        "5 жылда неге жеткің келеді?\n"
+        "(Мысалы: мансап, жаңа мамандық, дағдыларды дамыту)"
+    ),
+}
+
+_LANGUAGE_QUESTIONS = {
+    ('formal', 'russian'): (
+        "На каком языке вам удобнее общаться?\n"
+        "Напишите: 'русский' или 'казахский'"
+    ),
+    ('casual', 'russian'): (
+        "На каком языке тебе удобнее?\n"
+        "Напиши: 'русский' или 'казахский'"
+    ),
+    ('formal', 'kazakh'): (
+        "Қай тілде сөйлесу ыңғайлы?\n"
+        "'орыс' немесе 'қазақ' деп жазыңыз"
+    ),
+    ('casual', 'kazakh'): (
+        "Қай тілде ыңғайлы?\n"
+        "'орыс' немесе 'қазақ' деп жаз"
+    ),
+}
+
+_COMPLETION_MESSAGES = {
+    ('formal', 'russian'): (
+        "{emoji} Отлично, {name}! Ваш профиль сохранён.\n\n"
+        "Теперь я могу создать для вас персональный план развития. "
+        "Используйте /plan когда будете готовы.\n\n"
+        "Команды:\n/profile - просмотр профиля\n/plan - создать план"
+    ),
+    ('casual', 'russian'): (
+        "{emoji} Супер, {name}! Твой профиль сохранён.\n\n"
+        "Теперь могу создать для тебя план развития. "
+        "Жми /plan когда будешь готов.\n\n"
+        "Команды:\n/profile - твой профиль\n/plan - создать план"
+    ),
+    ('formal', 'kazakh'): (
+        "{emoji} Керемет, {name}! Сіздің профиліңіз сақталды.\n\n"
+        "Енді сізге жеке даму жоспарын құра аламын. "
+        "Дайын болғанда /plan пайдаланыңыз.\n\n"
+        "Командалар:\n/profile - профильді көру\n/plan - жоспар құру"
+    ),
+    ('casual', 'kazakh'): (
+        "{emoji} Супер, {name}! Профиліңіз сақталды.\n\n"
+        "Енді саған даму жоспарын жасай аламын. "
+        "Дайын болғанда /plan бас.\n\n"
+        "Командалар:\n/profile - профиліңіз\n/plan - жоспар құру"
+    ),
+}
+
+
+# Answers that confirm a profile update (compared casefolded)
+_CONFIRM_WORDS = frozenset({'да', 'да!', 'yes', 'ия', 'иә', 'иа', 'ok', 'окей'})
+
+# Language answers accepted by process_language, matched anywhere in the lowercased input
+_RUSSIAN_KEYWORDS = re.compile('|'.join(map(re.escape, [
+    'русский', 'русск', 'rus', 'russian', 'ру'
+])))
+_KAZAKH_KEYWORDS = re.compile('|'.join(map(re.escape, [
+    'казахский', 'казах', 'қазақ', 'қазақша', 'kaz', 'kazakh', 'каз', 'кз'
+])))
+
+
+# Onboarding text tables by kind, looked up by ask()
+_MESSAGES = {
+    'welcome': _WELCOME_MESSAGES,
+    'name': _NAME_QUESTIONS,
+    'age': _AGE_QUESTIONS,
+    'goals': _GOALS_QUESTIONS,
+    'language': _LANGUAGE_QUESTIONS,
+    'completion': _COMPLETION_MESSAGES,
+}
+
+
+def _style_key(style: dict) -> tuple:
+    """Get the (formality, language) key for a detected style."""
+    return (style.get('formality', 'casual'), style.get('language', 'russian'))
+
+
+def _pick(messages: dict, key: tuple) -> str:
+    """Look up the text for a (formality, language) key, defaulting to casual Russian."""
+    return messages.get(key) or messages[_DEFAULT_KEY]
+
+
+async def _update_changed(state: FSMContext, data: dict, **values) -> None:
+    """
+    Write only the FSM values that differ from data, reusing it instead of re-reading state.
+
+    Args:
+        state: FSM context
+        data: State data already loaded by the handler
+        **values: Values to store
     """
-    Generates onboarding questions adapted to user's communication style.
+    changed = {key: value for key, value in values.items() if data.get(key) != value}
+    if changed:
+        await state.set_data({**data, **changed})
+
+
+def ask(kind: str, key: tuple, **fields) -> str:
     """
+    Get an onboarding text adapted to the user's communication style.
+
+    Args:
+        kind: Text kind, a key of _MESSAGES ('welcome', 'name', 'age', ...)
+        key: The style's (formality, language) key from _style_key
+        **fields: Values for the text's placeholders ({name}, {emoji})
 
-    @staticmethod
-    def get_welcome_message(style: dict) -> str:
-        """Get welcome message for onboarding start."""
-        language = style.get('language', 'russian')
-        formality = style.get('formality', 'casual')
-
-        messages = {
-            ('formal', 'russian'): (
-                "Давайте познакомимся! Я задам вам несколько вопросов, чтобы создать "
-                "персональный план развития.\n\n"
-                "Вы можете отменить процесс в любой момент командой /cancel"
-            ),
-            ('casual', 'russian'): (
-                "Давай познакомимся! Задам тебе несколько вопросов, чтобы создать "
-                "твой персональный план.\n\n"
-                "Можешь отменить в любой момент командой /cancel"
-            ),
-            ('formal', 'kazakh'): (
-                "Танысайық! Сізге жеке даму жоспарын құру үшін бірнеше сұрақ қоямын.\n\n"
-                "Кез келген уақытта /cancel командасымен тоқтата аласыз"
-            ),
-            ('casual', 'kazakh'): (
-                "Танысайық! Саған жеке жоспар жасау үшін бірнеше сұрақ қояйын.\n\n"
-                "/cancel командасымен тоқтата аласың"
-            ),
-        }
-
-        key = (formality, language)
-        return messages.get(key, messages[('casual', 'russian')])
-
-    @staticmethod
-    def get_name_question(style: dict) -> str:
-        """Get question for name input."""
-        language = style.get('language', 'russian')
-        formality = style.get('formality', 'casual')
-
-        messages = {
-            ('formal', 'russian'): "Как вас зовут?",
-            ('casual', 'russian'): "Как тебя зовут?",
-            ('formal', 'kazakh'): "Сіздің атыңыз кім?",
-            ('casual', 'kazakh'): "Атың кім?",
-        }
-
-        key = (formality, language)
-        return messages.get(key, messages[('casual', 'russian')])
-
-    @staticmethod
-    def get_age_question(style: dict, name: str) -> str:
-        """Get question for age input."""
-        language = style.get('language', 'russian')
-        formality = style.get('formality', 'casual')
-
-        messages = {
-            ('formal', 'russian'): f"Приятно познакомиться, {name}! Сколько вам лет?",
-            ('casual', 'russian'): f"Приятно, {name}! Сколько тебе лет?",
-            ('formal', 'kazakh'): f"Танысқаныма қуаныштымын, {name}! Сіз неше жастасыз?",
-            ('casual', 'kazakh'): f"Қуаныштымын, {name}! Неше жасың?",
-        }
-
-        key = (formality, language)
-        return messages.get(key, messages[('casual', 'russian')])
-
-    @staticmethod
-    def get_goals_question(style: dict) -> str:
-        """Get question for goals input."""
-        language = style.get('language', 'russian')
-        formality = style.get('formality', 'casual')
-
-        messages = {
-            ('formal', 'russian'): (
-                "Расскажите о своих целях и мечтах. Чего вы хотите достичь в ближайшие 5 лет?\n"
-                "(Например: карьерный рост, освоение новой профессии, развитие навыков)"
-            ),
-            ('casual', 'russian'): (
-                "Расскажи о своих целях и мечтах. Чего хочешь достичь за 5 лет?\n"
-                "(Например: карьера, новая профессия, развитие навыков)"
-            ),
-            ('formal', 'kazakh'): (
-                "Мақсаттарыңыз бен арман-тілектеріңіз туралы айтып беріңізші. "
-                "Келесі 5 жылда неге қол жеткізгіңіз келеді?\n"
-                "(Мысалы: мансаптық өсу, жаңа мамандықты меңгеру, дағдыларды дамыту)"
-            ),
-            ('casual', 'kazakh'): (
-                "Мақсаттарың мен арман-тілектерің туралы айтып бер. "
-                "5 жылда неге жеткің келеді?\n"
-                "(Мысалы: мансап, жаңа мамандық, дағдыларды дамыту)"
-            ),
-        }
-
-        key = (formality, language)
-        return messages.get(key, messages[('casual', 'russian')])
-
-    @staticmethod
-    def get_language_question(style: dict) -> str:
-        """Get question for preferred communication language."""
-        language = style.get('language', 'russian')
-        formality = style.get('formality', 'casual')
-
-        messages = {
-            ('formal', 'russian'): (
-                "На каком языке вам удобнее общаться?\n"
-                "Напишите: 'русский' или 'казахский'"
-            ),
-            ('casual', 'russian'): (
-                "На каком языке тебе удобнее?\n"
-                "Напиши: 'русский' или 'казахский'"
-            ),
-            ('formal', 'kazakh'): (
-                "Қай тілде сөйлесу ыңғайлы?\n"
-                "'орыс' немесе 'қазақ' деп жазыңыз"
-            ),
-            ('casual', 'kazakh'): (
-                "Қай тілде ыңғайлы?\n"
-                "'орыс' немесе 'қазақ' деп жаз"
-            ),
-        }
-
-        key = (formality, language)
-        return messages.get(key, messages[('casual', 'russian')])
-
-    @staticmethod
-    def get_completion_message(style: dict, name: str) -> str:
-        """Get completion message after onboarding."""
-        language = style.get('language', 'russian')
-        formality = style.get('formality', 'casual')
-        emoji = "✅" if style.get('emoji_usage') == 'high' else ""
-
-        messages = {
-            ('formal', 'russian'): (
-                f"{emoji} Отлично, {name}! Ваш профиль сохранён.\n\n"
-                "Теперь я могу создать для вас персональный план развития. "
-                "Используйте /plan когда будете готовы.\n\n"
-                "Команды:\n/profile - просмотр профиля\n/plan - создать план"
-            ),
-            ('casual', 'russian'): (
-                f"{emoji} Супер, {name}! Твой профиль сохранён.\n\n"
-                "Теперь могу создать для тебя план развития. "
-                "Жми /plan когда будешь готов.\n\n"
-                "Команды:\n/profile - твой профиль\n/plan - создать план"
-            ),
-            ('formal', 'kazakh'): (
-                f"{emoji} Керемет, {name}! Сіздің профиліңіз сақталды.\n\n"
-                "Енді сізге жеке даму жоспарын құра аламын. "
-                "Дайын болғанда /plan пайдаланыңыз.\n\n"
-                "Командалар:\n/profile - профильді көру\n/plan - жоспар құру"
-            ),
-            ('casual', 'kazakh'): (
-                f"{emoji} Супер, {name}! Профиліңіз сақталды.\n\n"
-                "Енді саған даму жоспарын жасай аламын. "
-                "Дайын болғанда /plan бас.\n\n"
-                "Командалар:\n/profile - профиліңіз\n/plan - жоспар құру"
-            ),
-        }
-
-        key = (formality, language)
-        return messages.get(key, messages[('casual', 'russian')])
+    Returns:
+        Formatted text
+    """
+    text = _pick(_MESSAGES[kind], key)
+    return text.format_map(fields) if fields else text
 
 
 @onboarding_router.message(Command("onboarding"))
@@ -199,12 +209,12 @@ async def start_onboarding(message: Message, state: FSMContext):
     Start or restart user onboarding process.
     """
     user_id = message.from_user.id
-    username = message.from_user.username or "User"
+    username = username_of(message.from_user)
 
-    logger.info(f"User {user_id} (@{username}) started onboarding")
+    logger.info("User %s (@%s) started onboarding", user_id, username)
 
     # Check if user already has a profile
-    user_data = storage.load_user_data(user_id)
+    user_data = await asyncio.to_thread(storage.load_user_data, user_id)
 
     if user_data and user_data.get('onboarding_completed'):
         # User already has profile, ask if they want to update
@@ -220,13 +230,11 @@ async def start_onboarding(message: Message, state: FSMContext):
     # Detect initial style from any previous messages
     initial_style = style_detector.analyze_style(message.text or "")
 
-    # Send welcome message
-    welcome = OnboardingQuestions.get_welcome_message(initial_style)
-    await message.reply(welcome)
-
-    # Ask first question
-    name_question = OnboardingQuestions.get_name_question(initial_style)
-    await message.reply(name_question)
+    # Send welcome message and the first question in one message
+    key = _style_key(initial_style)
+    welcome = ask('welcome', key)
+    name_question = ask('name', key)
+    await message.answer(f"{welcome}\n\n{name_question}")
 
     # Set state and save initial style
     await state.set_state(OnboardingStates.waiting_for_name)
@@ -234,7 +242,7 @@ async def start_onboarding(message: Message, state: FSMContext):
         current_style=initial_style,
         user_id=user_id,
         username=username,
-        all_messages=[]  # Track all messages for style analysis
+        style_counts=None  # Running style counts over all answers
     )
 
 
@@ -249,11 +257,11 @@ async def process_name(message: Message, state: FSMContext):
 
     # Check if we're awaiting confirmation for profile update
     if data.get('awaiting_confirmation'):
-        if name.lower() in ['да', 'yes', 'ия', 'иә', 'ok', 'окей']:
+        if name.casefold() in _CONFIRM_WORDS:
             # User confirmed, proceed with update
-            await state.update_data(awaiting_confirmation=False)
+            await _update_changed(state, data, awaiting_confirmation=False)
             initial_style = data.get('current_style', style_detector.analyze_style(""))
-            name_question = OnboardingQuestions.get_name_question(initial_style)
+            name_question = ask('name', _style_key(initial_style))
             await message.reply(name_question)
             return
         else:
@@ -271,25 +279,26 @@ async def process_name(message: Message, state: FSMContext):
         await message.reply("Имя слишком длинное. Пожалуйста, введите имя покороче.")
         return
 
-    logger.info(f"User {user_id} provided name: {name}")
+    logger.info("User %s provided name: %s", user_id, name)
 
     # Detect style from this message
     message_style = style_detector.analyze_style(message.text)
 
-    # Update messages list for final style analysis
-    messages = data.get('all_messages', [])
-    messages.append(message.text)
+    # Add this answer to the running style counts
+    style_counts = style_detector.analyze_incremental(data.get('style_counts'), message.text)
 
     # Ask next question
-    age_question = OnboardingQuestions.get_age_question(message_style, name)
+    age_question = ask('age', _style_key(message_style), name=name)
     await message.reply(age_question)
 
     # Update state
     await state.set_state(OnboardingStates.waiting_for_age)
-    await state.update_data(
+    await _update_changed(
+        state,
+        data,
         name=name,
         current_style=message_style,
-        all_messages=messages
+        style_counts=style_counts
     )
 
 
@@ -313,26 +322,27 @@ async def process_age(message: Message, state: FSMContext):
         )
         return
 
-    logger.info(f"User {user_id} provided age: {age}")
+    logger.info("User %s provided age: %s", user_id, age)
 
     # Get current data and detect style
     data = await state.get_data()
     message_style = style_detector.analyze_style(message.text)
 
-    # Update messages list
-    messages = data.get('all_messages', [])
-    messages.append(message.text)
+    # Add this answer to the running style counts
+    style_counts = style_detector.analyze_incremental(data.get('style_counts'), message.text)
 
     # Ask next question
-    goals_question = OnboardingQuestions.get_goals_question(message_style)
+    goals_question = ask('goals', _style_key(message_style))
     await message.reply(goals_question)
 
     # Update state
     await state.set_state(OnboardingStates.waiting_for_goals)
-    await state.update_data(
+    await _update_changed(
+        state,
+        data,
         age=age,
         current_style=message_style,
-        all_messages=messages
+        style_counts=style_counts
     )
 
 
@@ -355,26 +365,27 @@ async def process_goals(message: Message, state: FSMContext):
         )
         return
 
-    logger.info(f"User {user_id} provided goals: {goals[:50]}...")
+    logger.info("User %s provided goals: %.50s...", user_id, goals)
 
     # Get current data and detect style
     data = await state.get_data()
     message_style = style_detector.analyze_style(message.text)
 
-    # Update messages list
-    messages = data.get('all_messages', [])
-    messages.append(message.text)
+    # Add this answer to the running style counts
+    style_counts = style_detector.analyze_incremental(data.get('style_counts'), message.text)
 
     # Ask next question
-    language_question = OnboardingQuestions.get_language_question(message_style)
+    language_question = ask('language', _style_key(message_style))
     await message.reply(language_question)
 
     # Update state
     await state.set_state(OnboardingStates.waiting_for_language)
-    await state.update_data(
+    await _update_changed(
+        state,
+        data,
         goals=goals,
         current_style=message_style,
-        all_messages=messages
+        style_counts=style_counts
     )
 
 
@@ -385,12 +396,9 @@ async def process_language(message: Message, state: FSMContext):
     language_input = message.text.strip().lower()
 
     # Map input to language
-    russian_keywords = ['русский', 'русск', 'rus', 'russian', 'ру']
-    kazakh_keywords = ['казахский', 'казах', 'қазақ', 'қазақша', 'kaz', 'kazakh', 'каз', 'кз']
-
-    if any(kw in language_input for kw in russian_keywords):
+    if _RUSSIAN_KEYWORDS.search(language_input):
         preferred_language = 'russian'
-    elif any(kw in language_input for kw in kazakh_keywords):
+    elif _KAZAKH_KEYWORDS.search(language_input):
         preferred_language = 'kazakh'
     else:
         await message.reply(
@@ -399,16 +407,14 @@ async def process_language(message: Message, state: FSMContext):
         )
         return
 
-    logger.info(f"User {user_id} selected language: {preferred_language}")
+    logger.info("User %s selected language: %s", user_id, preferred_language)
 
     # Get all collected data
     data = await state.get_data()
-    messages = data.get('all_messages', [])
-    messages.append(message.text)
 
-    # Analyze overall communication style from all messages
-    combined_text = " ".join(messages)
-    final_style = style_detector.analyze_style(combined_text)
+    # Finalize the overall communication style from all answers
+    style_counts = style_detector.analyze_incremental(data.get('style_counts'), message.text)
+    final_style = style_detector.finalize(style_counts)
 
     # Override language with user's explicit preference
     final_style['language'] = preferred_language
@@ -427,13 +433,15 @@ async def process_language(message: Message, state: FSMContext):
     }
 
     # Save to storage
-    storage.save_user_data(user_id, user_profile)
-    logger.info(f"User {user_id} completed onboarding. Profile saved.")
+    await asyncio.to_thread(storage.save_user_data, user_id, user_profile)
+    logger.info("User %s completed onboarding. Profile saved.", user_id)
 
     # Send completion message
-    completion_msg = OnboardingQuestions.get_completion_message(
-        final_style,
-        data.get('name')
+    completion_msg = ask(
+        'completion',
+        _style_key(final_style),
+        emoji="✅" if final_style.get('emoji_usage') == 'high' else "",
+        name=data.get('name')
     )
     await message.reply(completion_msg)
 
@@ -447,7 +455,7 @@ async def show_profile(message: Message):
     user_id = message.from_user.id
 
     # Load user data
-    user_data = storage.load_user_data(user_id)
+    user_data = await asyncio.to_thread(storage.load_user_data, user_id)
 
     if not user_data or not user_data.get('onboarding_completed'):
         await message.reply(
@@ -499,7 +507,7 @@ async def show_profile(message: Message):
         )
 
     await message.reply(profile_text)
-    logger.info(f"User {user_id} viewed their profile")
+    logger.info("User %s viewed their profile", user_id)
 
 
 @onboarding_router.message(Command("cancel"))
@@ -520,4 +528,4 @@ async def cancel_onboarding(message: Message, state: FSMContext):
         "Процесс тоқтатылды. /onboarding арқылы қайта бастай аласыз"
     )
 
-    logger.info(f"User {message.from_user.id} cancelled onboarding")
+    logger.info("User %s cancelled onboarding", message.from_user.id)
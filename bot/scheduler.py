@@ -3,24 +3,52 @@ Scheduler Module
 Handles scheduled reminders using APScheduler.
 """
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
 from aiogram import Bot
 from datetime import datetime
 
 from utils.logger import logger
+from utils.rate_limiter import AsyncRateLimiter
 from data.storage import Storage
-from core.reminders import ReminderGenerator
+from core.reminders import STREAK_MILESTONES, ReminderGenerator
 from core.task_manager import TaskManager
 
 
+@dataclass(frozen=True, slots=True)
+class ReminderUser:
+    """User fields shared by all reminder kinds."""
+
+    name: str
+    style: dict
+
+
 class ReminderScheduler:
     """
     Manages scheduled reminders for users.
     Sends personalized reminders at specific times.
     """
 
-    def __init__(self, bot: Bot, storage: Storage, ai_instance, task_manager: TaskManager):
+    # Telegram allows about 30 messages per second per bot
+    SEND_RATE_LIMIT = 30
+    # Users processed at once per reminder run
+    REMINDER_CONCURRENCY = 30
+    # Seconds before the users-with-plans list is rebuilt from disk
+    USERS_CACHE_TTL = 600
+    # Telegram's maximum message length; longer reminder batches are split
+    MESSAGE_MAX_LENGTH = 4096
+
+    def __init__(
+        self,
+        bot: Bot,
+        storage: Storage,
+        ai_instance,
+        task_manager: TaskManager,
+        reminder_generator: Optional[ReminderGenerator] = None
+    ):
         """
         Initialize ReminderScheduler.
 
@@ -29,17 +57,30 @@ class ReminderScheduler:
             storage: Storage instance
             ai_instance: AI instance for task generation
             task_manager: TaskManager instance
+            reminder_generator: Shared ReminderGenerator (a new one is created if omitted)
         """
         self.bot = bot
         self.storage = storage
         self.ai_instance = ai_instance
         self.task_manager = task_manager
-        self.reminder_generator = ReminderGenerator()
+        self.reminder_generator = reminder_generator or ReminderGenerator()
+
+        # Imported here so processes that only import this module (the plan
+        # worker, via bot.main) don't load APScheduler
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
         self.scheduler = AsyncIOScheduler()
+        self.send_limiter = AsyncRateLimiter(self.SEND_RATE_LIMIT, 1.0)
+
+        # Users with plans and reminders on, as an insertion-ordered set; kept
+        # current by storage writes
+        self._users_cache: Optional[dict] = None
+        self._users_cache_ts = 0.0
+        storage.register_write_listener(self._on_user_write)
 
     def start(self):
         """Start the scheduler with all reminder jobs."""
         logger.info("Starting reminder scheduler...")
+        from apscheduler.triggers.cron import CronTrigger
 
         # Morning reminder: 7:00 AM
         self.scheduler.add_job(
@@ -77,167 +118,181 @@ class ReminderScheduler:
         self.scheduler.shutdown()
         logger.info("Reminder scheduler stopped")
 
-    async def send_morning_reminders(self):
-        """Send morning reminders to all users with plans."""
-        logger.info("Sending morning reminders...")
-
-        # Get all users with plans
-        users = self._get_users_with_plans()
-
-        for user_id in users:
-            try:
-                user_data = self.storage.load_user_data(user_id)
-
-                if not user_data or not user_data.get('plan'):
-                    continue
+    async def _send(self, user_id: int, text: str) -> None:
+        """Send one message within the bot-wide rate limit."""
+        async with self.send_limiter:
+            await self.bot.send_message(chat_id=user_id, text=text)
 
-                # Check if reminders are enabled (default: true)
-                if not user_data.get('reminders_enabled', True):
-                    continue
-
-                # Get user info
-                name = user_data.get('name', 'User')
-                style = user_data.get('communication_style', {})
-
-                # Get streak
-                stats = self.task_manager.get_progress_stats(user_id)
-                streak = stats.get('current_streak', 0)
+    async def _fan_out(self, reminder_type: str) -> None:
+        """
+        Send one kind of reminder to every user with a plan.
 
-                # Generate reminder
-                reminder = self.reminder_generator.generate_morning_reminder(
-                    name, style, streak
-                )
+        Users are processed concurrently, at most REMINDER_CONCURRENCY at a
+        time; sends are additionally throttled by send_limiter.
 
-                # Send message
-                await self.bot.send_message(chat_id=user_id, text=reminder)
-                logger.info(f"Morning reminder sent to user {user_id}")
+        Args:
+            reminder_type: 'morning', 'afternoon' or 'evening'
+        """
+        build = getattr(self, f'_build_{reminder_type}_messages')
+        users = await asyncio.to_thread(self._get_users_with_plans)
+        semaphore = asyncio.Semaphore(self.REMINDER_CONCURRENCY)
+
+        async def run(user_id: int) -> None:
+            async with semaphore:
+                await self._send_reminder(reminder_type, build, user_id)
+
+        await asyncio.gather(*(run(user_id) for user_id in users), return_exceptions=True)
+
+    async def _send_reminder(
+        self,
+        reminder_type: str,
+        build: Callable[[int, ReminderUser], Awaitable[List[str]]],
+        user_id: int
+    ) -> None:
+        """
+        Load one user, build their reminder messages and send them.
 
-            except Exception as e:
-                logger.error(f"Error sending morning reminder to user {user_id}: {e}")
+        Args:
+            reminder_type: Reminder kind, for logging
+            build: Message builder for this reminder kind
+            user_id: Telegram user ID
+        """
+        try:
+            user = await self._load_reminder_user(user_id)
+            if user is None:
+                return
 
-    async def send_afternoon_reminders(self):
-        """Send afternoon check-in reminders."""
-        logger.info("Sending afternoon reminders...")
+            for text in self._coalesce(await build(user_id, user)):
+                await self._send(user_id, text)
+                logger.info("%s reminder message sent to user %s", reminder_type.capitalize(), user_id)
 
-        users = self._get_users_with_plans()
+        except Exception as e:
+            logger.error(f"Error sending {reminder_type} reminder to user {user_id}: {e}")
 
-        for user_id in users:
-            try:
-                user_data = self.storage.load_user_data(user_id)
+    def _coalesce(self, texts: List[str]) -> List[str]:
+        """
+        Join consecutive messages for one chat so they go out in as few sends as possible.
 
-                if not user_data or not user_data.get('plan'):
-                    continue
+        Args:
+            texts: Messages in send order
 
-                if not user_data.get('reminders_enabled', True):
-                    continue
+        Returns:
+            Messages joined with blank lines, each at most MESSAGE_MAX_LENGTH long
+        """
+        batches: List[str] = []
+        for text in texts:
+            if batches and len(batches[-1]) + 2 + len(text) <= self.MESSAGE_MAX_LENGTH:
+                batches[-1] = f"{batches[-1]}\n\n{text}"
+            else:
+                batches.append(text)
+        return batches
+
+    async def _load_reminder_user(self, user_id: int) -> Optional[ReminderUser]:
+        """
+        Load the user fields every reminder needs.
 
-                # Get user info
-                name = user_data.get('name', 'User')
-                style = user_data.get('communication_style', {})
+        Args:
+            user_id: Telegram user ID
 
-                # Get today's task progress
-                tasks_data = await self.task_manager.get_daily_tasks(user_id, self.ai_instance)
+        Returns:
+            ReminderUser, or None if the user has no plan or disabled reminders
+        """
+        user_data = await asyncio.to_thread(self.storage.load_user_data, user_id)
 
-                if not tasks_data['success']:
-                    continue
+        if not user_data or not user_data.get('plan'):
+            return None
 
-                completed = tasks_data['completed_count']
-                total = tasks_data['total_tasks']
+        # Check if reminders are enabled (default: true)
+        if not user_data.get('reminders_enabled', True):
+            return None
 
-                # Generate reminder
-                reminder = self.reminder_generator.generate_afternoon_reminder(
-                    name, style, completed, total
-                )
+        return ReminderUser(
+            name=user_data.get('name', 'User'),
+            style=user_data.get('communication_style', {})
+        )
 
-                # Send message
-                await self.bot.send_message(chat_id=user_id, text=reminder)
-                logger.info(f"Afternoon reminder sent to user {user_id}")
+    async def send_morning_reminders(self):
+        """Send morning reminders to all users with plans."""
+        logger.info("Sending morning reminders...")
+        await self._fan_out('morning')
 
-            except Exception as e:
-                logger.error(f"Error sending afternoon reminder to user {user_id}: {e}")
+    async def send_afternoon_reminders(self):
+        """Send afternoon check-in reminders."""
+        logger.info("Sending afternoon reminders...")
+        await self._fan_out('afternoon')
 
     async def send_evening_reminders(self):
         """Send evening summary reminders."""
         logger.info("Sending evening reminders...")
+        await self._fan_out('evening')
 
-        users = self._get_users_with_plans()
-
-        for user_id in users:
-            try:
-                user_data = self.storage.load_user_data(user_id)
+    async def _build_morning_messages(self, user_id: int, user: ReminderUser) -> List[str]:
+        """Build the morning reminder, which mentions the current streak."""
+        stats = await asyncio.to_thread(self.task_manager.get_progress_stats, user_id)
+        streak = stats.get('current_streak', 0)
 
-                if not user_data or not user_data.get('plan'):
-                    continue
+        return [self.reminder_generator.generate_morning_reminder(user.name, user.style, streak)]
 
-                if not user_data.get('reminders_enabled', True):
-                    continue
+    async def _build_afternoon_messages(self, user_id: int, user: ReminderUser) -> List[str]:
+        """Build the afternoon check-in on today's task progress."""
+        tasks_data = await self.task_manager.get_daily_tasks(user_id, self.ai_instance)
 
-                # Get user info
-                name = user_data.get('name', 'User')
-                style = user_data.get('communication_style', {})
+        if not tasks_data['success']:
+            return []
 
-                # Get today's task progress
-                tasks_data = await self.task_manager.get_daily_tasks(user_id, self.ai_instance)
+        return [self.reminder_generator.generate_afternoon_reminder(
+            user.name, user.style, tasks_data['completed_count'], tasks_data['total_tasks']
+        )]
 
-                if not tasks_data['success']:
-                    continue
+    async def _build_evening_messages(self, user_id: int, user: ReminderUser) -> List[str]:
+        """Build the evening summary, followed by a streak milestone message if earned."""
+        now = datetime.now()
+        tasks_data = await self.task_manager.get_daily_tasks(user_id, self.ai_instance, now=now)
 
-                completed = tasks_data['completed_count']
-                total = tasks_data['total_tasks']
+        if not tasks_data['success']:
+            return []
 
-                # Generate reminder
-                reminder = self.reminder_generator.generate_evening_reminder(
-                    name, style, completed, total
-                )
+        messages = [self.reminder_generator.generate_evening_reminder(
+            user.name, user.style, tasks_data['completed_count'], tasks_data['total_tasks']
+        )]
 
-                # Send message
-                await self.bot.send_message(chat_id=user_id, text=reminder)
-                logger.info(f"Evening reminder sent to user {user_id}")
+        # Check for streak milestones
+        stats = await asyncio.to_thread(self.task_manager.get_progress_stats, user_id, now)
+        streak = stats.get('current_streak', 0)
 
-                # Check for streak milestones
-                stats = self.task_manager.get_progress_stats(user_id)
-                streak = stats.get('current_streak', 0)
+        if streak in STREAK_MILESTONES:
+            milestone_msg = self.reminder_generator.generate_streak_milestone(
+                user.name, user.style, streak
+            )
+            if milestone_msg:
+                messages.append(milestone_msg)
 
-                if streak in [7, 14, 30, 50, 100, 365]:
-                    milestone_msg = self.reminder_generator.generate_streak_milestone(
-                        name, style, streak
-                    )
-                    if milestone_msg:
-                        await self.bot.send_message(chat_id=user_id, text=milestone_msg)
-                        logger.info(f"Streak milestone message sent to user {user_id} for {streak} days")
+        return messages
 
-            except Exception as e:
-                logger.error(f"Error sending evening reminder to user {user_id}: {e}")
+    def _on_user_write(self, user_id: int, data: Optional[dict]) -> None:
+        """Keep the cached users-with-plans list in step with a storage write."""
+        if self._users_cache is None:
+            return
+        if data and data.get('plan') and data.get('reminders_enabled', True):
+            self._users_cache[user_id] = None
+        else:
+            self._users_cache.pop(user_id, None)
 
     def _get_users_with_plans(self) -> list:
         """
-        Get list of user IDs who have plans.
+        Get list of user IDs who have plans and reminders enabled.
+
+        The storage plans index is re-read every USERS_CACHE_TTL seconds;
+        writes through this scheduler's storage update the cache in between.
 
         Returns:
             List of user IDs
         """
-        # Get all user data files from storage
-        import os
-        data_dir = self.storage.data_dir
-
-        user_ids = []
-
-        if not os.path.exists(data_dir):
-            return user_ids
-
-        for filename in os.listdir(data_dir):
-            if filename.startswith('user_') and filename.endswith('.json'):
-                try:
-                    # Extract user ID from filename
-                    user_id_str = filename.replace('user_', '').replace('.json', '')
-                    user_id = int(user_id_str)
-
-                    # Check if user has a plan
-                    user_data = self.storage.load_user_data(user_id)
-                    if user_data and user_data.get('plan'):
-                        user_ids.append(user_id)
-
-                except (ValueError, TypeError):
-                    continue
+        now = time.monotonic()
+        if self._users_cache is not None and now - self._users_cache_ts < self.USERS_CACHE_TTL:
+            return list(self._users_cache)
 
+        user_ids = self.storage.get_users_with_plans(reminders_only=True)
+        self._users_cache = dict.fromkeys(user_ids)
+        self._users_cache_ts = now
         return user_ids
@@ -3,6 +3,18 @@ Planner Module
 Handles planning and task management logic.
 """
 
+from dataclasses import dataclass
+from typing import Dict
+
+
+@dataclass(slots=True)
+class Plan:
+    """A user's plan record."""
+
+    user_id: int
+    created: bool = False
+    status: str = "pending"
+
 
 class Planner:
     """
@@ -12,9 +24,9 @@ class Planner:
 
     def __init__(self):
         """Initialize the planner."""
-        self.plans = {}
+        self.plans: Dict[int, Plan] = {}
 
-    def create_plan(self, user_id: int, user_data: dict) -> dict:
+    def create_plan(self, user_id: int, user_data: dict) -> Plan:
         """
         Create a new plan for a user.
 
@@ -23,14 +35,10 @@ class Planner:
             user_data: User information and goals
 
         Returns:
-            Dictionary containing the created plan
+            The created Plan
         """
         # Placeholder for future implementation
-        plan = {
-            "user_id": user_id,
-            "created": True,
-            "status": "pending"
-        }
+        plan = Plan(user_id=user_id, created=True)
         self.plans[user_id] = plan
         return plan
 
@@ -7,6 +7,260 @@ import random
 from typing import Dict, List
 
 
+# Reminder texts by (language, formality). Placeholders ({name}, {completed},
+# ...) are filled per call; tuples indexed by bucket run from the lowest
+# completion bucket to the highest. The _build_*_formats functions below join
+# them, emoji included, into one format string per variant at import.
+_MORNING = {
+    ('russian', 'formal'): {
+        'greetings': ("Доброе утро, {name}!", "Здравствуйте, {name}!", "Добрый день, {name}!"),
+        'messages': (
+            "Пора начать работу над вашим планом.",
+            "Сегодня отличный день для достижения целей.",
+            "Не забудьте выполнить задачи на сегодня.",
+        ),
+        'ending': "Посмотрите задачи с помощью /tasks",
+        'streak': "\nВаша серия: {streak} дней подряд!",
+    },
+    ('russian', 'casual'): {
+        'greetings': ("Доброе утро, {name}!", "Привет, {name}!", "С добрым утром, {name}!"),
+        'messages': (
+            "Время работать над своими целями!",
+            "Сегодня будет продуктивный день!",
+            "Не забудь про свои задачи!",
+        ),
+        'ending': "Смотри задачи: /tasks",
+        'streak': "\nТвоя серия: {streak} дней подряд!",
+    },
+    ('kazakh', 'formal'): {
+        'greetings': ("Қайырлы таң, {name}!", "Сәлеметсіз бе, {name}!"),
+        'messages': (
+            "Жоспарыңызбен жұмыс бастау уақыты.",
+            "Бүгін мақсаттарға жету үшін керемет күн.",
+        ),
+        'ending': "Тапсырмаларды /tasks арқылы қараңыз",
+        'streak': "\nСіздің серияңыз: {streak} күн қатарынан!",
+    },
+    ('kazakh', 'casual'): {
+        'greetings': ("Қайырлы таң, {name}!", "Сәлем, {name}!"),
+        'messages': (
+            "Мақсаттарыңмен жұмыс бастау уақыты!",
+            "Бүгін өнімді күн болады!",
+        ),
+        'ending': "Тапсырмалар: /tasks",
+        'streak': "\nСенің серияң: {streak} күн қатарынан!",
+    },
+}
+
+_AFTERNOON = {
+    ('russian', 'formal'): {
+        'greeting': "{name}, как продвигается работа?",
+        'feedback': (
+            "Еще есть время выполнить задачи.",
+            "Вы на правильном пути. Продолжайте!",
+            "Хорошая работа! Осталось совсем немного.",
+            "Отличный прогресс! Продолжайте в том же духе.",
+        ),
+        'ending': "Выполнено: {completed}/{total} задач.",
+    },
+    ('russian', 'casual'): {
+        'greeting': "{name}, как дела?",
+        'feedback': (
+            "Давай, время еще есть!",
+            "Продолжай! Ты можешь!",
+            "Хорошо идёшь! Осталось немного.",
+            "Отлично! Так держать!",
+        ),
+        'ending': "Готово: {completed}/{total}",
+    },
+    ('kazakh', 'formal'): {
+        'greeting': "{name}, жұмыс қалай жүріп жатыр?",
+        'feedback': (
+            "Тапсырмаларды орындауға әлі уақыт бар.",
+            "Дұрыс жолдасыз. Жалғастырыңыз!",
+            "Жақсы жұмыс! Азырақ қалды.",
+            "Тамаша прогресс! Осылай жалғастырыңыз.",
+        ),
+        'ending': "Орындалды: {completed}/{total} тапсырма.",
+    },
+    ('kazakh', 'casual'): {
+        'greeting': "{name}, қалай?",
+        'feedback': (
+            "Әлі уақыт бар!",
+            "Жалғастыр! Сен істей аласың!",
+            "Жақсы бара жатыр! Азырақ қалды.",
+            "Керемет! Осылай!",
+        ),
+        'ending': "Дайын: {completed}/{total}",
+    },
+}
+
+# Afternoon buckets: <25%, 25-50%, 50-75%, 75%+
+_AFTERNOON_EMOJI = ("⏰", "⏰", "👍", "🌟")
+
+_EVENING = {
+    ('russian', 'formal'): {
+        'greeting': "Добрый вечер, {name}!",
+        'feedback': (
+            "Сегодня получилось {completed} из {total} задач.",
+            "Хороший результат. Выполнено {completed} из {total}.",
+            "Отличная работа! Выполнено {completed} из {total} задач.",
+            "Превосходно! Вы выполнили все задачи сегодня.",
+        ),
+        'encouragement': (
+            "Не расстраивайтесь, завтра новый день!",
+            "Завтра получится лучше!",
+            "Завтра продолжим с новыми силами.",
+            "Так держать!",
+        ),
+        'ending': "Отдохните и подготовьтесь к новому дню.",
+    },
+    ('russian', 'casual'): {
+        'greeting': "Привет, {name}!",
+        'feedback': (
+            "Сегодня {completed}/{total}.",
+            "Неплохо! Готово {completed}/{total}.",
+            "Отлично! Сделано {completed}/{total}.",
+            "Супер! Все задачи выполнены!",
+        ),
+        'encouragement': (
+            "Ничего, завтра лучше!",
+            "Завтра наверстаем!",
+            "Завтра продолжим!",
+            "Ты молодец!",
+        ),
+        'done_emoji': " 🎉",
+        'ending': "Отдохни и набирайся сил!",
+    },
+    ('kazakh', 'formal'): {
+        'greeting': "Қайырлы кеш, {name}!",
+        'feedback': (
+            "Бүгін {completed}/{total} шықты.",
+            "Жақсы нәтиже. {completed}/{total} орындалды.",
+            "Жақсы жұмыс! {completed}/{total} орындалды.",
+            "Тамаша! Бүгін барлық тапсырмаларды орындадыңыз.",
+        ),
+        'encouragement': (
+            "Ештеңе емес, ертең жаңа күн!",
+            "Ертең жақсырақ болады!",
+            "Ертең жаңа күшпен жалғастырамыз.",
+            "Осылай жалғастырыңыз!",
+        ),
+        'ending': "Демалыңыз және жаңа күнге дайындалыңыз.",
+    },
+    ('kazakh', 'casual'): {
+        'greeting': "Сәлем, {name}!",
+        'feedback': (
+            "Бүгін {completed}/{total}.",
+            "Жаман емес! Дайын {completed}/{total}.",
+            "Керемет! Дайын {completed}/{total}.",
+            "Супер! Барлық тапсырмалар орындалды!",
+        ),
+        'encouragement': (
+            "Ештеңе, ертең жақсырақ!",
+            "Ертең толықтырамыз!",
+            "Ертең жалғастырамыз!",
+            "Сен жақсысың!",
+        ),
+        'done_emoji': " 🎉",
+        'ending': "Демал және күш жина!",
+    },
+}
+
+# Evening buckets: <50%, 50-75%, 75%+, all done
+_EVENING_EMOJI = ("🌆", "🌙", "🌙", "🌙")
+_EVENING_DONE = 3
+
+_MILESTONES = {
+    ('russian', 'formal'): "🎉 {name}, поздравляем!\n\nВы выполняете задачи {streak} дней подряд! Отличный результат!",
+    ('russian', 'casual'): "🎉 {name}, поздравляем!\n\nТы выполняешь задачи {streak} дней подряд! Отлично!",
+    ('kazakh', 'formal'): "🎉 {name}, құттықтаймыз!\n\nСіз {streak} күн қатарынан тапсырмаларды орындап жатырсыз! Керемет нәтиже!",
+    ('kazakh', 'casual'): "🎉 {name}, құттықтаймыз!\n\nСен {streak} күн қатарынан орындап жатырсың! Керемет!",
+}
+
+# Streak lengths that earn a milestone message
+STREAK_MILESTONES = frozenset({7, 14, 30, 50, 100, 365})
+
+
+def _build_morning_formats() -> Dict[tuple, str]:
+    """
+    Build full morning formats by (key, emoji, has_streak).
+
+    Each takes the chosen {greeting} (already named) and {message}, plus {streak}.
+    """
+    formats = {}
+    for key, template in _MORNING.items():
+        streak = template['streak']
+        ending = template['ending']
+        formats[key, False, False] = f"{{greeting}}\n{{message}}\n\n{ending}"
+        formats[key, False, True] = f"{{greeting}}\n{{message}}{streak}\n\n{ending}"
+        formats[key, True, False] = f"☀️ {{greeting}}\n{{message}}\n\n📋 {ending}"
+        formats[key, True, True] = f"☀️ {{greeting}}\n{{message}}🔥 {streak}\n\n📋 {ending}"
+    return formats
+
+
+def _build_afternoon_formats() -> Dict[tuple, str]:
+    """Build full afternoon formats by (key, emoji, bucket), filled from {name}, {completed}, {total}."""
+    formats = {}
+    for key, template in _AFTERNOON.items():
+        greeting = template['greeting']
+        ending = template['ending']
+        for bucket, feedback in enumerate(template['feedback']):
+            formats[key, False, bucket] = f"{greeting}\n{feedback}\n\n{ending}"
+            formats[key, True, bucket] = (
+                f"{_AFTERNOON_EMOJI[bucket]} {greeting}\n{feedback}\n\n✅ {ending}"
+            )
+    return formats
+
+
+def _build_evening_formats() -> Dict[tuple, str]:
+    """Build full evening formats by (key, emoji, bucket), filled from {name}, {completed}, {total}."""
+    formats = {}
+    for key, template in _EVENING.items():
+        greeting = template['greeting']
+        ending = template['ending']
+        for bucket, (feedback, encouragement) in enumerate(
+            zip(template['feedback'], template['encouragement'])
+        ):
+            formats[key, False, bucket] = f"{greeting}\n{feedback} {encouragement}\n\n{ending}"
+            if bucket == _EVENING_DONE:
+                encouragement += template.get('done_emoji', "")
+                ending_text = f"💪 {ending}"
+            else:
+                ending_text = ending
+            formats[key, True, bucket] = (
+                f"{_EVENING_EMOJI[bucket]} {greeting}\n{feedback} {encouragement}\n\n{ending_text}"
+            )
+    return formats
+
+
+def _build_milestone_formats() -> Dict[tuple, str]:
+    """Build milestone formats by (key, emoji), filled from {name} and {streak}."""
+    formats = {}
+    for key, text in _MILESTONES.items():
+        formats[key, False] = text
+        formats[key, True] = f"{text} 🔥💪✨"
+    return formats
+
+
+_MORNING_FORMATS = _build_morning_formats()
+_AFTERNOON_FORMATS = _build_afternoon_formats()
+_EVENING_FORMATS = _build_evening_formats()
+_MILESTONE_FORMATS = _build_milestone_formats()
+
+
+def _style_key(style: Dict) -> tuple:
+    """Get the (language, formality) template key for a style, defaulting to casual Russian."""
+    language = 'kazakh' if style.get('language', 'russian') == 'kazakh' else 'russian'
+    formality = 'formal' if style.get('formality', 'casual') == 'formal' else 'casual'
+    return (language, formality)
+
+
+def _completion_rate(completed: int, total: int) -> float:
+    """Get the completed share of tasks as a percentage (0 when there are no tasks)."""
+    return (completed / total * 100) if total > 0 else 0
+
+
 class ReminderGenerator:
     """
     Generates personalized reminder messages based on user's communication style.
@@ -15,7 +269,8 @@ class ReminderGenerator:
 
     def __init__(self):
         """Initialize ReminderGenerator."""
-        pass
+        # Own generator with its choice bound once, for morning broadcasts
+        self._choice = random.Random().choice
 
     def generate_morning_reminder(self, user_name: str, style: Dict, streak: int = 0) -> str:
         """
@@ -29,14 +284,16 @@ class ReminderGenerator:
         Returns:
             Reminder message string
         """
-        language = style.get('language', 'russian')
-        formality = style.get('formality', 'casual')
-        emoji_usage = style.get('emoji_usage', 'low')
+        key = _style_key(style)
+        template = _MORNING[key]
+        emoji = style.get('emoji_usage', 'low') == 'high'
+
+        greeting = self._choice(template['greetings']).format(name=user_name)
+        message = self._choice(template['messages'])
 
-        if language == 'kazakh':
-            return self._generate_kazakh_morning(user_name, formality, emoji_usage, streak)
-        else:
-            return self._generate_russian_morning(user_name, formality, emoji_usage, streak)
+        return _MORNING_FORMATS[key, emoji, streak > 0].format(
+            greeting=greeting, message=message, streak=streak
+        )
 
     def generate_afternoon_reminder(self, user_name: str, style: Dict, tasks_completed: int, total_tasks: int) -> str:
         """
@@ -51,14 +308,13 @@ class ReminderGenerator:
         Returns:
             Reminder message string
         """
-        language = style.get('language', 'russian')
-        formality = style.get('formality', 'casual')
-        emoji_usage = style.get('emoji_usage', 'low')
+        rate = _completion_rate(tasks_completed, total_tasks)
+        bucket = (rate >= 25) + (rate >= 50) + (rate >= 75)
+        emoji = style.get('emoji_usage', 'low') == 'high'
 
-        if language == 'kazakh':
-            return self._generate_kazakh_afternoon(user_name, formality, emoji_usage, tasks_completed, total_tasks)
-        else:
-            return self._generate_russian_afternoon(user_name, formality, emoji_usage, tasks_completed, total_tasks)
+        return _AFTERNOON_FORMATS[_style_key(style), emoji, bucket].format(
+            name=user_name, completed=tasks_completed, total=total_tasks
+        )
 
     def generate_evening_reminder(self, user_name: str, style: Dict, tasks_completed: int, total_tasks: int) -> str:
         """
@@ -73,280 +329,13 @@ class ReminderGenerator:
         Returns:
             Reminder message string
         """
-        language = style.get('language', 'russian')
-        formality = style.get('formality', 'casual')
-        emoji_usage = style.get('emoji_usage', 'low')
-
-        if language == 'kazakh':
-            return self._generate_kazakh_evening(user_name, formality, emoji_usage, tasks_completed, total_tasks)
-        else:
-            return self._generate_russian_evening(user_name, formality, emoji_usage, tasks_completed, total_tasks)
-
-    def _generate_russian_morning(self, name: str, formality: str, emoji_usage: str, streak: int) -> str:
-        """Generate Russian morning reminder."""
-        if formality == 'formal':
-            greetings = [
-                f"Доброе утро, {name}!",
-                f"Здравствуйте, {name}!",
-                f"Добрый день, {name}!"
-            ]
-            messages = [
-                "Пора начать работу над вашим планом.",
-                "Сегодня отличный день для достижения целей.",
-                "Не забудьте выполнить задачи на сегодня."
-            ]
-            ending = "Посмотрите задачи с помощью /tasks"
-        else:
-            greetings = [
-                f"Доброе утро, {name}!",
-                f"Привет, {name}!",
-                f"С добрым утром, {name}!"
-            ]
-            messages = [
-                "Время работать над своими целями!",
-                "Сегодня будет продуктивный день!",
-                "Не забудь про свои задачи!"
-            ]
-            ending = "Смотри задачи: /tasks"
-
-        greeting = random.choice(greetings)
-        message = random.choice(messages)
-
-        # Add streak info if exists
-        if streak > 0:
-            if formality == 'formal':
-                streak_text = f"\nВаша серия: {streak} дней подряд!"
-            else:
-                streak_text = f"\nТвоя серия: {streak} дней подряд!"
-
-            if emoji_usage == 'high':
-                streak_text = f"🔥 {streak_text}"
-        else:
-            streak_text = ""
-
-        # Add emojis
-        if emoji_usage == 'high':
-            greeting = f"☀️ {greeting}"
-            ending = f"📋 {ending}"
-
-        return f"{greeting}\n{message}{streak_text}\n\n{ending}"
-
-    def _generate_russian_afternoon(self, name: str, formality: str, emoji_usage: str, completed: int, total: int) -> str:
-        """Generate Russian afternoon reminder."""
-        completion_rate = (completed / total * 100) if total > 0 else 0
-
-        if formality == 'formal':
-            greeting = f"{name}, как продвигается работа?"
-            if completion_rate >= 75:
-                feedback = "Отличный прогресс! Продолжайте в том же духе."
-            elif completion_rate >= 50:
-                feedback = "Хорошая работа! Осталось совсем немного."
-            elif completion_rate >= 25:
-                feedback = "Вы на правильном пути. Продолжайте!"
-            else:
-                feedback = "Еще есть время выполнить задачи."
-            ending = f"Выполнено: {completed}/{total} задач."
-        else:
-            greeting = f"{name}, как дела?"
-            if completion_rate >= 75:
-                feedback = "Отлично! Так держать!"
-            elif completion_rate >= 50:
-                feedback = "Хорошо идёшь! Осталось немного."
-            elif completion_rate >= 25:
-                feedback = "Продолжай! Ты можешь!"
-            else:
-                feedback = "Давай, время еще есть!"
-            ending = f"Готово: {completed}/{total}"
-
-        # Add emojis
-        if emoji_usage == 'high':
-            if completion_rate >= 75:
-                greeting = f"🌟 {greeting}"
-            elif completion_rate >= 50:
-                greeting = f"👍 {greeting}"
-            else:
-                greeting = f"⏰ {greeting}"
-            ending = f"✅ {ending}"
-
-        return f"{greeting}\n{feedback}\n\n{ending}"
-
-    def _generate_russian_evening(self, name: str, formality: str, emoji_usage: str, completed: int, total: int) -> str:
-        """Generate Russian evening reminder."""
-        completion_rate = (completed / total * 100) if total > 0 else 0
-
-        if formality == 'formal':
-            greeting = f"Добрый вечер, {name}!"
-            if completion_rate == 100:
-                feedback = "Превосходно! Вы выполнили все задачи сегодня."
-                encouragement = "Так держать!"
-            elif completion_rate >= 75:
-                feedback = f"Отличная работа! Выполнено {completed} из {total} задач."
-                encouragement = "Завтра продолжим с новыми силами."
-            elif completion_rate >= 50:
-                feedback = f"Хороший результат. Выполнено {completed} из {total}."
-                encouragement = "Завтра получится лучше!"
-            else:
-                feedback = f"Сегодня получилось {completed} из {total} задач."
-                encouragement = "Не расстраивайтесь, завтра новый день!"
-            ending = "Отдохните и подготовьтесь к новому дню."
-        else:
-            greeting = f"Привет, {name}!"
-            if completion_rate == 100:
-                feedback = "Супер! Все задачи выполнены!"
-                encouragement = "Ты молодец! 🎉" if emoji_usage == 'high' else "Ты молодец!"
-            elif completion_rate >= 75:
-                feedback = f"Отлично! Сделано {completed}/{total}."
-                encouragement = "Завтра продолжим!"
-            elif completion_rate >= 50:
-                feedback = f"Неплохо! Готово {completed}/{total}."
-                encouragement = "Завтра наверстаем!"
-            else:
-                feedback = f"Сегодня {completed}/{total}."
-                encouragement = "Ничего, завтра лучше!"
-            ending = "Отдохни и набирайся сил!"
-
-        # Add emojis
-        if emoji_usage == 'high':
-            if completion_rate == 100:
-                greeting = f"🌙 {greeting}"
-                ending = f"💪 {ending}"
-            elif completion_rate >= 50:
-                greeting = f"🌙 {greeting}"
-            else:
-                greeting = f"🌆 {greeting}"
-
-        return f"{greeting}\n{feedback} {encouragement}\n\n{ending}"
-
-    def _generate_kazakh_morning(self, name: str, formality: str, emoji_usage: str, streak: int) -> str:
-        """Generate Kazakh morning reminder."""
-        if formality == 'formal':
-            greetings = [
-                f"Қайырлы таң, {name}!",
-                f"Сәлеметсіз бе, {name}!",
-            ]
-            messages = [
-                "Жоспарыңызбен жұмыс бастау уақыты.",
-                "Бүгін мақсаттарға жету үшін керемет күн.",
-            ]
-            ending = "Тапсырмаларды /tasks арқылы қараңыз"
-        else:
-            greetings = [
-                f"Қайырлы таң, {name}!",
-                f"Сәлем, {name}!",
-            ]
-            messages = [
-                "Мақсаттарыңмен жұмыс бастау уақыты!",
-                "Бүгін өнімді күн болады!",
-            ]
-            ending = "Тапсырмалар: /tasks"
-
-        greeting = random.choice(greetings)
-        message = random.choice(messages)
-
-        # Add streak info
-        if streak > 0:
-            if formality == 'formal':
-                streak_text = f"\nСіздің серияңыз: {streak} күн қатарынан!"
-            else:
-                streak_text = f"\nСенің серияң: {streak} күн қатарынан!"
-
-            if emoji_usage == 'high':
-                streak_text = f"🔥 {streak_text}"
-        else:
-            streak_text = ""
-
-        # Add emojis
-        if emoji_usage == 'high':
-            greeting = f"☀️ {greeting}"
-            ending = f"📋 {ending}"
-
-        return f"{greeting}\n{message}{streak_text}\n\n{ending}"
-
-    def _generate_kazakh_afternoon(self, name: str, formality: str, emoji_usage: str, completed: int, total: int) -> str:
-        """Generate Kazakh afternoon reminder."""
-        completion_rate = (completed / total * 100) if total > 0 else 0
-
-        if formality == 'formal':
-            greeting = f"{name}, жұмыс қалай жүріп жатыр?"
-            if completion_rate >= 75:
-                feedback = "Тамаша прогресс! Осылай жалғастырыңыз."
-            elif completion_rate >= 50:
-                feedback = "Жақсы жұмыс! Азырақ қалды."
-            elif completion_rate >= 25:
-                feedback = "Дұрыс жолдасыз. Жалғастырыңыз!"
-            else:
-                feedback = "Тапсырмаларды орындауға әлі уақыт бар."
-            ending = f"Орындалды: {completed}/{total} тапсырма."
-        else:
-            greeting = f"{name}, қалай?"
-            if completion_rate >= 75:
-                feedback = "Керемет! Осылай!"
-            elif completion_rate >= 50:
-                feedback = "Жақсы бара жатыр! Азырақ қалды."
-            elif completion_rate >= 25:
-                feedback = "Жалғастыр! Сен істей аласың!"
-            else:
-                feedback = "Әлі уақыт бар!"
-            ending = f"Дайын: {completed}/{total}"
-
-        # Add emojis
-        if emoji_usage == 'high':
-            if completion_rate >= 75:
-                greeting = f"🌟 {greeting}"
-            elif completion_rate >= 50:
-                greeting = f"👍 {greeting}"
-            else:
-                greeting = f"⏰ {greeting}"
-            ending = f"✅ {ending}"
-
-        return f"{greeting}\n{feedback}\n\n{ending}"
-
-    def _generate_kazakh_evening(self, name: str, formality: str, emoji_usage: str, completed: int, total: int) -> str:
-        """Generate Kazakh evening reminder."""
-        completion_rate = (completed / total * 100) if total > 0 else 0
-
-        if formality == 'formal':
-            greeting = f"Қайырлы кеш, {name}!"
-            if completion_rate == 100:
-                feedback = "Тамаша! Бүгін барлық тапсырмаларды орындадыңыз."
-                encouragement = "Осылай жалғастырыңыз!"
-            elif completion_rate >= 75:
-                feedback = f"Жақсы жұмыс! {completed}/{total} орындалды."
-                encouragement = "Ертең жаңа күшпен жалғастырамыз."
-            elif completion_rate >= 50:
-                feedback = f"Жақсы нәтиже. {completed}/{total} орындалды."
-                encouragement = "Ертең жақсырақ болады!"
-            else:
-                feedback = f"Бүгін {completed}/{total} шықты."
-                encouragement = "Ештеңе емес, ертең жаңа күн!"
-            ending = "Демалыңыз және жаңа күнге дайындалыңыз."
-        else:
-            greeting = f"Сәлем, {name}!"
-            if completion_rate == 100:
-                feedback = "Супер! Барлық тапсырмалар орындалды!"
-                encouragement = "Сен жақсысың! 🎉" if emoji_usage == 'high' else "Сен жақсысың!"
-            elif completion_rate >= 75:
-                feedback = f"Керемет! Дайын {completed}/{total}."
-                encouragement = "Ертең жалғастырамыз!"
-            elif completion_rate >= 50:
-                feedback = f"Жаман емес! Дайын {completed}/{total}."
-                encouragement = "Ертең толықтырамыз!"
-            else:
-                feedback = f"Бүгін {completed}/{total}."
-                encouragement = "Ештеңе, ертең жақсырақ!"
-            ending = "Демал және күш жина!"
-
-        # Add emojis
-        if emoji_usage == 'high':
-            if completion_rate == 100:
-                greeting = f"🌙 {greeting}"
-                ending = f"💪 {ending}"
-            elif completion_rate >= 50:
-                greeting = f"🌙 {greeting}"
-            else:
-                greeting = f"🌆 {greeting}"
+        rate = _completion_rate(tasks_completed, total_tasks)
+        bucket = (rate >= 50) + (rate >= 75) + (rate == 100)
+        emoji = style.get('emoji_usage', 'low') == 'high'
 
-        return f"{greeting}\n{feedback} {encouragement}\n\n{ending}"
+        return _EVENING_FORMATS[_style_key(style), emoji, bucket].format(
+            name=user_name, completed=tasks_completed, total=total_tasks
+        )
 
     def generate_streak_milestone(self, user_name: str, style: Dict, streak: int) -> str:
         """
@@ -360,26 +349,9 @@ class ReminderGenerator:
         Returns:
             Milestone message
         """
-        language = style.get('language', 'russian')
-        formality = style.get('formality', 'casual')
-        emoji_usage = style.get('emoji_usage', 'low')
-
         # Milestone days
-        if streak not in [7, 14, 30, 50, 100, 365]:
+        if streak not in STREAK_MILESTONES:
             return ""
 
-        if language == 'kazakh':
-            if formality == 'formal':
-                message = f"🎉 {user_name}, құттықтаймыз!\n\nСіз {streak} күн қатарынан тапсырмаларды орындап жатырсыз! Керемет нәтиже!"
-            else:
-                message = f"🎉 {user_name}, құттықтаймыз!\n\nСен {streak} күн қатарынан орындап жатырсың! Керемет!"
-        else:
-            if formality == 'formal':
-                message = f"🎉 {user_name}, поздравляем!\n\nВы выполняете задачи {streak} дней подряд! Отличный результат!"
-            else:
-                message = f"🎉 {user_name}, поздравляем!\n\nТы выполняешь задачи {streak} дней подряд! Отлично!"
-
-        if emoji_usage == 'high':
-            message += " 🔥💪✨"
-
-        return message
+        emoji = style.get('emoji_usage', 'low') == 'high'
+        return _MILESTONE_FORMATS[_style_key(style), emoji].format(name=user_name, streak=streak)
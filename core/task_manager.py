@@ -3,16 +3,44 @@ Task Manager Module
 Handles daily task generation, completion tracking, and progress analytics.
 """
 
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+import asyncio
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
 from data.storage import Storage
 
 
+@lru_cache(maxsize=4096)
+def _parse_created_at(plan_created_at: str) -> datetime:
+    """Parse a plan creation timestamp; each user's is parsed once, not on every stats call."""
+    return datetime.fromisoformat(plan_created_at)
+
+
+def _parse_day(date_str: str) -> int:
+    """
+    Parse a 'YYYY-MM-DD' task date into a day ordinal.
+
+    Task IDs are written with strftime, so the fixed-width slice path covers
+    them; anything else goes through strptime as before.
+
+    Raises:
+        ValueError: If the string is not a valid date
+    """
+    if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
+        return date(int(date_str[:4]), int(date_str[5:7]), int(date_str[8:10])).toordinal()
+    return datetime.strptime(date_str, '%Y-%m-%d').toordinal()
+
+
 class TaskManager:
     """
     Manages user tasks, completion tracking, and progress statistics.
     """
 
+    # Per-user task statistics kept for the current day
+    STATS_CACHE_MAXSIZE = 4096
+
     def __init__(self, storage: Storage):
         """
         Initialize TaskManager.
@@ -22,37 +50,77 @@ class TaskManager:
         """
         self.storage = storage
 
-    def get_current_day_number(self, plan_created_at: str) -> int:
+        # LRU of (user_id, day ordinal) -> (file version, plan_created_at, task
+        # stats). Entries are checked against the user file's version, since
+        # other Storage instances (onboarding, the worker) write it too, and
+        # dropped on writes through this storage
+        self._stats_cache: OrderedDict = OrderedDict()
+        self._stats_lock = threading.Lock()
+        storage.register_write_listener(self._on_user_write)
+
+    def _on_user_write(self, user_id: int, data: Optional[Dict]) -> None:
+        """Forget today's cached statistics for a user whose data changed."""
+        with self._stats_lock:
+            self._stats_cache.pop((user_id, datetime.now().toordinal()), None)
+
+    def _daily_tasks(self, user_data: Dict) -> Dict:
+        """
+        Get the user's tasks by date, creating the mapping if missing.
+
+        Tasks are stored as {'YYYY-MM-DD': {task_number: task_data}}. Data
+        saved in the older flat {'YYYY-MM-DD_N': task_data} layout is
+        converted in place and written back on the next save.
+
+        Args:
+            user_data: User data dictionary (modified in place)
+
+        Returns:
+            The user's daily_tasks mapping
+        """
+        daily_tasks = user_data.setdefault('daily_tasks', {})
+
+        legacy_ids = [task_id for task_id in daily_tasks if '_' in task_id]
+        for task_id in legacy_ids:
+            date_str, number = task_id.rsplit('_', 1)
+            daily_tasks.setdefault(date_str, {})[number] = daily_tasks.pop(task_id)
+
+        return daily_tasks
+
+    def get_current_day_number(self, plan_created_at: str, now: Optional[datetime] = None) -> int:
         """
         Calculate current day number in the 5-year plan.
 
         Args:
             plan_created_at: ISO timestamp when plan was created
+            now: Current time, if the caller already read the clock
 
         Returns:
             Day number (1-1825)
         """
-        created_date = datetime.fromisoformat(plan_created_at)
-        current_date = datetime.now()
+        created_date = _parse_created_at(plan_created_at)
+        current_date = now or datetime.now()
         delta = current_date - created_date
         day_number = delta.days + 1  # Day 1 is the first day
 
         # Cap at 1825 days (5 years)
         return min(max(1, day_number), 1825)
 
-    async def get_daily_tasks(self, user_id: int, ai_instance) -> Dict:
+    async def get_daily_tasks(self, user_id: int, ai_instance, *, now: Optional[datetime] = None) -> Dict:
         """
         Get today's tasks for a user.
 
         Args:
             user_id: Telegram user ID
             ai_instance: AI instance for task generation
+            now: Current time, if the caller already read the clock
 
         Returns:
             Dictionary with tasks and metadata
         """
-        # Load user data
-        user_data = self.storage.load_user_data(user_id)
+        now = now or datetime.now()
+
+        # Load user data off the event loop
+        user_data = await asyncio.to_thread(self.storage.load_user_data, user_id)
 
         if not user_data or not user_data.get('plan'):
             return {
@@ -67,33 +135,32 @@ class TaskManager:
 
         if not plan_created_at:
             # If no creation date, use current date as Day 1
-            plan_created_at = datetime.now().isoformat()
+            plan_created_at = now.isoformat()
             user_data['plan_created_at'] = plan_created_at
-            self.storage.save_user_data(user_id, user_data)
+            await asyncio.to_thread(self.storage.save_user_data, user_id, user_data)
 
-        day_number = self.get_current_day_number(plan_created_at)
+        day_number = self.get_current_day_number(plan_created_at, now)
         year = min(5, (day_number - 1) // 365 + 1)
 
         # Generate tasks using AI
         tasks = await ai_instance.generate_daily_tasks(plan, day_number)
 
         # Get today's date string
-        today = datetime.now().strftime('%Y-%m-%d')
+        today = now.strftime('%Y-%m-%d')
 
         # Check if tasks already exist for today
-        if 'daily_tasks' not in user_data:
-            user_data['daily_tasks'] = {}
+        today_tasks = self._daily_tasks(user_data).get(today, {})
 
         # Create task entries with completion status
         task_entries = []
         for i, task_text in enumerate(tasks, 1):
-            task_id = f"{today}_{i}"
+            task_data = today_tasks.get(str(i))
             task_entries.append({
-                'id': task_id,
+                'id': f"{today}_{i}",
                 'number': i,
                 'text': task_text,
-                'completed': user_data['daily_tasks'].get(task_id, {}).get('completed', False),
-                'completed_at': user_data['daily_tasks'].get(task_id, {}).get('completed_at')
+                'completed': task_data.get('completed', False) if task_data else False,
+                'completed_at': task_data.get('completed_at') if task_data else None
             })
 
         return {
@@ -106,13 +173,14 @@ class TaskManager:
             'completed_count': sum(1 for t in task_entries if t['completed'])
         }
 
-    def mark_task_complete(self, user_id: int, task_number: int) -> Dict:
+    def mark_task_complete(self, user_id: int, task_number: int, now: Optional[datetime] = None) -> Dict:
         """
         Mark a task as complete.
 
         Args:
             user_id: Telegram user ID
             task_number: Task number (1-based index)
+            now: Current time, if the caller already read the clock
 
         Returns:
             Result dictionary
@@ -122,70 +190,159 @@ class TaskManager:
         if not user_data:
             return {'success': False, 'error': 'no_user'}
 
-        today = datetime.now().strftime('%Y-%m-%d')
+        now = now or datetime.now()
+        today = now.strftime('%Y-%m-%d')
         task_id = f"{today}_{task_number}"
 
-        # Initialize daily_tasks if not exists
-        if 'daily_tasks' not in user_data:
-            user_data['daily_tasks'] = {}
+        # Add to the running totals unless the task was already done
+        totals = self._completion_totals(user_data)
+        today_tasks = self._daily_tasks(user_data).setdefault(today, {})
+        previous = today_tasks.get(str(task_number))
+        if not (previous and previous.get('completed')):
+            if not any(task.get('completed') for task in today_tasks.values()):
+                totals['days_active'] += 1
+            totals['total_completed'] += 1
 
         # Mark as complete
-        user_data['daily_tasks'][task_id] = {
+        today_tasks[str(task_number)] = {
             'completed': True,
-            'completed_at': datetime.now().isoformat()
+            'completed_at': now.isoformat()
         }
 
         # Update streak
-        self._update_streak(user_data)
+        self._update_streak(user_data, now)
 
         # Save
         self.storage.save_user_data(user_id, user_data)
 
+        # Hand back the updated data so callers don't have to reload it
         return {
             'success': True,
             'task_id': task_id,
-            'task_number': task_number
+            'task_number': task_number,
+            'user_data': user_data,
+            'stats': self._build_progress_stats(user_data, now)
         }
 
-    def get_progress_stats(self, user_id: int) -> Dict:
+    def get_progress_stats(self, user_id: int, now: Optional[datetime] = None) -> Dict:
         """
         Get user's progress statistics.
 
+        Task statistics are cached per user for the current day while the
+        user's file is unchanged.
+
         Args:
             user_id: Telegram user ID
+            now: Current time, if the caller already read the clock
 
         Returns:
             Statistics dictionary
         """
-        user_data = self.storage.load_user_data(user_id)
+        now = now or datetime.now()
+        key = (user_id, now.toordinal())
+        version = self.storage.user_file_version(user_id)
+        with self._stats_lock:
+            entry = self._stats_cache.get(key)
+            if entry is not None and (version is None or entry[0] != version):
+                del self._stats_cache[key]
+                entry = None
+            if entry is not None:
+                self._stats_cache.move_to_end(key)
+
+        if entry is None:
+            user_data = self.storage.load_user_data(user_id)
+
+            if not user_data or not user_data.get('plan'):
+                return {'success': False, 'error': 'no_plan'}
+
+            entry = (version, user_data.get('plan_created_at'), self._task_stats(user_data, now))
+            if version is not None:
+                with self._stats_lock:
+                    self._stats_cache[key] = entry
+                    if len(self._stats_cache) > self.STATS_CACHE_MAXSIZE:
+                        self._stats_cache.popitem(last=False)
+
+        return self._combine_stats(*entry[1:], now)
+
+    def _build_progress_stats(self, user_data: Dict, now: datetime) -> Dict:
+        """
+        Compute progress statistics from already-loaded user data.
 
-        if not user_data or not user_data.get('plan'):
+        Args:
+            user_data: User data dictionary
+            now: Current time
+
+        Returns:
+            Statistics dictionary
+        """
+        if not user_data.get('plan'):
             return {'success': False, 'error': 'no_plan'}
 
-        daily_tasks = user_data.get('daily_tasks', {})
+        return self._combine_stats(
+            user_data.get('plan_created_at'), self._task_stats(user_data, now), now
+        )
+
+    def _task_stats(self, user_data: Dict, now: datetime) -> Dict:
+        """
+        Compute the statistics that depend on the task history.
+
+        Args:
+            user_data: User data dictionary
+            now: Current time
+
+        Returns:
+            Dictionary with total completed, active days, streak and recent rate
+        """
+        totals = self._completion_totals(user_data)
 
-        # Calculate statistics
-        total_tasks_completed = sum(1 for task in daily_tasks.values() if task.get('completed'))
+        # Parse task dates once for both the streak and the recent completion rate
+        task_days = self._task_days(self._daily_tasks(user_data))
 
-        # Count unique days with completed tasks
-        completed_days = set()
-        for task_id, task_data in daily_tasks.items():
-            if task_data.get('completed'):
-                date = task_id.rsplit('_', 1)[0]  # Extract date from task_id
-                completed_days.add(date)
+        return {
+            'total_tasks_completed': totals['total_completed'],
+            'days_active': totals['days_active'],
+            'current_streak': self._calculate_streak(user_data, task_days, now),
+            'recent_completion_rate': self._calculate_recent_completion_rate(user_data, task_days, now)
+        }
 
-        days_active = len(completed_days)
+    def _completion_totals(self, user_data: Dict) -> Dict:
+        """
+        Get the running completed-task and active-day counters.
 
-        # Calculate streak
-        streak = self._calculate_streak(user_data)
+        mark_task_complete keeps these in user_data['stats']; for data saved
+        before they existed they are counted from the history once.
 
-        # Calculate completion rate for last 7 days
-        recent_completion_rate = self._calculate_recent_completion_rate(user_data)
+        Args:
+            user_data: User data dictionary (modified in place)
 
+        Returns:
+            The user's stats dict, holding 'total_completed' and 'days_active'
+        """
+        stats = user_data.setdefault('stats', {})
+        if 'total_completed' not in stats or 'days_active' not in stats:
+            completed_counts = [
+                sum(1 for task in day_tasks.values() if task.get('completed'))
+                for day_tasks in self._daily_tasks(user_data).values()
+            ]
+            stats['total_completed'] = sum(completed_counts)
+            stats['days_active'] = sum(1 for count in completed_counts if count)
+        return stats
+
+    def _combine_stats(self, plan_created_at: Optional[str], task_stats: Dict, now: datetime) -> Dict:
+        """
+        Add plan progress to task statistics.
+
+        Args:
+            plan_created_at: ISO timestamp when plan was created, if known
+            task_stats: Result of _task_stats
+            now: Current time
+
+        Returns:
+            Statistics dictionary
+        """
         # Plan progress
-        plan_created_at = user_data.get('plan_created_at')
         if plan_created_at:
-            day_number = self.get_current_day_number(plan_created_at)
+            day_number = self.get_current_day_number(plan_created_at, now)
             progress_percentage = (day_number / 1825) * 100
         else:
             day_number = 0
@@ -193,20 +350,21 @@ class TaskManager:
 
         return {
             'success': True,
-            'total_tasks_completed': total_tasks_completed,
-            'days_active': days_active,
-            'current_streak': streak,
+            'total_tasks_completed': task_stats['total_tasks_completed'],
+            'days_active': task_stats['days_active'],
+            'current_streak': task_stats['current_streak'],
             'day_number': day_number,
             'progress_percentage': progress_percentage,
-            'recent_completion_rate': recent_completion_rate
+            'recent_completion_rate': task_stats['recent_completion_rate']
         }
 
-    def get_weekly_summary(self, user_id: int) -> Dict:
+    def get_weekly_summary(self, user_id: int, now: Optional[datetime] = None) -> Dict:
         """
         Get 7-day summary of tasks.
 
         Args:
             user_id: Telegram user ID
+            now: Current time, if the caller already read the clock
 
         Returns:
             Weekly summary dictionary
@@ -216,26 +374,24 @@ class TaskManager:
         if not user_data or not user_data.get('plan'):
             return {'success': False, 'error': 'no_plan'}
 
-        daily_tasks = user_data.get('daily_tasks', {})
+        daily_tasks = self._daily_tasks(user_data)
 
         # Get last 7 days
-        summary = []
-        today = datetime.now().date()
-
-        for i in range(6, -1, -1):  # 6 days ago to today
-            date = today - timedelta(days=i)
-            date_str = date.strftime('%Y-%m-%d')
-
-            # Count tasks for this day
-            day_tasks = [tid for tid in daily_tasks.keys() if tid.startswith(date_str)]
-            completed_tasks = [tid for tid in day_tasks if daily_tasks[tid].get('completed')]
+        today = (now or datetime.now()).date()
+        dates = [today - timedelta(days=i) for i in range(6, -1, -1)]  # 6 days ago to today
 
+        summary = []
+        for day in dates:
+            date_str = day.strftime('%Y-%m-%d')
+            day_tasks = daily_tasks.get(date_str, {})
+            total = len(day_tasks)
+            completed = sum(1 for task in day_tasks.values() if task.get('completed'))
             summary.append({
                 'date': date_str,
-                'weekday': date.strftime('%A'),
-                'total_tasks': len(day_tasks),
-                'completed_tasks': len(completed_tasks),
-                'completion_rate': (len(completed_tasks) / len(day_tasks) * 100) if day_tasks else 0
+                'weekday': day.strftime('%A'),
+                'total_tasks': total,
+                'completed_tasks': completed,
+                'completion_rate': (completed / total * 100) if total else 0
             })
 
         return {
@@ -245,92 +401,115 @@ class TaskManager:
             'week_end': summary[-1]['date'] if summary else None
         }
 
-    def _calculate_streak(self, user_data: Dict) -> int:
+    def _task_days(self, daily_tasks: Dict) -> List[Tuple[int, int, int]]:
+        """
+        Parse each task date into a day ordinal, with that day's task counts.
+
+        Args:
+            daily_tasks: Tasks by date, as returned by _daily_tasks
+
+        Returns:
+            (date ordinal, total tasks, completed tasks) per date; dates that
+            don't parse are skipped
+        """
+        task_days = []
+        for date_str, day_tasks in daily_tasks.items():
+            try:
+                day = _parse_day(date_str)
+            except (ValueError, AttributeError):
+                continue
+            completed = sum(1 for task in day_tasks.values() if task.get('completed'))
+            task_days.append((day, len(day_tasks), completed))
+        return task_days
+
+    def _calculate_streak(
+        self,
+        user_data: Dict,
+        task_days: Optional[List[Tuple[int, int, int]]] = None,
+        now: Optional[datetime] = None
+    ) -> int:
         """
         Calculate current streak of consecutive days with completed tasks.
 
         Args:
             user_data: User data dictionary
+            task_days: Parsed task dates from _task_days, if already computed
+            now: Current time, if the caller already read the clock
 
         Returns:
             Streak count (days)
         """
-        daily_tasks = user_data.get('daily_tasks', {})
-
-        # Get all dates with completed tasks
-        completed_dates = set()
-        for task_id, task_data in daily_tasks.items():
-            if task_data.get('completed'):
-                date_str = task_id.rsplit('_', 1)[0]
-                try:
-                    date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                    completed_dates.add(date)
-                except ValueError:
-                    continue
-
-        if not completed_dates:
+        if task_days is None:
+            task_days = self._task_days(self._daily_tasks(user_data))
+
+        # Get all days with completed tasks
+        completed_days = {day for day, _, completed in task_days if completed}
+
+        if not completed_days:
             return 0
 
         # Check streak from today backwards
         streak = 0
-        current_date = datetime.now().date()
+        current_day = (now or datetime.now()).toordinal()
 
-        while current_date in completed_dates:
+        while current_day in completed_days:
             streak += 1
-            current_date -= timedelta(days=1)
+            current_day -= 1
 
         return streak
 
-    def _update_streak(self, user_data: Dict) -> None:
+    def _update_streak(self, user_data: Dict, now: datetime) -> None:
         """
         Update user's streak information.
 
         Args:
             user_data: User data dictionary (modified in place)
+            now: Current time
         """
-        streak = self._calculate_streak(user_data)
+        streak = self._calculate_streak(user_data, now=now)
 
         if 'stats' not in user_data:
             user_data['stats'] = {}
 
         user_data['stats']['current_streak'] = streak
-        user_data['stats']['last_updated'] = datetime.now().isoformat()
+        user_data['stats']['last_updated'] = now.isoformat()
 
         # Update best streak if current is higher
         best_streak = user_data['stats'].get('best_streak', 0)
         if streak > best_streak:
             user_data['stats']['best_streak'] = streak
 
-    def _calculate_recent_completion_rate(self, user_data: Dict) -> float:
+    def _calculate_recent_completion_rate(
+        self,
+        user_data: Dict,
+        task_days: Optional[List[Tuple[int, int, int]]] = None,
+        now: Optional[datetime] = None
+    ) -> float:
         """
         Calculate completion rate for last 7 days.
 
         Args:
             user_data: User data dictionary
+            task_days: Parsed task dates from _task_days, if already computed
+            now: Current time, if the caller already read the clock
 
         Returns:
             Completion rate as percentage (0-100)
         """
-        daily_tasks = user_data.get('daily_tasks', {})
+        if task_days is None:
+            task_days = self._task_days(self._daily_tasks(user_data))
 
         # Get tasks from last 7 days
-        today = datetime.now().date()
-        start_date = today - timedelta(days=6)
+        today = (now or datetime.now()).toordinal()
+        start_day = today - 6
 
         total_tasks = 0
         completed_tasks = 0
 
-        for task_id, task_data in daily_tasks.items():
-            try:
-                date_str = task_id.rsplit('_', 1)[0]
-                task_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-
-                if start_date <= task_date <= today:
-                    total_tasks += 1
-                    if task_data.get('completed'):
-                        completed_tasks += 1
-            except (ValueError, AttributeError):
-                continue
+        for day, total, completed in task_days:
+            if start_day <= day <= today:
+                total_tasks += total
+                completed_tasks += completed
 
         if total_tasks == 0:
             return 0.0
@@ -4,8 +4,39 @@ Handles local database or data file operations.
 """
 
 import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: index updates are only serialized within the process
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to stdlib json
+    orjson = None
+
+
+def _dumps(data: Any, indent: bool = False) -> bytes:
+    """Serialize a document to UTF-8 JSON, with orjson when available."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(data, option=option)
+    return json.dumps(data, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+
+def _loads(raw: bytes) -> Any:
+    """Parse UTF-8 JSON, with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
 
 
 class Storage:
@@ -14,15 +45,256 @@ class Storage:
     Currently uses JSON file storage, can be extended to use databases.
     """
 
-    def __init__(self, data_dir: str = "data"):
+    # Seconds a cached user document stays in Redis
+    CACHE_TTL = 300
+
+    # Users with a plan and their reminder flags, kept current on every save
+    # so the scheduler never has to open each user file to find them
+    PLANS_INDEX_FILE = 'plans_index.json'
+
+    # Serializes index read-modify-writes across Storage instances in a process
+    _index_lock = threading.Lock()
+
+    # User documents kept in memory, revalidated against the file's mtime
+    MEMO_MAXSIZE = 1024
+
+    # Threads reading user files when the plans index is rebuilt
+    SCAN_WORKERS = 8
+
+    def __init__(self, data_dir: str = "data", redis_url: Optional[str] = None):
         """
         Initialize storage.
 
         Args:
             data_dir: Directory for storing data files
+            redis_url: Optional Redis URL for a write-through read cache
+                (defaults to the REDIS_URL environment variable)
         """
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
+        self.plans_index_path = self.data_dir / self.PLANS_INDEX_FILE
+
+        # LRU of user_id -> (file version, pickled document, plans index
+        # entry). The document is
+        # the one parsed back from the file, so memo hits have the same types
+        # as cold loads. Pickled so each load returns a fresh copy callers may
+        # mutate; unpickling is cheaper than reading and parsing the JSON again
+        self._memo: OrderedDict = OrderedDict()
+        self._memo_lock = threading.Lock()
+
+        # Called as listener(user_id, data) after each save; data is None on delete
+        self._write_listeners: List[Callable[[int, Optional[dict]], None]] = []
+
+        self._redis = None
+        redis_url = redis_url or os.getenv('REDIS_URL')
+        if redis_url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(redis_url)
+            except ImportError as e:
+                print(f"Redis cache disabled, missing dependency: {e}")
+
+    def register_write_listener(self, listener: Callable[[int, Optional[dict]], None]) -> None:
+        """
+        Register a callback run after user data is saved or deleted.
+
+        Args:
+            listener: Callable taking (user_id, data); data is None on delete
+        """
+        self._write_listeners.append(listener)
+
+    def _notify_write(self, user_id: int, data: Optional[dict]) -> None:
+        """Run write listeners, keeping a failing listener from breaking the save."""
+        for listener in self._write_listeners:
+            try:
+                listener(user_id, data)
+            except Exception as e:
+                print(f"Error in storage write listener: {e}")
+
+    @contextmanager
+    def _locked_index(self) -> Iterator[None]:
+        """Hold the plans index lock, across processes where fcntl is available."""
+        with self._index_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.data_dir / f"{self.PLANS_INDEX_FILE}.lock", 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_plans_index(self) -> Optional[Dict[int, dict]]:
+        """Read the plans index, or None if it is missing, unreadable or outdated."""
+        try:
+            with open(self.plans_index_path, 'rb') as f:
+                index = _loads(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading plans index: {e}")
+            return None
+
+        # Older indexes were a bare list of IDs without reminder flags
+        if not isinstance(index, dict):
+            return None
+        return {int(user_id): entry for user_id, entry in index.items()}
+
+    def _write_plans_index(self, index: Dict[int, dict]) -> None:
+        """Atomically replace the plans index."""
+        tmp_path = self.plans_index_path.with_suffix('.tmp')
+        tmp_path.write_bytes(_dumps({str(user_id): index[user_id] for user_id in sorted(index)}))
+        os.replace(tmp_path, self.plans_index_path)
+
+    @staticmethod
+    def _index_entry(data: Optional[dict]) -> Optional[dict]:
+        """Get a user's plans index entry, or None if they have no plan."""
+        if not data or not data.get('plan'):
+            return None
+        return {'has_plan': True, 'reminders_enabled': bool(data.get('reminders_enabled', True))}
+
+    def _scan_plans(self) -> Dict[int, dict]:
+        """Build the plans index by reading every user file (index rebuild)."""
+        user_ids = []
+        with os.scandir(self.data_dir) as entries:
+            for entry in entries:
+                if not (entry.name.startswith('user_') and entry.name.endswith('.json')):
+                    continue
+                try:
+                    user_ids.append(int(entry.name[len('user_'):-len('.json')]))
+                except ValueError:
+                    continue
+
+        # File reads overlap across threads; the parse itself is short
+        with ThreadPoolExecutor(max_workers=self.SCAN_WORKERS) as pool:
+            index = {}
+            for user_id, user_data in zip(user_ids, pool.map(self.load_user_data, user_ids)):
+                entry = self._index_entry(user_data)
+                if entry is not None:
+                    index[user_id] = entry
+            return index
+
+    def _update_plans_index(self, user_id: int, entry: Optional[dict]) -> None:
+        """Set (or remove, if entry is None) a user's plans index entry if it changed."""
+        try:
+            with self._locked_index():
+                index = self._read_plans_index()
+                if index is None:
+                    index = self._scan_plans()
+                elif index.get(user_id) == entry:
+                    # Compared with the index on disk, which other Storage
+                    # instances and processes also write; only the write is skipped
+                    return
+                if entry is not None:
+                    index[user_id] = entry
+                else:
+                    index.pop(user_id, None)
+                self._write_plans_index(index)
+        except Exception as e:
+            print(f"Error updating plans index: {e}")
+
+    def get_users_with_plans(self, reminders_only: bool = False) -> List[int]:
+        """
+        Get IDs of all users who have a plan.
+
+        Reads the plans index, building it from the user files on first use.
+
+        Args:
+            reminders_only: Skip users who have turned reminders off
+
+        Returns:
+            Sorted list of user IDs
+        """
+        try:
+            with self._locked_index():
+                index = self._read_plans_index()
+                if index is None:
+                    index = self._scan_plans()
+                    self._write_plans_index(index)
+        except Exception as e:
+            print(f"Error loading plans index: {e}")
+            index = self._scan_plans()
+
+        return sorted(
+            user_id for user_id, entry in index.items()
+            if entry['has_plan'] and (entry['reminders_enabled'] or not reminders_only)
+        )
+
+    @staticmethod
+    def _file_version(stat: os.stat_result) -> Tuple[int, int, int]:
+        """Get the (mtime_ns, size, inode) stamp a memo entry is valid for."""
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _memo_get(self, user_id: int, stat: os.stat_result) -> Optional[dict]:
+        """Get a copy of the memoized document if the file hasn't changed since."""
+        with self._memo_lock:
+            entry = self._memo.get(user_id)
+            if entry is None or entry[0] != self._file_version(stat):
+                return None
+            self._memo.move_to_end(user_id)
+        return pickle.loads(entry[1])
+
+    def _memo_current(self, user_id: int) -> Optional[tuple]:
+        """Get the memo entry if the file on disk is still the version it was made from."""
+        with self._memo_lock:
+            entry = self._memo.get(user_id)
+        if entry is None:
+            return None
+        try:
+            stat = (self.data_dir / f"user_{user_id}.json").stat()
+        except OSError:
+            return None
+        return entry if entry[0] == self._file_version(stat) else None
+
+    def _memo_set(
+        self,
+        user_id: int,
+        stat: Optional[os.stat_result],
+        data: Optional[dict],
+        pickled: Optional[bytes] = None
+    ) -> None:
+        """Memoize a document for the file version in stat, or forget it if data is None."""
+        entry: Optional[tuple] = None
+        if data is not None and stat is not None:
+            if pickled is None:
+                pickled = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+            entry = (self._file_version(stat), pickled, self._index_entry(data))
+
+        with self._memo_lock:
+            if entry is None:
+                self._memo.pop(user_id, None)
+                return
+            self._memo[user_id] = entry
+            self._memo.move_to_end(user_id)
+            if len(self._memo) > self.MEMO_MAXSIZE:
+                self._memo.popitem(last=False)
+
+    def _cache_key(self, user_id: int) -> str:
+        """Get the Redis key for a user document."""
+        return f"user:{user_id}"
+
+    def _cache_get(self, user_id: int) -> Optional[dict]:
+        """Read a user document from Redis, or None on miss or error."""
+        try:
+            raw = self._redis.get(self._cache_key(user_id))
+            return _loads(raw) if raw is not None else None
+        except Exception as e:
+            print(f"Error reading user cache: {e}")
+            return None
+
+    def _cache_set(self, user_id: int, data: Optional[dict], payload: Optional[bytes] = None) -> None:
+        """Write (or drop, if data is None) a user document in Redis."""
+        try:
+            key = self._cache_key(user_id)
+            if data is None:
+                self._redis.delete(key)
+            else:
+                if payload is None:
+                    payload = _dumps(data)
+                self._redis.setex(key, self.CACHE_TTL, payload)
+        except Exception as e:
+            print(f"Error writing user cache: {e}")
 
     def save_user_data(self, user_id: int, data: dict) -> bool:
         """
@@ -36,14 +308,65 @@ class Storage:
             True if successful, False otherwise
         """
         try:
+            # Saving a document identical to the one on disk (e.g. a handler
+            # re-saving what it loaded) would rewrite the same bytes; skip it
+            pickled = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+            current = self._memo_current(user_id)
+            if current is not None and current[1] == pickled:
+                return True
+
+            # Serialize first so a bad document can't truncate the existing file,
+            # then swap it in atomically so readers never see a partial write.
+            # The temp name is per thread so concurrent saves can't collide
+            payload = _dumps(data, indent=True)
             file_path = self.data_dir / f"user_{user_id}.json"
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            return True
+            tmp_path = self.data_dir / f"user_{user_id}.json.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                tmp_path.write_bytes(payload)
+                os.replace(tmp_path, file_path)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+
+            # Memoize what a cold load would return (JSON types: lists, str
+            # keys, strings), not the caller's object
+            stored = _loads(payload)
+            self._memo_set(user_id, file_path.stat(), stored)
         except Exception as e:
             print(f"Error saving user data: {e}")
+            self._memo_set(user_id, None, None)
+            if self._redis is not None:
+                self._cache_set(user_id, None)
             return False
 
+        # Write-through so the next read is served from Redis
+        if self._redis is not None:
+            self._cache_set(user_id, data, payload)
+
+        # The replaced file was the memoized version, whose index entry was
+        # written with it; only a change of entry needs the index file
+        index_entry = self._index_entry(stored)
+        if current is None or current[2] != index_entry:
+            self._update_plans_index(user_id, index_entry)
+        self._notify_write(user_id, data)
+        return True
+
+    def user_file_version(self, user_id: int) -> Optional[Tuple[int, int, int]]:
+        """
+        Get a cheap version stamp for a user's file, for validating derived caches.
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            (mtime_ns, size, inode) of the user file, or None if it doesn't exist
+        """
+        try:
+            stat = (self.data_dir / f"user_{user_id}.json").stat()
+        except FileNotFoundError:
+            return None
+        return self._file_version(stat)
+
     def load_user_data(self, user_id: int) -> Optional[dict]:
         """
         Load user data.
@@ -54,12 +377,33 @@ class Storage:
         Returns:
             User data dictionary or None if not found
         """
+        file_path = self.data_dir / f"user_{user_id}.json"
         try:
-            file_path = self.data_dir / f"user_{user_id}.json"
-            if file_path.exists():
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            stat = file_path.stat()
+        except FileNotFoundError:
+            self._memo_set(user_id, None, None)
+            stat = None
+
+        # Unchanged since the last read or write: skip Redis and the parse
+        if stat is not None:
+            data = self._memo_get(user_id, stat)
+            if data is not None:
+                return data
+
+        if self._redis is not None:
+            cached = self._cache_get(user_id)
+            if cached is not None:
+                return cached
+
+        if stat is None:
             return None
+
+        try:
+            data = _loads(file_path.read_bytes())
+            self._memo_set(user_id, stat, data)
+            if self._redis is not None:
+                self._cache_set(user_id, data)
+            return data
         except Exception as e:
             print(f"Error loading user data: {e}")
             return None
@@ -78,6 +422,11 @@ class Storage:
             file_path = self.data_dir / f"user_{user_id}.json"
             if file_path.exists():
                 file_path.unlink()
+            self._memo_set(user_id, None, None)
+            if self._redis is not None:
+                self._cache_set(user_id, None)
+            self._update_plans_index(user_id, None)
+            self._notify_write(user_id, None)
             return True
         except Exception as e:
             print(f"Error deleting user data: {e}")
@@ -68,29 +68,55 @@ async def test_claude_integration():
         print("   Set USE_FAKE_AI=false in .env to test real Claude API")
         return True
 
+    # The optional tests cost more tokens, so ask about them up front
+    test_plan = input("\n   Test plan generation? This will use more tokens (y/n): ").lower() == 'y'
+    test_tasks = input("   Test tasks generation? (y/n): ").lower() == 'y'
+
+    style = {
+        'formality': 'casual',
+        'language': 'russian',
+        'emoji_usage': 'low',
+        'verbosity': 'brief'
+    }
+    user_data = {
+        'user_id': 12345,
+        'name': 'Тест',
+        'age': 25,
+        'goals': 'стать программистом',
+        'preferred_language': 'russian'
+    }
+    plan_data = {
+        'user_id': 12345,
+        'language': 'russian',
+        'years': [
+            {
+                'year': 1,
+                'title': 'Основы программирования',
+                'milestones': ['Python', 'Git', 'Алгоритмы']
+            }
+        ]
+    }
+
+    async def skipped():
+        return None
+
+    # The generation calls are independent, so run them concurrently
+    response, plan, tasks = await asyncio.gather(
+        ai.generate_response(prompt="Привет! Как дела?", user_id=12345, style=style),
+        ai.generate_plan(user_data) if test_plan else skipped(),
+        ai.generate_daily_tasks(plan_data, day=1) if test_tasks else skipped(),
+        return_exceptions=True
+    )
+
     # Test basic response generation
     print("\n4. Testing response generation...")
-    try:
-        style = {
-            'formality': 'casual',
-            'language': 'russian',
-            'emoji_usage': 'low',
-            'verbosity': 'brief'
-        }
-
-        response = await ai.generate_response(
-            prompt="Привет! Как дела?",
-            user_id=12345,
-            style=style
-        )
-
-        print(f"   ✓ Response generated successfully")
-        print(f"   Response: {response[:100]}...")
-
-    except Exception as e:
-        print(f"   ❌ Response generation failed: {e}")
+    if isinstance(response, Exception):
+        print(f"   ❌ Response generation failed: {response}")
         return False
 
+    print(f"   ✓ Response generated successfully")
+    print(f"   Response: {response[:100]}...")
+
     # Test cost tracking
     print("\n5. Testing cost tracking...")
     try:
@@ -108,60 +134,28 @@ async def test_claude_integration():
 
     # Test plan generation (optional - costs more tokens)
     print("\n6. Testing plan generation (optional)...")
-    user_input = input("   Test plan generation? This will use more tokens (y/n): ")
-
-    if user_input.lower() == 'y':
-        try:
-            user_data = {
-                'user_id': 12345,
-                'name': 'Тест',
-                'age': 25,
-                'goals': 'стать программистом',
-                'preferred_language': 'russian'
-            }
-
-            plan = await ai.generate_plan(user_data)
-
-            print(f"   ✓ Plan generated successfully")
-            print(f"   Years: {len(plan.get('years', []))}")
-            print(f"   First year: {plan['years'][0]['title']}")
-
-        except Exception as e:
-            print(f"   ❌ Plan generation failed: {e}")
-            return False
-    else:
+    if not test_plan:
         print("   ⏭️  Skipped")
+    elif isinstance(plan, Exception):
+        print(f"   ❌ Plan generation failed: {plan}")
+        return False
+    else:
+        print(f"   ✓ Plan generated successfully")
+        print(f"   Years: {len(plan.get('years', []))}")
+        print(f"   First year: {plan['years'][0]['title']}")
 
     # Test daily tasks generation (optional)
     print("\n7. Testing daily tasks generation (optional)...")
-    user_input = input("   Test tasks generation? (y/n): ")
-
-    if user_input.lower() == 'y':
-        try:
-            plan_data = {
-                'user_id': 12345,
-                'language': 'russian',
-                'years': [
-                    {
-                        'year': 1,
-                        'title': 'Основы программирования',
-                        'milestones': ['Python', 'Git', 'Алгоритмы']
-                    }
-                ]
-            }
-
-            tasks = await ai.generate_daily_tasks(plan_data, day=1)
-
-            print(f"   ✓ Tasks generated successfully")
-            print(f"   Number of tasks: {len(tasks)}")
-            for i, task in enumerate(tasks, 1):
-                print(f"   {i}. {task}")
-
-        except Exception as e:
-            print(f"   ❌ Tasks generation failed: {e}")
-            return False
-    else:
+    if not test_tasks:
         print("   ⏭️  Skipped")
+    elif isinstance(tasks, Exception):
+        print(f"   ❌ Tasks generation failed: {tasks}")
+        return False
+    else:
+        print(f"   ✓ Tasks generated successfully")
+        print(f"   Number of tasks: {len(tasks)}")
+        for i, task in enumerate(tasks, 1):
+            print(f"   {i}. {task}")
 
     # Final summary
     print("\n" + "=" * 60)
@@ -177,6 +171,13 @@ async def test_claude_integration():
 
 
 if __name__ == "__main__":
+    # Same event loop as the bot: uvloop when it is installed
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:  # Optional: falls back to the default asyncio loop
+        pass
+
     try:
         success = asyncio.run(test_claude_integration())
         exit(0 if success else 1)
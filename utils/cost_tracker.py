@@ -3,14 +3,38 @@ Cost tracking for Claude API usage.
 Monitors token consumption and calculates costs based on Anthropic pricing.
 """
 
+import asyncio
+import atexit
 import json
 import os
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
 
 from utils.logger import logger
 
+try:
+    import orjson
+except ImportError:  # Optional: falls back to stdlib json
+    orjson = None
+
+
+def _dumps(data: Any, indent: bool = False) -> bytes:
+    """Serialize cost data to UTF-8 JSON, with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(data, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+
+def _loads(raw) -> Any:
+    """Parse UTF-8 JSON, with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
 
 class CostTracker:
     """
@@ -19,6 +43,10 @@ class CostTracker:
     Pricing for claude-3-5-sonnet-20241022:
     - Input: $3.00 per million tokens
     - Output: $15.00 per million tokens
+
+    Prompt cache reads are billed at 10% of the input price and
+    cache writes at 125% of the input price. Message Batches API requests
+    are billed at 50% of the regular price.
     """
 
     # Pricing per million tokens (in USD)
@@ -41,66 +69,200 @@ class CostTracker:
         }
     }
 
+    # Prompt caching price multipliers relative to the input price
+    CACHE_READ_MULTIPLIER = 0.1
+    CACHE_WRITE_MULTIPLIER = 1.25
+
+    # Message Batches API price multiplier
+    BATCH_MULTIPLIER = 0.5
+
+    # Unsaved requests, or seconds since the last save, that trigger a save
+    FLUSH_EVERY = 20
+    FLUSH_INTERVAL = 5.0
+
+    # Recent request records kept in memory, and log records that trigger a
+    # log rotation back down to REQUESTS_KEPT
+    REQUESTS_KEPT = 1000
+    LOG_MAX_RECORDS = 5000
+
+    # Days of per-user daily stats kept for get_user_cost
+    USER_STATS_DAYS = 90
+
     def __init__(self, storage_path: str = 'data/cost_tracking.json'):
         """
         Initialize cost tracker.
 
         Args:
-            storage_path: Path to JSON file for cost data storage
+            storage_path: Path to JSON file for the cost summary snapshot;
+                request records are appended to a .jsonl log beside it
         """
         self.storage_path = storage_path
+        self.log_path = os.path.splitext(storage_path)[0] + '.jsonl'
+
+        # Created once here; saves assume the directory exists
+        directory = os.path.dirname(storage_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Request records not yet appended to the log, and records in the log
+        self._pending: List[Dict] = []
+        self._log_records = 0
+        # Serializes file writes from worker threads and the caller's thread
+        self._write_lock = threading.Lock()
         self.data = self._load_data()
+        self._user_stats_pruned: Optional[date] = None
+
+        # Pending records are saved in coalesced writes
+        self._last_flush = time.monotonic()
+        atexit.register(self.flush)
+
+    def _empty_data(self) -> Dict:
+        """
+        Build an empty cost tracking data structure.
+
+        Returns:
+            Dictionary with zeroed totals and no requests
+        """
+        return {
+            'total_requests': 0,
+            'total_input_tokens': 0,
+            'total_output_tokens': 0,
+            'total_cost': 0.0,
+            'last_timestamp': '',
+            'requests': deque(maxlen=self.REQUESTS_KEPT),
+            'daily_stats': {},
+            'monthly_stats': {},
+            'user_stats': {}
+        }
 
     def _load_data(self) -> Dict:
         """
-        Load cost tracking data from storage.
+        Load cost tracking data from the summary snapshot and the request log.
+
+        Requests logged after the snapshot was taken are replayed into the
+        totals, so a crash between the two writes loses nothing.
 
         Returns:
             Dictionary with cost tracking data
         """
-        if not os.path.exists(self.storage_path):
-            # Create directory if needed
-            os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-
-            # Initialize empty data structure
-            data = {
-                'total_requests': 0,
-                'total_input_tokens': 0,
-                'total_output_tokens': 0,
-                'total_cost': 0.0,
-                'requests': [],
-                'daily_stats': {},
-                'monthly_stats': {}
-            }
-            self._save_data(data)
-            return data
+        data = self._empty_data()
+        stale = not os.path.exists(self.storage_path)
+        backfill_users = False
 
         try:
-            with open(self.storage_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            if os.path.exists(self.storage_path):
+                with open(self.storage_path, 'rb') as f:
+                    snapshot = _loads(f.read())
+
+                # Older files kept the request list inside the snapshot
+                legacy_requests = snapshot.pop('requests', None)
+                if legacy_requests and not os.path.exists(self.log_path):
+                    self._rewrite_log(legacy_requests[-self.REQUESTS_KEPT:])
+                    snapshot['last_timestamp'] = legacy_requests[-1]['timestamp']
+                stale = legacy_requests is not None
+
+                # Older snapshots had no per-user stats; rebuild them from the log
+                backfill_users = 'user_stats' not in snapshot
+                data.update(snapshot)
         except Exception as e:
             logger.error(f"Error loading cost data: {e}")
-            return {
-                'total_requests': 0,
-                'total_input_tokens': 0,
-                'total_output_tokens': 0,
-                'total_cost': 0.0,
-                'requests': [],
-                'daily_stats': {},
-                'monthly_stats': {}
-            }
+            return self._empty_data()
+
+        # Saves from worker threads may land out of order, so compare every
+        # record against the snapshot's own timestamp
+        snapshot_timestamp = data['last_timestamp']
+        for record in self._read_log():
+            self._log_records += 1
+            data['requests'].append(record)
+            if record['timestamp'] > snapshot_timestamp:
+                self._add_to_stats(data, record, record['total_cost'])
+                data['last_timestamp'] = max(data['last_timestamp'], record['timestamp'])
+                stale = True
+            elif backfill_users:
+                self._add_to_user_stats(data, record, record['total_cost'])
+                stale = True
+
+        if stale:
+            self._save_data(data)
+        return data
+
+    def _read_log(self) -> List[Dict]:
+        """
+        Read all request records from the request log.
+
+        Returns:
+            Request records in logged order (a torn last line is skipped)
+        """
+        if not os.path.exists(self.log_path):
+            return []
+
+        records = []
+        try:
+            with open(self.log_path, 'rb') as f:
+                for line in f:
+                    try:
+                        records.append(_loads(line))
+                    except ValueError:
+                        continue
+        except Exception as e:
+            logger.error(f"Error reading cost request log: {e}")
+        return records
+
+    def _dump_records(self, records) -> bytes:
+        """Serialize request records as JSON lines."""
+        return b''.join(_dumps(r) + b'\n' for r in records)
+
+    def _dump_snapshot(self, data: Dict) -> bytes:
+        """Serialize the summary snapshot (everything but the request records)."""
+        snapshot = {key: value for key, value in data.items() if key != 'requests'}
+        return _dumps(snapshot, indent=True)
+
+    def _write_file(self, path: str, content: bytes, append: bool = False) -> None:
+        """
+        Append to a file, or replace the file atomically via a temp file.
+
+        Args:
+            path: File to write
+            content: UTF-8 bytes to write
+            append: Append instead of replacing
+
+        Raises:
+            OSError: If the write fails
+        """
+        if append:
+            with open(path, 'ab') as f:
+                f.write(content)
+            return
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _rewrite_log(self, records) -> None:
+        """
+        Replace the request log with the given records (log rotation).
+
+        Args:
+            records: Request records to keep
+        """
+        try:
+            with self._write_lock:
+                self._write_file(self.log_path, self._dump_records(records))
+            self._log_records = len(records)
+        except Exception as e:
+            logger.error(f"Error rotating cost request log: {e}")
 
     def _save_data(self, data: Dict) -> None:
         """
-        Save cost tracking data to storage.
+        Save the cost summary snapshot.
 
         Args:
             data: Cost tracking data to save
         """
         try:
-            os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-            with open(self.storage_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with self._write_lock:
+                self._write_file(self.storage_path, self._dump_snapshot(data))
         except Exception as e:
             logger.error(f"Error saving cost data: {e}")
 
@@ -111,10 +273,11 @@ class CostTracker:
         output_tokens: int,
         user_id: int,
         request_type: str = 'general',
-        elapsed_time: float = 0.0
+        elapsed_time: float = 0.0,
+        **extra
     ) -> Dict:
         """
-        Track a single API request.
+        Track a single API request; stats are saved every FLUSH_EVERY requests.
 
         Args:
             model: Model name (e.g., 'claude-3-5-sonnet-20241022')
@@ -123,84 +286,279 @@ class CostTracker:
             user_id: User ID making the request
             request_type: Type of request (general, plan, tasks, etc.)
             elapsed_time: Request duration in seconds (optional)
+            **extra: Cache, batch and request_id fields (see _record_request)
 
         Returns:
             Dictionary with request cost information
         """
-        # Calculate cost
+        request_record = self._record_request(
+            model, input_tokens, output_tokens, user_id,
+            request_type=request_type, elapsed_time=elapsed_time, **extra
+        )
+        self._mark_dirty([request_record])
+        return request_record
+
+    def track_request_batch(self, requests: List[Dict]) -> List[Dict]:
+        """
+        Track several API requests; stats are saved at most once.
+
+        Args:
+            requests: List of request field dicts as accepted by _record_request
+
+        Returns:
+            List of request cost records
+        """
+        if not requests:
+            return []
+
+        records = [self._record_request(**request) for request in requests]
+        self._mark_dirty(records)
+        return records
+
+    async def track_request_batch_async(self, requests: List[Dict]) -> List[Dict]:
+        """
+        Track several API requests, saving from a worker thread when a save is due.
+
+        Args:
+            requests: List of request field dicts as accepted by _record_request
+
+        Returns:
+            List of request cost records
+        """
+        records = [self._record_request(**request) for request in requests]
+        self._pending.extend(records)
+        if self._flush_due():
+            await self.flush_async()
+        return records
+
+    def _flush_due(self) -> bool:
+        """Check whether enough records or time have piled up since the last save."""
+        return (len(self._pending) >= self.FLUSH_EVERY
+                or time.monotonic() - self._last_flush > self.FLUSH_INTERVAL)
+
+    def _mark_dirty(self, records: List[Dict]) -> None:
+        """
+        Queue unsaved request records and save once enough have piled up.
+
+        Args:
+            records: Request records just recorded
+        """
+        self._pending.extend(records)
+        if self._flush_due():
+            self.flush()
+
+    def _prepare_flush(self) -> Optional[Tuple[bytes, Optional[bytes], bytes]]:
+        """
+        Take the pending records and serialize everything a save writes.
+
+        Runs on the caller's thread, so the in-memory stats are never read
+        by a worker thread while a coroutine updates them.
+
+        Returns:
+            Tuple of (log lines to append, full log text when rotating,
+            snapshot text), or None if nothing is pending
+        """
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return None
+
+        records, self._pending = self._pending, []
+        self.data['last_timestamp'] = records[-1]['timestamp']
+        self._prune_user_stats()
+
+        # Rotate the log once it holds far more than the records kept
+        rotated_log = None
+        if self._log_records + len(records) > self.LOG_MAX_RECORDS:
+            rotated_log = self._dump_records(self.data['requests'])
+            self._log_records = len(self.data['requests'])
+        else:
+            self._log_records += len(records)
+
+        return self._dump_records(records), rotated_log, self._dump_snapshot(self.data)
+
+    def _write_flush(self, log_lines: bytes, rotated_log: Optional[bytes], snapshot: bytes) -> None:
+        """
+        Write a prepared save: the log append (or rotation), then the snapshot.
+
+        Args:
+            log_lines: Request records to append to the log
+            rotated_log: Full log text replacing the log, or None to append
+            snapshot: Summary snapshot text
+        """
+        try:
+            with self._write_lock:
+                if rotated_log is None:
+                    self._write_file(self.log_path, log_lines, append=True)
+                else:
+                    self._write_file(self.log_path, rotated_log)
+                self._write_file(self.storage_path, snapshot)
+        except Exception as e:
+            logger.error(f"Error saving cost data: {e}")
+
+    def flush(self) -> None:
+        """Append pending request records to the log and save the summary."""
+        job = self._prepare_flush()
+        if job is not None:
+            self._write_flush(*job)
+
+    async def flush_async(self) -> None:
+        """Save like flush, with the file writes run in a worker thread."""
+        job = self._prepare_flush()
+        if job is not None:
+            await asyncio.to_thread(self._write_flush, *job)
+
+    def _record_request(
+        self,
+        model: str,
+        input_tokens: int,
+        output_tokens: int,
+        user_id: int,
+        request_type: str = 'general',
+        elapsed_time: float = 0.0,
+        cache_read_tokens: int = 0,
+        cache_creation_tokens: int = 0,
+        is_batch: bool = False,
+        request_id: Optional[str] = None
+    ) -> Dict:
+        """
+        Add a single API request to the in-memory stats without saving.
+
+        Args:
+            model: Model name (e.g., 'claude-3-5-sonnet-20241022')
+            input_tokens: Number of input tokens
+            output_tokens: Number of output tokens
+            user_id: User ID making the request
+            request_type: Type of request (general, plan, tasks, etc.)
+            elapsed_time: Request duration in seconds (optional)
+            cache_read_tokens: Input tokens served from the prompt cache
+            cache_creation_tokens: Input tokens written to the prompt cache
+            is_batch: Whether the request went through the Message Batches API
+            request_id: Unique request key (optional)
+
+        Returns:
+            Dictionary with request cost information
+        """
+        # Calculate cost (cached tokens are billed at their own rates)
         pricing = self.PRICING.get(model, self.PRICING['claude-3-5-sonnet-20241022'])
         input_cost = (input_tokens / 1_000_000) * pricing['input']
+        input_cost += (cache_read_tokens / 1_000_000) * pricing['input'] * self.CACHE_READ_MULTIPLIER
+        input_cost += (cache_creation_tokens / 1_000_000) * pricing['input'] * self.CACHE_WRITE_MULTIPLIER
         output_cost = (output_tokens / 1_000_000) * pricing['output']
+        if is_batch:
+            input_cost *= self.BATCH_MULTIPLIER
+            output_cost *= self.BATCH_MULTIPLIER
         total_cost = input_cost + output_cost
 
         # Create request record
         timestamp = datetime.now().isoformat()
-        date_key = datetime.now().strftime('%Y-%m-%d')
-        month_key = datetime.now().strftime('%Y-%m')
 
         request_record = {
+            'request_id': request_id,
             'timestamp': timestamp,
             'model': model,
             'user_id': user_id,
             'request_type': request_type,
             'input_tokens': input_tokens,
             'output_tokens': output_tokens,
+            'cache_read_tokens': cache_read_tokens,
+            'cache_creation_tokens': cache_creation_tokens,
             'input_cost': round(input_cost, 6),
             'output_cost': round(output_cost, 6),
             'total_cost': round(total_cost, 6),
             'elapsed_time': round(elapsed_time, 3) if elapsed_time else 0.0
         }
 
-        # Update totals
-        self.data['total_requests'] += 1
-        self.data['total_input_tokens'] += input_tokens
-        self.data['total_output_tokens'] += output_tokens
-        self.data['total_cost'] += total_cost
-
-        # Add to requests list (keep last 1000 requests)
+        # Add to requests (the deque keeps the last REQUESTS_KEPT)
         self.data['requests'].append(request_record)
-        if len(self.data['requests']) > 1000:
-            self.data['requests'] = self.data['requests'][-1000:]
+        self._add_to_stats(self.data, request_record, total_cost)
 
-        # Update daily stats
-        if date_key not in self.data['daily_stats']:
-            self.data['daily_stats'][date_key] = {
-                'requests': 0,
-                'input_tokens': 0,
-                'output_tokens': 0,
-                'cost': 0.0
-            }
+        logger.info(
+            "API request tracked: %s for user %s, tokens: %d+%d, "
+            "cache read/write: %d/%d, cost: $%.6f",
+            request_type, user_id, input_tokens, output_tokens,
+            cache_read_tokens, cache_creation_tokens, total_cost
+        )
 
-        daily = self.data['daily_stats'][date_key]
-        daily['requests'] += 1
-        daily['input_tokens'] += input_tokens
-        daily['output_tokens'] += output_tokens
-        daily['cost'] += total_cost
+        return request_record
+
+    def _add_to_stats(self, data: Dict, record: Dict, total_cost: float) -> None:
+        """
+        Add one request record to the totals, daily and monthly stats.
+
+        Args:
+            data: Cost tracking data to update
+            record: Request record
+            total_cost: Unrounded request cost in USD
+        """
+        input_tokens = record['input_tokens']
+        output_tokens = record['output_tokens']
+        date_key = record['timestamp'][:10]
+        month_key = record['timestamp'][:7]
 
-        # Update monthly stats
-        if month_key not in self.data['monthly_stats']:
-            self.data['monthly_stats'][month_key] = {
+        # Update totals
+        data['total_requests'] += 1
+        data['total_input_tokens'] += input_tokens
+        data['total_output_tokens'] += output_tokens
+        data['total_cost'] += total_cost
+
+        # Update daily and monthly stats
+        for stats, key in ((data['daily_stats'], date_key), (data['monthly_stats'], month_key)):
+            if key not in stats:
+                stats[key] = {
+                    'requests': 0,
+                    'input_tokens': 0,
+                    'output_tokens': 0,
+                    'cost': 0.0
+                }
+
+            period = stats[key]
+            period['requests'] += 1
+            period['input_tokens'] += input_tokens
+            period['output_tokens'] += output_tokens
+            period['cost'] += total_cost
+
+        self._add_to_user_stats(data, record, total_cost)
+
+    def _add_to_user_stats(self, data: Dict, record: Dict, total_cost: float) -> None:
+        """
+        Add one request record to its user's daily stats.
+
+        Args:
+            data: Cost tracking data to update
+            record: Request record
+            total_cost: Unrounded request cost in USD
+        """
+        user_days = data['user_stats'].setdefault(str(record['user_id']), {})
+        date_key = record['timestamp'][:10]
+        if date_key not in user_days:
+            user_days[date_key] = {
                 'requests': 0,
                 'input_tokens': 0,
                 'output_tokens': 0,
                 'cost': 0.0
             }
 
-        monthly = self.data['monthly_stats'][month_key]
-        monthly['requests'] += 1
-        monthly['input_tokens'] += input_tokens
-        monthly['output_tokens'] += output_tokens
-        monthly['cost'] += total_cost
-
-        # Save updated data
-        self._save_data(self.data)
-
-        logger.info(
-            f"API request tracked: {request_type} for user {user_id}, "
-            f"tokens: {input_tokens}+{output_tokens}, cost: ${total_cost:.6f}"
-        )
+        daily = user_days[date_key]
+        daily['requests'] += 1
+        daily['input_tokens'] += record['input_tokens']
+        daily['output_tokens'] += record['output_tokens']
+        daily['cost'] += total_cost
 
-        return request_record
+    def _prune_user_stats(self) -> None:
+        """Drop per-user daily stats older than USER_STATS_DAYS, once a day."""
+        today = date.today()
+        if today == self._user_stats_pruned:
+            return
+        self._user_stats_pruned = today
+
+        cutoff = (today - timedelta(days=self.USER_STATS_DAYS)).isoformat()
+        user_stats = self.data['user_stats']
+        for user_id in list(user_stats):
+            user_days = user_stats[user_id]
+            for date_key in [d for d in user_days if d < cutoff]:
+                del user_days[date_key]
+            if not user_days:
+                del user_stats[user_id]
 
     def get_total_cost(self) -> float:
         """
@@ -222,7 +580,7 @@ class CostTracker:
             Daily cost in USD
         """
         if not date:
-            date = datetime.now().strftime('%Y-%m-%d')
+            date = datetime.now().isoformat()[:10]
 
         daily = self.data['daily_stats'].get(date, {})
         return round(daily.get('cost', 0.0), 2)
@@ -238,7 +596,7 @@ class CostTracker:
             Monthly cost in USD
         """
         if not month:
-            month = datetime.now().strftime('%Y-%m')
+            month = datetime.now().isoformat()[:7]
 
         monthly = self.data['monthly_stats'].get(month, {})
         return round(monthly.get('cost', 0.0), 2)
@@ -249,38 +607,28 @@ class CostTracker:
 
         Args:
             user_id: User ID
-            days: Number of days to look back
+            days: Number of days to look back (at most USER_STATS_DAYS are kept)
 
         Returns:
             Dictionary with user cost stats
         """
-        cutoff_date = datetime.now() - timedelta(days=days)
-
-        user_requests = [
-            r for r in self.data['requests']
-            if r['user_id'] == user_id and
-            datetime.fromisoformat(r['timestamp']) >= cutoff_date
+        # Daily buckets from the day `days` ago through today
+        today = date.today()
+        user_days = self.data['user_stats'].get(str(user_id), {})
+        buckets = [
+            user_days[date_key]
+            for date_key in (
+                (today - timedelta(days=offset)).isoformat() for offset in range(days + 1)
+            )
+            if date_key in user_days
         ]
 
-        if not user_requests:
-            return {
-                'user_id': user_id,
-                'requests': 0,
-                'input_tokens': 0,
-                'output_tokens': 0,
-                'total_cost': 0.0
-            }
-
-        total_input = sum(r['input_tokens'] for r in user_requests)
-        total_output = sum(r['output_tokens'] for r in user_requests)
-        total_cost = sum(r['total_cost'] for r in user_requests)
-
         return {
             'user_id': user_id,
-            'requests': len(user_requests),
-            'input_tokens': total_input,
-            'output_tokens': total_output,
-            'total_cost': round(total_cost, 2)
+            'requests': sum(b['requests'] for b in buckets),
+            'input_tokens': sum(b['input_tokens'] for b in buckets),
+            'output_tokens': sum(b['output_tokens'] for b in buckets),
+            'total_cost': round(sum((b['cost'] for b in buckets), 0.0), 2)
         }
 
     def get_summary(self) -> Dict:
@@ -290,8 +638,8 @@ class CostTracker:
         Returns:
             Dictionary with cost statistics
         """
-        today = datetime.now().strftime('%Y-%m-%d')
-        this_month = datetime.now().strftime('%Y-%m')
+        now = datetime.now().isoformat()
+        today, this_month = now[:10], now[:7]
 
         return {
             'total': {
@@ -351,6 +699,7 @@ class CostTracker:
             }
         }
 
+
     def reset_stats(self) -> None:
         """
         Reset all cost tracking statistics.
@@ -358,14 +707,9 @@ class CostTracker:
         """
         logger.warning("Resetting all cost tracking data")
 
-        self.data = {
-            'total_requests': 0,
-            'total_input_tokens': 0,
-            'total_output_tokens': 0,
-            'total_cost': 0.0,
-            'requests': [],
-            'daily_stats': {},
-            'monthly_stats': {}
-        }
+        self.data = self._empty_data()
+        self._pending = []
+        self._rewrite_log([])
 
         self._save_data(self.data)
+        self._last_flush = time.monotonic()
@@ -3,8 +3,111 @@ Logger Module
 Configures logging for the application.
 """
 
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to stdlib json
+    orjson = None
+
+# Attributes present on every LogRecord; anything else came from `extra=`
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Render log records as single-line JSON objects.
+
+    Timestamps are emitted as epoch seconds, so no strftime runs per record.
+    Fields passed via `extra=` are included as top-level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+
+        if orjson is not None:
+            return orjson.dumps(entry, default=str).decode('utf-8')
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    """Queue handler that leaves exception formatting to the real handler."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message now, while its arguments still hold their
+        # values; exc_info stays on the record so JsonFormatter keeps it apart
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def create_handler(level: int = logging.INFO) -> logging.Handler:
+    """
+    Create a console handler using the configured log format.
+
+    LOG_FORMAT=json selects JsonFormatter; anything else uses plain text.
+
+    Args:
+        level: Logging level
+
+    Returns:
+        Configured stream handler
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(level)
+
+    if os.getenv('LOG_FORMAT', 'text').lower() == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+    handler.setFormatter(formatter)
+
+    return handler
+
+
+def create_queue_handler(handler: logging.Handler) -> logging.Handler:
+    """
+    Wrap a handler so its output is written by a background thread.
+
+    Logging calls only enqueue the record; a QueueListener thread formats
+    and writes it, so a slow stdout never blocks the event loop. The
+    listener is stopped (and the queue drained) at interpreter exit.
+
+    Args:
+        handler: Handler that does the actual output
+
+    Returns:
+        Queue handler to attach to loggers instead
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.setLevel(handler.level)
+    return queue_handler
 
 
 def setup_logger(name: str = "telegram_bot", level: int = logging.INFO) -> logging.Logger:
@@ -21,20 +124,9 @@ def setup_logger(name: str = "telegram_bot", level: int = logging.INFO) -> loggi
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
-    # Create console handler
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(level)
-
-    # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    handler.setFormatter(formatter)
-
-    # Add handler to logger
+    # Add console handler, written from a background thread
     if not logger.handlers:
-        logger.addHandler(handler)
+        logger.addHandler(create_queue_handler(create_handler(level)))
 
     return logger
 
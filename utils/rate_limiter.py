@@ -0,0 +1,52 @@
+"""
+Rate Limiter Module
+Async sliding-window limiter for outgoing API calls.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+
+class AsyncRateLimiter:
+    """
+    Allow at most max_rate acquisitions per period seconds.
+
+    Used as `async with limiter:` around each call; callers past the limit
+    sleep until the oldest acquisition leaves the window.
+    """
+
+    def __init__(self, max_rate: int, period: float = 1.0):
+        """
+        Initialize rate limiter.
+
+        Args:
+            max_rate: Maximum acquisitions per period
+            period: Window length in seconds
+        """
+        self.max_rate = max_rate
+        self.period = period
+        self._timestamps: deque = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a call may be made within the rate limit."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                # Forget acquisitions that have left the window
+                while self._timestamps and now - self._timestamps[0] >= self.period:
+                    self._timestamps.popleft()
+
+                if len(self._timestamps) < self.max_rate:
+                    self._timestamps.append(now)
+                    return
+
+                await asyncio.sleep(self.period - (now - self._timestamps[0]))
+
+    async def __aenter__(self) -> 'AsyncRateLimiter':
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
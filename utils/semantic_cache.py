@@ -0,0 +1,129 @@
+"""
+Semantic Cache Module
+Caches AI responses for near-duplicate prompts using sentence embeddings.
+
+Optional dependencies (only needed when USE_SEMANTIC_CACHE=true):
+    pip install sentence-transformers faiss-cpu
+"""
+
+import asyncio
+import time
+from typing import List, Optional, Tuple
+
+from utils.logger import logger
+
+
+class SemanticCache:
+    """
+    Embedding-based response cache.
+
+    Prompts are embedded with sentence-transformers and stored in a FAISS
+    inner-product index over L2-normalized vectors (i.e. cosine similarity).
+    A lookup hits when the nearest stored prompt is similar enough and was
+    answered in the same communication style.
+    """
+
+    def __init__(
+        self,
+        model_name: str = 'all-MiniLM-L6-v2',
+        threshold: float = 0.92,
+        max_entries: int = 10000,
+        ttl: float = 3600
+    ):
+        """
+        Initialize semantic cache.
+
+        Args:
+            model_name: sentence-transformers model used for embeddings
+            threshold: Minimum cosine similarity for a cache hit
+            max_entries: Maximum number of cached prompts (FIFO eviction)
+            ttl: Time-to-live for cached responses in seconds
+
+        Raises:
+            ImportError: If faiss or sentence-transformers is not installed
+        """
+        import faiss
+        import numpy as np
+        from sentence_transformers import SentenceTransformer
+
+        self._faiss = faiss
+        self._np = np
+        self._model = SentenceTransformer(model_name)
+        self._dim = self._model.get_sentence_embedding_dimension()
+        self._index = faiss.IndexFlatIP(self._dim)
+
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        # Parallel to index rows: (prompt, response, stored_at, style_key)
+        self._entries: List[Tuple[str, str, float, tuple]] = []
+        self._embeddings = np.empty((0, self._dim), dtype='float32')
+
+        logger.info(f"Semantic cache initialized with model: {model_name}")
+
+    async def embed(self, prompt: str):
+        """
+        Embed a prompt off the event loop.
+
+        Args:
+            prompt: Prompt text
+
+        Returns:
+            Normalized float32 embedding of shape (1, dim)
+        """
+        embedding = await asyncio.to_thread(
+            self._model.encode, [prompt], normalize_embeddings=True
+        )
+        return self._np.asarray(embedding, dtype='float32')
+
+    def lookup(self, embedding, style_key: tuple) -> Optional[str]:
+        """
+        Find a cached response for a semantically similar prompt.
+
+        Args:
+            embedding: Prompt embedding from embed()
+            style_key: Style tuple the response must match
+
+        Returns:
+            Cached response text or None on miss
+        """
+        if not self._entries:
+            return None
+
+        scores, indices = self._index.search(embedding, 1)
+        score, index = float(scores[0][0]), int(indices[0][0])
+        if index < 0 or score < self.threshold:
+            return None
+
+        _, response, stored_at, entry_style_key = self._entries[index]
+        if entry_style_key != style_key or time.time() - stored_at > self.ttl:
+            return None
+
+        return response
+
+    def add(self, embedding, prompt: str, response: str, style_key: tuple) -> None:
+        """
+        Add a prompt/response pair to the cache.
+
+        Args:
+            embedding: Prompt embedding from embed()
+            prompt: Prompt text
+            response: Response text
+            style_key: Style tuple the response was generated for
+        """
+        self._index.add(embedding)
+        self._embeddings = self._np.vstack((self._embeddings, embedding))
+        self._entries.append((prompt, response, time.time(), style_key))
+
+        if len(self._entries) > self.max_entries:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop the oldest 10% of entries and rebuild the index."""
+        drop = max(1, self.max_entries // 10)
+        self._entries = self._entries[drop:]
+        self._embeddings = self._embeddings[drop:]
+
+        self._index.reset()
+        self._index.add(self._embeddings)
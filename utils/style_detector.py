@@ -4,7 +4,27 @@ Analyzes user messages to detect communication style and preferences.
 """
 
 import re
-from typing import Dict
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import ahocorasick
+except ImportError:  # Optional: falls back to one substring search per marker
+    ahocorasick = None
+
+
+# Runs of emoji characters
+_EMOJI_RUN = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F1E0-\U0001F1FF"  # flags
+    "\U00002702-\U000027B0"  # dingbats
+    "\U000024C2-\U0001F251"
+    "]+",
+    flags=re.UNICODE
+)
 
 
 class StyleDetector:
@@ -42,14 +62,27 @@ class StyleDetector:
         'спасибо', 'пожалуйста', 'хорошо', 'да', 'нет'
     ]
 
+    # Letters specific to Kazakh Cyrillic
+    KAZAKH_CHARS = ['ә', 'ғ', 'қ', 'ң', 'ө', 'ұ', 'ү', 'һ', 'і']
+
+    # Short messages ("да", "привет", a lone emoji) repeat often; longer ones rarely do
+    CACHE_MAX_TEXT_LENGTH = 256
+    CACHE_MAXSIZE = 4096
+
     def __init__(self):
         """Initialize style detector."""
-        pass
+        # LRU of text -> style for short messages
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
 
     def analyze_style(self, text: str) -> Dict[str, str]:
         """
         Analyze text and return style parameters.
 
+        Results for short messages are memoized; a fresh dict is returned on
+        every call so callers may modify it.
+
         Args:
             text: User's message text
 
@@ -63,36 +96,157 @@ class StyleDetector:
         if not text:
             return self._default_style()
 
+        if len(text) > self.CACHE_MAX_TEXT_LENGTH:
+            return self._analyze(text)
+
+        style = self._cache.get(text)
+        if style is None:
+            self._cache_misses += 1
+            style = self._analyze(text)
+            self._cache[text] = style
+            if len(self._cache) > self.CACHE_MAXSIZE:
+                self._cache.popitem(last=False)
+        else:
+            self._cache_hits += 1
+            self._cache.move_to_end(text)
+
+        return dict(style)
+
+    def cache_info(self) -> Dict[str, int]:
+        """
+        Get style cache statistics.
+
+        Returns:
+            Dictionary with hits, misses, size and maxsize
+        """
+        return {
+            'hits': self._cache_hits,
+            'misses': self._cache_misses,
+            'size': len(self._cache),
+            'maxsize': self.CACHE_MAXSIZE
+        }
+
+    def _analyze(self, text: str) -> Dict[str, str]:
+        """
+        Run all detectors on non-empty text.
+
+        Args:
+            text: User's message text
+
+        Returns:
+            Style dictionary
+        """
+        return self.finalize(self.analyze_incremental(None, text))
+
+    def analyze_incremental(self, counts: Optional[Dict[str, int]], text: str) -> Dict[str, int]:
+        """
+        Add one message's style features to running counts.
+
+        Each message is scanned on its own, so earlier messages are never
+        re-scanned. Finalizing matches analyzing the messages joined with
+        spaces, except that a marker only found across a message boundary
+        (e.g. a phrase split over two messages) is not counted.
+
+        Args:
+            counts: Counts from previous calls, or None to start
+            text: New message text
+
+        Returns:
+            New counts dictionary (JSON-serializable, e.g. for FSM storage)
+        """
         text_lower = text.lower()
+        lower_words = text_lower.split()
+
+        # Markers count once however often they appear, so they are kept as
+        # bitmasks of which markers were seen and merged with OR
+        seen = self._marker_masks(text_lower)
+        seen['kazakh_chars'] = int(any(char in text_lower for char in self.KAZAKH_CHARS))
+        totals = {
+            'long_words': sum(1 for word in lower_words if len(word) > 12),
+            'periods': text.count('.'),
+            'exclamations': text.count('!'),
+            'questions': text.count('?'),
+            'emojis': self._count_emojis(text),
+            'words': len(lower_words),
+            'length': len(text),
+        }
+
+        if counts:
+            for key in seen:
+                seen[key] |= counts[key]
+            for key in totals:
+                totals[key] += counts[key]
+            totals['length'] += 1  # The space that would join the messages
+
+        return {**seen, **totals}
+
+    @staticmethod
+    def _marker_masks(text: str) -> Dict[str, int]:
+        """
+        Get a bitmask per marker list of the markers found in text.
+
+        Bit i of a list's mask is set when the list's i-th marker occurs in
+        text. Markers shared by several lists are searched for only once,
+        and with pyahocorasick installed all lists are matched in one pass.
+
+        Args:
+            text: Lowercased message text
+
+        Returns:
+            Dictionary of list name -> bitmask
+        """
+        seen = dict.fromkeys(_MARKER_LISTS, 0)
+
+        # One automaton pass when pyahocorasick is installed; it reports
+        # overlapping matches, so nested markers (прив, привет) all count
+        if _MARKER_AUTOMATON is not None:
+            for _, bits in _MARKER_AUTOMATON.iter(text):
+                for name, bit in bits:
+                    seen[name] |= bit
+            return seen
+
+        for marker, bits in _MARKER_BITS:
+            if marker in text:
+                for name, bit in bits:
+                    seen[name] |= bit
+        return seen
+
+    def finalize(self, counts: Dict[str, int]) -> Dict[str, str]:
+        """
+        Derive style parameters from accumulated counts.
+
+        Args:
+            counts: Counts from analyze_incremental()
 
-        formality = self._detect_formality(text_lower)
-        language = self._detect_language(text_lower)
-        emoji_usage = self._detect_emoji_usage(text)
-        verbosity = self._detect_verbosity(text)
+        Returns:
+            Style dictionary, as returned by analyze_style()
+        """
+        if not counts:
+            return self._default_style()
 
         return {
-            'formality': formality,
-            'language': language,
-            'emoji_usage': emoji_usage,
-            'verbosity': verbosity
+            'formality': self._detect_formality(counts),
+            'language': self._detect_language(counts),
+            'emoji_usage': self._detect_emoji_usage(counts),
+            'verbosity': self._detect_verbosity(counts)
         }
 
-    def _detect_formality(self, text: str) -> str:
+    def _detect_formality(self, counts: Dict[str, int]) -> str:
         """
         Detect formality level.
 
         Args:
-            text: Lowercased message text
+            counts: Style feature counts
 
         Returns:
             'formal' or 'casual'
         """
-        formal_count = sum(1 for marker in self.FORMAL_RUSSIAN if marker in text)
-        casual_count = sum(1 for marker in self.CASUAL_RUSSIAN if marker in text)
+        formal_count = counts['formal'].bit_count()
+        casual_count = counts['casual'].bit_count()
 
         # Check for formal indicators
-        has_full_punctuation = text.count('.') > 0 or text.count('!') > 1
-        has_long_words = any(len(word) > 12 for word in text.split())
+        has_full_punctuation = counts['periods'] > 0 or counts['exclamations'] > 1
+        has_long_words = counts['long_words'] > 0
 
         if formal_count > casual_count:
             return 'formal'
@@ -105,71 +259,70 @@ class StyleDetector:
             else:
                 return 'casual'
 
-    def _detect_language(self, text: str) -> str:
+    def _detect_language(self, counts: Dict[str, int]) -> str:
         """
         Detect language (Russian or Kazakh).
 
         Args:
-            text: Lowercased message text
+            counts: Style feature counts
 
         Returns:
             'russian' or 'kazakh'
         """
-        kazakh_count = sum(1 for marker in self.KAZAKH_MARKERS if marker in text)
-        russian_count = sum(1 for marker in self.RUSSIAN_MARKERS if marker in text)
+        # Any Kazakh-specific letter decides it without comparing marker counts
+        if counts['kazakh_chars']:
+            return 'kazakh'
 
-        # Check for specific Kazakh characters
-        kazakh_chars = ['ә', 'ғ', 'қ', 'ң', 'ө', 'ұ', 'ү', 'һ', 'і']
-        has_kazakh_chars = any(char in text for char in kazakh_chars)
+        kazakh_count = counts['kazakh'].bit_count()
+        russian_count = counts['russian'].bit_count()
 
-        if kazakh_count > russian_count or has_kazakh_chars:
+        if kazakh_count > russian_count:
             return 'kazakh'
         else:
             return 'russian'
 
-    def _detect_emoji_usage(self, text: str) -> str:
+    def _count_emojis(self, text: str) -> int:
         """
-        Detect emoji usage level.
+        Count runs of emoji characters.
 
         Args:
             text: Original message text (not lowercased)
 
+        Returns:
+            Number of emoji runs
+        """
+        return len(_EMOJI_RUN.findall(text))
+
+    def _detect_emoji_usage(self, counts: Dict[str, int]) -> str:
+        """
+        Detect emoji usage level.
+
+        Args:
+            counts: Style feature counts
+
         Returns:
             'high' or 'low'
         """
-        # Count emojis using regex
-        emoji_pattern = re.compile(
-            "["
-            "\U0001F600-\U0001F64F"  # emoticons
-            "\U0001F300-\U0001F5FF"  # symbols & pictographs
-            "\U0001F680-\U0001F6FF"  # transport & map symbols
-            "\U0001F1E0-\U0001F1FF"  # flags
-            "\U00002702-\U000027B0"  # dingbats
-            "\U000024C2-\U0001F251"
-            "]+",
-            flags=re.UNICODE
-        )
-
-        emoji_count = len(emoji_pattern.findall(text))
+        emoji_count = counts['emojis']
 
         # High usage: 2 or more emojis, or emoji density > 10%
-        if emoji_count >= 2 or (emoji_count > 0 and len(text) < 20):
+        if emoji_count >= 2 or (emoji_count > 0 and counts['length'] < 20):
             return 'high'
         else:
             return 'low'
 
-    def _detect_verbosity(self, text: str) -> str:
+    def _detect_verbosity(self, counts: Dict[str, int]) -> str:
         """
         Detect verbosity level.
 
         Args:
-            text: Message text
+            counts: Style feature counts
 
         Returns:
             'brief' or 'detailed'
         """
-        word_count = len(text.split())
-        sentence_count = max(1, text.count('.') + text.count('!') + text.count('?'))
+        word_count = counts['words']
+        sentence_count = max(1, counts['periods'] + counts['exclamations'] + counts['questions'])
 
         # Brief: less than 10 words or short sentences
         # Detailed: more than 20 words or multiple sentences
@@ -270,3 +423,50 @@ class StyleDetector:
             length_instruction = "Қысқа, нұсқа жауаптар бер (2-3 сөйлем)."
 
         return f"{tone}{emoji_instruction}{length_instruction}"
+
+
+def _build_marker_bits(marker_lists: Dict[str, List[str]]) -> List[Tuple[str, List[Tuple[str, int]]]]:
+    """
+    Map each distinct marker to the list bits it sets when found.
+
+    Args:
+        marker_lists: Dictionary of list name -> markers
+
+    Returns:
+        List of (marker, list of (list name, bit)), one entry per distinct marker
+    """
+    bits: Dict[str, List[Tuple[str, int]]] = {}
+    for name, markers in marker_lists.items():
+        for i, marker in enumerate(markers):
+            bits.setdefault(marker, []).append((name, 1 << i))
+    return list(bits.items())
+
+
+# Marker lists counted by analyze_incremental, scanned together
+_MARKER_LISTS = {
+    'formal': StyleDetector.FORMAL_RUSSIAN,
+    'casual': StyleDetector.CASUAL_RUSSIAN,
+    'kazakh': StyleDetector.KAZAKH_MARKERS,
+    'russian': StyleDetector.RUSSIAN_MARKERS,
+}
+_MARKER_BITS = _build_marker_bits(_MARKER_LISTS)
+
+
+def _build_marker_automaton():
+    """
+    Build an Aho-Corasick automaton over all markers, if pyahocorasick is installed.
+
+    Returns:
+        Automaton mapping each marker to its list bits, or None
+    """
+    if ahocorasick is None:
+        return None
+
+    automaton = ahocorasick.Automaton()
+    for marker, bits in _MARKER_BITS:
+        automaton.add_word(marker, bits)
+    automaton.make_automaton()
+    return automaton
+
+
+_MARKER_AUTOMATON = _build_marker_automaton()